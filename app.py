@@ -1,7 +1,7 @@
 import os
 import logging
 import google.generativeai as genai
-from flask import Flask, jsonify
+from flask import Flask, jsonify, request
 from flask_wtf.csrf import CSRFProtect
 from flask_talisman import Talisman
 from jinja2 import ChoiceLoader, FileSystemLoader
@@ -13,16 +13,17 @@ from config import Config
 # Shared extensions (limiter)
 from extensions import limiter
 
-# Import S3 Adapter and Presidio
+# Import S3 Adapter
 from s3_adapter import S3Client
-from presidio_analyzer import AnalyzerEngine
-from presidio_analyzer.nlp_engine import NlpEngineProvider
 
 # Import Blueprints
 from main_routes import bp as main_bp
 from features.info.routes import bp as info_bp
 from features.multimedia.routes import bp as multimedia_bp
 from features.pii_redaction.routes import bp as pii_bp
+from features.pii_redaction.analysis_utils import create_analyzer
+from features.pii_redaction.pattern_utils import PatternMatcher
+from features.pii_redaction import workers as pii_workers
 from features.summarization.routes import bp as summarization_bp
 from features.translation.routes import bp as translation_bp
 
@@ -44,6 +45,14 @@ def create_app(config_class=Config):
         FileSystemLoader('features')
     ])
 
+    # Per-endpoint upload caps (e.g. batch blur). Registered before
+    # CSRFProtect because its hook parses the form and would enforce the global cap.
+    @app.before_request
+    def _apply_upload_limit_override():
+        override = app.config.get('MAX_CONTENT_LENGTH_OVERRIDES', {}).get(request.endpoint)
+        if override:
+            request.max_content_length = override
+
     # 1a. CSRF protection on all state-changing requests.
     # GETs (sitemap, robots, downloads) are unaffected.
     csrf = CSRFProtect(app)
@@ -143,13 +152,14 @@ def create_app(config_class=Config):
     # 4. Initialize Presidio (PII)
     app.config['PRESIDIO_ANALYZER_AVAILABLE'] = False
     app.presidio_analyzer = None
+    app.pii_pattern_matcher = None
     try:
         logging.info("Global: Initializing Presidio Analyzer Engine...")
-        provider = NlpEngineProvider(nlp_configuration={
-            "nlp_engine_name": "spacy",
-            "models": [{"lang_code": "en", "model_name": "en_core_web_lg"}]
-        })
-        app.presidio_analyzer = AnalyzerEngine(nlp_engine=provider.create_engine(), supported_languages=["en"])
+        app.presidio_analyzer = create_analyzer(
+            app.config.get('PII_SPACY_MODEL', 'en_core_web_lg'),
+            disabled_components=app.config.get('PII_SPACY_DISABLED_COMPONENTS', ()),
+        )
+        app.pii_pattern_matcher = PatternMatcher(app.presidio_analyzer)
         app.config['PRESIDIO_ANALYZER_AVAILABLE'] = True
     except Exception as e:
         logging.error(f"Global: Failed to initialize Presidio: {e}")
@@ -162,6 +172,14 @@ def create_app(config_class=Config):
     app.register_blueprint(summarization_bp)
     app.register_blueprint(translation_bp)
 
+    # 6. Fork the PII analysis workers (PII_WORKER_PROCESSES) now: the model is
+    # loaded and the server hasn't started its threads yet.
+    if app.presidio_analyzer is not None:
+        try:
+            pii_workers.start(app.presidio_analyzer, app.pii_pattern_matcher)
+        except Exception as e:
+            logging.error(f"Global: Failed to start PII analysis workers, analyzing inline: {e}")
+
     return app
 
 # For local development compatibility
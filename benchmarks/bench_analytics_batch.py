@@ -0,0 +1,107 @@
+# benchmarks/bench_analytics_batch.py
+"""
+Per-image latency and cost of Gemini image analysis: one call per image
+(batch size 1) vs several images packed into one generate_content call.
+
+By default Gemini is stubbed: each call costs a fixed overhead plus a
+per-image time, and reports usage_metadata with ~258 prompt tokens per image
+(Gemini's flat rate for an image) and --output-tokens per analysis.
+--malformed drops that fraction of entries from batch responses so the
+single-image fallback shows up in the numbers. --live uses the real API
+(GOOGLE_API_KEY and GEMINI_MODEL from the environment).
+
+Usage (from the repo root):
+    python -m benchmarks.bench_analytics_batch [--images 16] [--batch-sizes 1 4 8]
+        [--overhead-ms 1200] [--per-image-ms 150] [--malformed 0.0] [--live]
+"""
+import argparse
+import json
+import os
+import random
+import re
+import time
+
+import cv2
+
+from features.multimedia.analytics_utils import analyze_images_in_batches, estimate_cost_usd
+from benchmarks.synthetic import synthetic_photo
+
+IMAGE_TOKENS = 258
+
+
+class StubUsage:
+    def __init__(self, prompt_token_count, candidates_token_count):
+        self.prompt_token_count = prompt_token_count
+        self.candidates_token_count = candidates_token_count
+
+
+class StubResponse:
+    def __init__(self, text, usage_metadata):
+        self.text = text
+        self.usage_metadata = usage_metadata
+
+
+class StubBatchGeminiModel:
+    """Stands in for genai.GenerativeModel: answers single and batch prompts."""
+
+    def __init__(self, overhead_seconds: float, per_image_seconds: float, output_tokens: int,
+                 malformed: float = 0.0, seed: int = 0):
+        self.overhead_seconds = overhead_seconds
+        self.per_image_seconds = per_image_seconds
+        self.output_tokens = output_tokens
+        self.malformed = malformed
+        self.rng = random.Random(seed)
+
+    def generate_content(self, contents, request_options=None):
+        text_parts = [part for part in contents if isinstance(part, str)]
+        image_count = len(contents) - len(text_parts)
+        time.sleep(self.overhead_seconds + self.per_image_seconds * image_count)
+        prompt_tokens = sum(len(part) for part in text_parts) // 4 + IMAGE_TOKENS * image_count
+        analysis = {"description": "stub", "rich_description": "stub", "extracted_text": "",
+                    "safety_flags": {}, "detected_objects": []}
+        # Batch prompts are the ones that label their images.
+        if any(re.match(r'Image \d+:', part) for part in text_parts):
+            entries = [dict(analysis, index=i) for i in range(image_count) if self.rng.random() >= self.malformed]
+            text = json.dumps(entries)
+        else:
+            text = json.dumps(analysis)
+        return StubResponse(text, StubUsage(prompt_tokens, self.output_tokens * image_count))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--images', type=int, default=16)
+    parser.add_argument('--batch-sizes', nargs='+', type=int, default=[1, 4, 8])
+    parser.add_argument('--overhead-ms', type=float, default=1200)
+    parser.add_argument('--per-image-ms', type=float, default=150)
+    parser.add_argument('--output-tokens', type=int, default=220)
+    parser.add_argument('--malformed', type=float, default=0.0)
+    parser.add_argument('--input-usd-per-mtok', type=float, default=0.075)
+    parser.add_argument('--output-usd-per-mtok', type=float, default=0.30)
+    parser.add_argument('--live', action='store_true')
+    args = parser.parse_args()
+
+    images = [cv2.imencode('.jpg', synthetic_photo(1024, 768, seed=i), [cv2.IMWRITE_JPEG_QUALITY, 85])[1].tobytes()
+              for i in range(args.images)]
+    if args.live:
+        import google.generativeai as genai
+        genai.configure(api_key=os.environ['GOOGLE_API_KEY'])
+        model = genai.GenerativeModel(os.environ.get('GEMINI_MODEL', 'gemini-1.5-flash-latest'))
+    else:
+        model = StubBatchGeminiModel(args.overhead_ms / 1000, args.per_image_ms / 1000, args.output_tokens, args.malformed)
+
+    print(f"{args.images} images, {'live API' if args.live else f'stub {args.overhead_ms:.0f} ms/call + {args.per_image_ms:.0f} ms/image'}")
+    print(f"{'batch':>5} {'calls':>6} {'fallbacks':>9} {'seconds':>8} {'s/image':>8} {'in tok':>8} {'out tok':>8} {'USD/image':>10}")
+    for batch_size in args.batch_sizes:
+        start = time.perf_counter()
+        results, usage = analyze_images_in_batches(images, model, batch_size=batch_size, deadline_seconds=600)
+        seconds = time.perf_counter() - start
+        failed = sum(1 for result in results if not result or result.get('error'))
+        cost = estimate_cost_usd(usage, args.input_usd_per_mtok, args.output_usd_per_mtok)
+        print(f"{batch_size:>5} {usage['calls']:>6} {usage['fallbacks']:>9} {seconds:>8.2f} {seconds / len(images):>8.3f} "
+              f"{usage['prompt_tokens']:>8} {usage['output_tokens']:>8} {cost / len(images):>10.6f}"
+              + (f"  ({failed} failed)" if failed else ''))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+# benchmarks/bench_analytics_concurrency.py
+"""
+Critical path of the analytics route with a stubbed Gemini call.
+
+The stub sleeps for a fixed latency. Two pieces of local work are timed on
+their own first: the Gemini payload prep (prepare_image_for_analysis, which
+runs inside the Gemini branch on both paths) and the preview encode plus
+dominant-color extraction (build_preview_and_colors), which the concurrent
+path moves off the critical path. "preview + colors on critical path" is
+what remains of the latter: median request time minus stub latency minus
+payload prep. "sequential" reproduces the previous route order.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_analytics_concurrency [--latency-ms 1500] [--size 1920x1280] [--repeat 5]
+"""
+import argparse
+import json
+import statistics
+import time
+
+import cv2
+
+from features.multimedia.analytics_utils import (
+    analyze_image_with_gemini, analyze_image_concurrently, build_preview_and_colors, prepare_image_for_analysis
+)
+from benchmarks.synthetic import synthetic_photo
+
+
+class StubResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class StubGeminiModel:
+    """Stands in for genai.GenerativeModel with a fixed response latency."""
+
+    def __init__(self, latency_seconds: float):
+        self.latency_seconds = latency_seconds
+
+    def generate_content(self, contents, request_options=None):
+        time.sleep(self.latency_seconds)
+        return StubResponse(json.dumps({
+            "description": "stub", "rich_description": "stub", "extracted_text": "",
+            "safety_flags": {}, "detected_objects": [],
+        }))
+
+
+def sequential(image_bytes, model):
+    analysis = analyze_image_with_gemini(image_bytes, model)
+    preview_bytes, colors = build_preview_and_colors(image_bytes)
+    return analysis, colors, preview_bytes
+
+
+def concurrent(image_bytes, model):
+    return analyze_image_concurrently(image_bytes, lambda b: analyze_image_with_gemini(b, model))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--latency-ms', type=float, default=1500)
+    parser.add_argument('--size', default='1920x1280')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.size.lower().split('x'))
+    image_bytes = cv2.imencode('.jpg', synthetic_photo(width, height), [cv2.IMWRITE_JPEG_QUALITY, 85])[1].tobytes()
+    model = StubGeminiModel(args.latency_ms / 1000)
+
+    def median_ms(fn):
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
+
+    prep_ms = median_ms(lambda: prepare_image_for_analysis(image_bytes))
+    preview_ms = median_ms(lambda: build_preview_and_colors(image_bytes))
+    print(f"stub latency {args.latency_ms:.0f} ms, image {width}x{height} ({len(image_bytes) / 1024:.0f} KB)")
+    print(f"Gemini payload prep (in the Gemini branch on both paths) {prep_ms:7.1f} ms")
+    print(f"preview encode + dominant colors                         {preview_ms:7.1f} ms")
+    for name, fn in (('sequential', sequential), ('concurrent', concurrent)):
+        median = median_ms(lambda: fn(image_bytes, model))
+        on_path = median - args.latency_ms - prep_ms
+        print(f"{name:<11} median {median:8.1f} ms  preview + colors on critical path {on_path:7.1f} ms")
+
+if __name__ == '__main__':
+    main()
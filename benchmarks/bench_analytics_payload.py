@@ -0,0 +1,67 @@
+# benchmarks/bench_analytics_payload.py
+"""
+Gemini upload payload size (and optionally live latency) per analysis resolution.
+
+Offline it reports how long prepare_image_for_analysis takes and how many
+bytes would be uploaded at each --dims value (0 = send the normalized image).
+With --live it also calls the real model (GOOGLE_API_KEY and GEMINI_MODEL
+from the environment) and prints end-to-end latency plus the short description,
+so resolution can be tuned against response quality.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_analytics_payload [--image photo.jpg] [--dims 512 768 1024 0] [--live]
+"""
+import argparse
+import os
+import statistics
+import time
+
+import cv2
+
+from features.multimedia.analytics_utils import analyze_image_with_gemini, prepare_image_for_analysis
+from benchmarks.synthetic import synthetic_photo
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--image', help='Normalized image to send; defaults to a synthetic 1920x1280 JPEG.')
+    parser.add_argument('--dims', nargs='+', type=int, default=[512, 768, 1024, 1536, 0])
+    parser.add_argument('--quality', type=int, default=85)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--live', action='store_true', help='Also call Gemini and report latency.')
+    args = parser.parse_args()
+
+    if args.image:
+        with open(args.image, 'rb') as f:
+            image_bytes = f.read()
+    else:
+        image_bytes = cv2.imencode('.jpg', synthetic_photo(1920, 1280), [cv2.IMWRITE_JPEG_QUALITY, 85])[1].tobytes()
+
+    model = None
+    if args.live:
+        import google.generativeai as genai
+        genai.configure(api_key=os.environ['GOOGLE_API_KEY'])
+        model = genai.GenerativeModel(os.environ.get('GEMINI_MODEL', 'gemini-1.5-flash-latest'))
+
+    print(f"source: {len(image_bytes) / 1024:.0f} KB")
+    print(f"{'max dim':>8} {'prepare ms':>11} {'payload KB':>11} {'latency s':>10}  description")
+    for max_dimension in args.dims:
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            payload = prepare_image_for_analysis(image_bytes, max_dimension, args.quality)
+            timings.append((time.perf_counter() - start) * 1000)
+
+        latency, description = '', ''
+        if model is not None:
+            start = time.perf_counter()
+            analysis = analyze_image_with_gemini(image_bytes, model, max_dimension=max_dimension, jpeg_quality=args.quality)
+            latency = f"{time.perf_counter() - start:.2f}"
+            description = (analysis or {}).get('description') or (analysis or {}).get('error', '')
+
+        label = max_dimension or 'native'
+        print(f"{label:>8} {statistics.median(timings):>11.1f} {len(payload) / 1024:>11.0f} {latency:>10}  {description}")
+
+
+if __name__ == '__main__':
+    main()
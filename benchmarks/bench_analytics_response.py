@@ -0,0 +1,84 @@
+# benchmarks/bench_analytics_response.py
+"""
+Analytics results: response size and time until the analysis text can render.
+
+"inline" is the previous behaviour: the normalized image base64-inlined as a
+data URL, so the browser has to receive (and parse past) the whole image
+before it sees the analysis. "served" is the current partial, which points at
+a preview URL fetched separately (and cacheable).
+
+Time to render is approximated as the route's server time plus transferring
+the HTML at --mbps; the image itself loads in parallel once referenced.
+Gemini is stubbed with zero latency.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_analytics_response [--size 4032x3024] [--mbps 10] [--repeat 3]
+"""
+import argparse
+import base64
+import io
+import re
+import statistics
+import time
+
+import cv2
+
+from benchmarks.bench_analytics_concurrency import StubGeminiModel
+from benchmarks.local_storage import LocalBucket, multimedia_app
+from benchmarks.synthetic import synthetic_photo
+from features.multimedia import routes
+from features.multimedia.image_utils import normalize_and_resize_image
+from features.multimedia.cache_utils import IMAGE_ANALYSIS_CACHE
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', default='4032x3024')
+    parser.add_argument('--mbps', type=float, default=10.0)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    width, height = (int(v) for v in args.size.split('x'))
+
+    routes.genai.GenerativeModel = lambda model_name: StubGeminiModel(0.0)
+    bucket = LocalBucket()
+    try:
+        client = multimedia_app(bucket, GEMINI_CONFIGURED=True).test_client()
+        upload = cv2.imencode('.jpg', synthetic_photo(width, height, seed=5), [cv2.IMWRITE_JPEG_QUALITY, 92])[1].tobytes()
+
+        timings, html, preview = [], b'', b''
+        for _ in range(args.repeat):
+            # Measure the full path every time, not a cache hit.
+            for key, _value, _cost in IMAGE_ANALYSIS_CACHE.items():
+                IMAGE_ANALYSIS_CACHE.pop(key)
+            start = time.perf_counter()
+            response = client.post('/process/multimedia/analytics/analyze_image',
+                                   data={'file': (io.BytesIO(upload), 'photo.jpg')}, content_type='multipart/form-data')
+            html = response.data
+            timings.append(time.perf_counter() - start)
+            preview = client.get(re.search(rb'<img src="([^"]+)" alt="Analyzed Image"', html).group(1).decode()).data
+
+        server_ms = statistics.median(timings) * 1000
+        # Previous partial: same HTML plus the normalized image as a data URL.
+        normalized = normalize_and_resize_image(upload)
+        data_url_bytes = len("data:image/jpeg;base64,") + len(base64.b64encode(normalized))
+        base64_ms = _time_ms(lambda: base64.b64encode(normalized).decode('utf-8'))
+        inline_html = len(html) + data_url_bytes
+        bytes_per_ms = args.mbps * 1e6 / 8 / 1000
+
+        print(f"{'variant':<8} {'HTML KB':>8} {'image KB':>9} {'total KB':>9} {'server ms':>10} {'text ready ms':>14}")
+        print(f"{'inline':<8} {inline_html / 1024:>8.1f} {0:>9.1f} {inline_html / 1024:>9.1f} "
+              f"{server_ms + base64_ms:>10.1f} {server_ms + base64_ms + inline_html / bytes_per_ms:>14.1f}")
+        print(f"{'served':<8} {len(html) / 1024:>8.1f} {len(preview) / 1024:>9.1f} {(len(html) + len(preview)) / 1024:>9.1f} "
+              f"{server_ms:>10.1f} {server_ms + len(html) / bytes_per_ms:>14.1f}")
+    finally:
+        bucket.close()
+
+
+def _time_ms(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+if __name__ == '__main__':
+    main()
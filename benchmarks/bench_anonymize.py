@@ -0,0 +1,52 @@
+# benchmarks/bench_anonymize.py
+"""
+Per-face cost of the anonymization modes across face sizes.
+
+Compares the original 151x151 Gaussian against the downsample blur and
+mosaic pixelation. "err" is the mean absolute difference from the full
+Gaussian, to show how close the fast approximation is.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_anonymize [--faces 64 128 256 512 1024] [--repeat 5]
+"""
+import argparse
+import statistics
+import time
+
+import cv2
+import numpy as np
+
+from features.multimedia.blur_utils import anonymize_faces
+from benchmarks.synthetic import synthetic_photo
+
+MODES = [('blur', 35), ('blur', 151), ('fast_blur', 151), ('pixelate', 10), ('redact', -1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--faces', nargs='+', type=int, default=[64, 128, 256, 512, 1024])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'face px':>8}  {'mode':<10} {'size':>5} {'median ms':>10} {'err':>6}")
+    for face_px in args.faces:
+        # Leave room for the 20% padding on every side.
+        canvas = synthetic_photo(int(face_px * 1.6), int(face_px * 1.6), seed=face_px)
+        faces = [{'box': (int(face_px * 0.3), int(face_px * 0.3), face_px, face_px)}]
+        reference = anonymize_faces(canvas.copy(), faces, 151, 'blur')
+
+        for mode, size in MODES:
+            timings = []
+            for _ in range(args.repeat):
+                image = canvas.copy()
+                start = time.perf_counter()
+                anonymize_faces(image, faces, size, mode)
+                timings.append((time.perf_counter() - start) * 1000)
+            err = ''
+            if mode == 'fast_blur':
+                err = f"{np.mean(cv2.absdiff(image, reference)):.2f}"
+            print(f"{face_px:>8}  {mode:<10} {size:>5} {statistics.median(timings):>10.2f} {err:>6}")
+
+
+if __name__ == '__main__':
+    main()
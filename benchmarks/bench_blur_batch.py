@@ -0,0 +1,64 @@
+# benchmarks/bench_blur_batch.py
+"""
+Batch blur throughput (images/sec) through the same pipeline the batch
+endpoint uses, with and without the image worker pool.
+
+Storage is not involved; the result zip is streamed into a byte counter.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_blur_batch [--images 24] [--concurrency 1 2 4 8]
+        [--processes 4]
+"""
+import argparse
+import os
+import time
+
+import cv2
+
+from features.multimedia import workers
+from features.multimedia.batch_utils import blur_batch_image, iter_batch_results, stream_zip
+from features.multimedia.image_utils import TARGET_RESOLUTION
+from benchmarks.group_photos import group_photo
+
+
+def make_sources(count: int) -> list[dict]:
+    sources = []
+    for i in range(count):
+        image, _ = group_photo(2400, 1600, faces=4, face_height=180, seed=i)
+        data = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes()
+        sources.append({'name': f"photo-{i}.jpg", 'file_root': f"photo-{i}", 'read': lambda data=data: data})
+    return sources
+
+
+def run_batch(sources: list[dict], concurrency: int) -> tuple[float, int]:
+    def process(source):
+        return blur_batch_image(source['read'](), TARGET_RESOLUTION, 151, 'blur', 'jpeg')
+
+    start = time.perf_counter()
+    results = [(f"{source['file_root']}.jpg", result['image_bytes'])
+               for _, source, result, error in iter_batch_results(sources, process, concurrency) if error is None]
+    zip_bytes = sum(len(chunk) for chunk in stream_zip((name, lambda data=data: data) for name, data in results))
+    return len(results) / (time.perf_counter() - start), zip_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--images', type=int, default=24)
+    parser.add_argument('--concurrency', nargs='+', type=int, default=[1, 2, 4, 8])
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    sources = make_sources(args.images)
+    print(f"{'mode':<12} {'threads':>7} {'images/s':>9} {'zip MB':>7}")
+    for label, processes in (('inline', 0), (f"pool x{args.processes}", args.processes)):
+        workers.configure(processes, max_pending=max(args.concurrency))
+        workers.start()
+        run_batch(sources[:1], 1)  # warm-up
+        for concurrency in args.concurrency:
+            throughput, zip_bytes = run_batch(sources, concurrency)
+            print(f"{label:<12} {concurrency:>7} {throughput:>9.2f} {zip_bytes / 1024 / 1024:>7.1f}")
+    workers.configure(0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+# benchmarks/bench_blur_encoding.py
+"""
+Encode time and output size of blurred images per output format.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_blur_encoding [--sizes 1024x768 1920x1280] [--repeat 5]
+"""
+import argparse
+import statistics
+import time
+
+from features.multimedia.blur_utils import encode_image
+from benchmarks.synthetic import synthetic_photo
+
+CASES = [
+    ('png', {'png_compression': 1}),
+    ('png', {'png_compression': 3}),
+    ('jpeg', {'quality': 85}),
+    ('jpeg', {'quality': 90}),
+    ('webp', {'quality': 80}),
+    ('webp', {'quality': 90}),
+]
+
+
+def parse_size(value: str) -> tuple[int, int]:
+    width, height = value.lower().split('x')
+    return int(width), int(height)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', nargs='+', type=parse_size, default=[(1024, 768), (1920, 1280)])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'size':>11}  {'format':<6} {'setting':<18} {'median ms':>10} {'size KB':>9}")
+    for width, height in args.sizes:
+        image = synthetic_photo(width, height)
+        for output_format, params in CASES:
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                encoded = encode_image(image, output_format, **params)
+                timings.append((time.perf_counter() - start) * 1000)
+            setting = ', '.join(f"{k}={v}" for k, v in params.items())
+            print(f"{width:>5}x{height:<5}  {output_format:<6} {setting:<18} {statistics.median(timings):>10.1f} {len(encoded) / 1024:>9.0f}")
+
+
+if __name__ == '__main__':
+    main()
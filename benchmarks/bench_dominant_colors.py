@@ -0,0 +1,79 @@
+# benchmarks/bench_dominant_colors.py
+"""
+Dominant-color extraction: the previous PIL octree palette vs the NumPy binning.
+
+Times both on the 150px thumbnail path (from encoded bytes) and on a
+full-resolution pre-decoded array, which the old implementation could not
+take directly.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_dominant_colors [--size 1920x1280] [--repeat 10]
+"""
+import argparse
+import io
+import statistics
+import time
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from features.multimedia.analytics_utils import extract_dominant_colors, load_rgb_pixels
+from benchmarks.synthetic import synthetic_photo
+
+
+def octree_palette(image: Image.Image, num_colors: int = 5) -> list[str]:
+    """The pre-NumPy implementation: palette order, no coverage."""
+    quantized = image.quantize(colors=num_colors, method=2)
+    palette = quantized.getpalette()[:num_colors * 3]
+    return ['#{:02x}{:02x}{:02x}'.format(*palette[i:i + 3]) for i in range(0, len(palette), 3)]
+
+
+def octree_from_bytes(image_bytes: bytes) -> list[str]:
+    image = Image.open(io.BytesIO(image_bytes)).convert('RGB')
+    image.thumbnail((150, 150))
+    return octree_palette(image)
+
+
+def timed(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', default='1920x1280')
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.size.lower().split('x'))
+    bgr = synthetic_photo(width, height)
+    image_bytes = cv2.imencode('.jpg', bgr, [cv2.IMWRITE_JPEG_QUALITY, 85])[1].tobytes()
+    full_rgb = np.ascontiguousarray(bgr[..., ::-1])
+    full_pil = Image.fromarray(full_rgb)
+
+    cases = [
+        ('octree   150px from bytes', lambda: octree_from_bytes(image_bytes)),
+        ('numpy    150px from bytes', lambda: extract_dominant_colors(image_bytes)),
+        ('decode   150px only', lambda: load_rgb_pixels(image_bytes, max_dimension=150)),
+        ('octree   full-res decoded', lambda: octree_palette(full_pil)),
+        ('numpy    full-res decoded', lambda: extract_dominant_colors(full_rgb)),
+    ]
+    print(f"image {width}x{height}")
+    for name, fn in cases:
+        median, result = timed(fn, args.repeat)
+        if isinstance(result, np.ndarray):
+            summary = f"{result.shape[1]}x{result.shape[0]} array"
+        elif result and isinstance(result[0], dict):
+            summary = ' '.join(f"{c['hex']}:{c['coverage']}%" for c in result)
+        else:
+            summary = ' '.join(result)
+        print(f"{name:<27} {median:8.2f} ms  {summary}")
+
+
+if __name__ == '__main__':
+    main()
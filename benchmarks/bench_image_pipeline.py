@@ -0,0 +1,219 @@
+# benchmarks/bench_image_pipeline.py
+"""
+Stage-by-stage timings of the image blur pipeline, plus color extraction,
+over a corpus of varied sizes, formats and face counts. Emits JSON so runs
+can be diffed from commit to commit.
+
+Stages, in the order the blur route runs them:
+    normalize  normalize_and_resize_image on the uploaded bytes
+    decode     decode_image of the normalized bytes
+    detect     MTCNN (detect_faces)
+    blur       anonymize_faces on the detected boxes
+    encode     encode_image in the format the route would pick
+    upload     storing the result in a local-directory bucket stand-in
+    colors     extract_dominant_colors on the normalized bytes
+
+Each stage reports the fastest of --repeat runs, in milliseconds. The
+synthetic corpus is generated from fixed seeds: group photos with 0, 1 and 6
+faces, at 1280x960 and 4032x3024, saved as JPEG, PNG, WEBP and HEIC. Pass
+--corpus DIR to time your own photos instead (face counts are then unknown).
+"peak_rss_mb" is the process high-water mark; per-image "peak_mb" is the
+growth of VmHWM during that image (Linux only, else null).
+
+Usage (from the repo root):
+    python -m benchmarks.bench_image_pipeline [--corpus DIR] [--repeat 3]
+        [--output results.json] [--sizes 1280x960 4032x3024] [--faces 0 1 6]
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from benchmarks.group_photos import group_photo
+from benchmarks.local_storage import LocalBucket
+from benchmarks.synthetic import synthetic_photo
+from features.multimedia.analytics_utils import extract_dominant_colors
+from features.multimedia.blur_utils import (
+    anonymize_faces, decode_image, detect_faces, encode_image, resolve_output_format, OUTPUT_FORMATS
+)
+from features.multimedia.image_utils import normalize_and_resize_image, TARGET_RESOLUTION
+
+FORMATS = {'jpeg': '.jpg', 'png': '.png', 'webp': '.webp', 'heic': '.heic'}
+STAGES = ('normalize', 'decode', 'detect', 'blur', 'encode', 'upload', 'colors')
+
+
+def build_corpus(directory: str, sizes: list[tuple[int, int]], face_counts: list[int]) -> list[dict]:
+    import pillow_heif
+
+    corpus = []
+    for width, height in sizes:
+        for faces in face_counts:
+            if faces:
+                image, boxes = group_photo(width, height, faces=faces, face_height=height // 6, seed=width + faces)
+            else:
+                image, boxes = synthetic_photo(width, height, seed=width), []
+            rgb = Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+            for fmt, extension in FORMATS.items():
+                path = os.path.join(directory, f"{width}x{height}-{faces}faces{extension}")
+                if fmt == 'heic':
+                    pillow_heif.from_pillow(rgb).save(path, quality=80)
+                elif fmt == 'jpeg':
+                    rgb.save(path, quality=92)
+                elif fmt == 'webp':
+                    rgb.save(path, quality=85)
+                else:
+                    rgb.save(path)
+                corpus.append({'path': path, 'format': fmt, 'faces_expected': len(boxes)})
+    return corpus
+
+
+def load_corpus(directory: str) -> list[dict]:
+    extensions = {ext: fmt for fmt, ext in FORMATS.items()} | {'.jpeg': 'jpeg', '.heif': 'heic'}
+    return [
+        {'path': os.path.join(directory, name), 'format': extensions[os.path.splitext(name)[1].lower()], 'faces_expected': None}
+        for name in sorted(os.listdir(directory)) if os.path.splitext(name)[1].lower() in extensions
+    ]
+
+
+def run_pipeline(source_bytes: bytes, bucket: LocalBucket, name: str, blur_size: int, mode: str) -> tuple[dict, dict]:
+    """One pass through every stage; returns ({stage: seconds}, details)."""
+    timings = {}
+
+    def timed(stage, fn):
+        start = time.perf_counter()
+        result = fn()
+        timings[stage] = time.perf_counter() - start
+        return result
+
+    normalized = timed('normalize', lambda: normalize_and_resize_image(source_bytes, TARGET_RESOLUTION))
+    image = timed('decode', lambda: decode_image(normalized))
+    faces = timed('detect', lambda: detect_faces(image))
+    timed('blur', lambda: anonymize_faces(image, faces, blur_size, mode))
+    output_format = resolve_output_format(normalized, 'auto')
+    encoded = timed('encode', lambda: encode_image(image, output_format))
+    timed('upload', lambda: bucket.blob(f"pipeline/{name}").upload_from_string(
+        encoded, content_type=OUTPUT_FORMATS[output_format]['mimetype']))
+    timed('colors', lambda: extract_dominant_colors(normalized))
+    details = {'normalized_size': [int(image.shape[1]), int(image.shape[0])], 'faces_detected': len(faces),
+               'output_format': output_format, 'output_bytes': len(encoded)}
+    return timings, details
+
+
+def _reset_peak() -> int | None:
+    """Resets VmHWM to the current RSS (Linux) and returns that RSS in KB."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return _status_kb('VmRSS')
+    except OSError:
+        return None
+
+
+def _status_kb(field: str) -> int:
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(field + ':'):
+                return int(line.split()[1])
+    raise KeyError(field)
+
+
+def _environment(repeat: int, detector_load_seconds: float) -> dict:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    import PIL
+    import pillow_heif
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'repeat': repeat,
+        'detector_load_ms': round(detector_load_seconds * 1000, 1),
+        'libraries': {'numpy': np.__version__, 'opencv': cv2.__version__, 'pillow': PIL.__version__,
+                      'pillow_heif': pillow_heif.__version__},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--corpus', help="Folder of photos (.jpg/.png/.webp/.heic) instead of the synthetic set")
+    parser.add_argument('--sizes', nargs='+', default=['1280x960', '4032x3024'])
+    parser.add_argument('--faces', nargs='+', type=int, default=[0, 1, 6])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--blur-size', type=int, default=151)
+    parser.add_argument('--mode', default='blur', choices=['blur', 'fast_blur', 'pixelate', 'redact'])
+    parser.add_argument('--output', help="Write the JSON here instead of stdout")
+    args = parser.parse_args()
+
+    # Build the detector up front so the first image doesn't pay for it.
+    start = time.perf_counter()
+    detect_faces(group_photo(640, 480, faces=1, face_height=160)[0])
+    detector_load_seconds = time.perf_counter() - start
+
+    bucket = LocalBucket()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            if args.corpus:
+                corpus = load_corpus(args.corpus)
+            else:
+                sizes = [tuple(int(v) for v in size.split('x')) for size in args.sizes]
+                corpus = build_corpus(tmp, sizes, args.faces)
+
+            results = []
+            for item in corpus:
+                with open(item['path'], 'rb') as f:
+                    source_bytes = f.read()
+                with Image.open(item['path']) as img:
+                    width, height = img.size
+                name = os.path.basename(item['path'])
+                baseline_kb = _reset_peak()
+                best, details = {}, {}
+                for _ in range(args.repeat):
+                    timings, details = run_pipeline(source_bytes, bucket, name, args.blur_size, args.mode)
+                    best = {stage: min(best.get(stage, float('inf')), seconds) for stage, seconds in timings.items()}
+                peak_mb = (_status_kb('VmHWM') - baseline_kb) / 1024 if baseline_kb is not None else None
+                result = {
+                    'file': name,
+                    'format': item['format'],
+                    'size': [width, height],
+                    'bytes': len(source_bytes),
+                    'faces_expected': item['faces_expected'],
+                    **details,
+                    'stages_ms': {stage: round(best[stage] * 1000, 2) for stage in STAGES},
+                    'total_ms': round(sum(best.values()) * 1000, 2),
+                    'peak_mb': round(peak_mb, 1) if peak_mb is not None else None,
+                }
+                results.append(result)
+                print(f"{name:<28} {result['total_ms']:>9.1f} ms  faces {result['faces_detected']}"
+                      f"{'' if item['faces_expected'] is None else '/' + str(item['faces_expected'])}", file=sys.stderr)
+    finally:
+        bucket.close()
+
+    report = {
+        'environment': _environment(args.repeat, detector_load_seconds),
+        'stage_totals_ms': {stage: round(sum(r['stages_ms'][stage] for r in results), 2) for stage in STAGES},
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'images': results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+# benchmarks/bench_image_workers.py
+"""
+Blur-request throughput and tail latency: inline (request threads) vs the
+image worker process pool, at increasing client concurrency.
+
+Each simulated request runs the blur route's CPU path - normalize, detect,
+render - on a synthetic group photo. Clients are threads, like Waitress.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_image_workers [--processes 4] [--threads 1]
+        [--concurrency 1 2 4 8 16] [--requests 32]
+"""
+import argparse
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+from features.multimedia import workers
+from features.multimedia.image_utils import TARGET_RESOLUTION
+from benchmarks.group_photos import group_photo
+
+
+def blur_request(image_bytes: bytes) -> float:
+    start = time.perf_counter()
+    normalized = workers.normalize_image(image_bytes, TARGET_RESOLUTION)
+    faces = workers.detect_faces_in_bytes(normalized)
+    workers.render_faces(normalized, faces, 151, 'blur', 'jpeg')
+    return time.perf_counter() - start
+
+
+def run_level(image_bytes: bytes, concurrency: int, requests: int) -> tuple[float, float, float]:
+    with ThreadPoolExecutor(max_workers=concurrency) as clients:
+        start = time.perf_counter()
+        latencies = list(clients.map(lambda _: blur_request(image_bytes), range(requests)))
+        elapsed = time.perf_counter() - start
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(round(0.99 * (len(latencies) - 1))))]
+    return requests / elapsed, statistics.median(latencies), p99
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--threads', type=int, default=1, help="TF/OpenCV threads per worker")
+    parser.add_argument('--concurrency', nargs='+', type=int, default=[1, 2, 4, 8, 16])
+    parser.add_argument('--requests', type=int, default=32)
+    args = parser.parse_args()
+
+    image, _ = group_photo(2400, 1600, faces=6, face_height=160, seed=7)
+    image_bytes = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes()
+
+    print(f"{'mode':<12} {'clients':>7} {'req/s':>7} {'p50 s':>7} {'p99 s':>7}")
+    for label, processes in (('inline', 0), (f"pool x{args.processes}", args.processes)):
+        workers.configure(processes, threads_per_worker=args.threads, max_pending=max(args.concurrency))
+        workers.start()
+        blur_request(image_bytes)  # warm the inline detector / page in the workers
+        for concurrency in args.concurrency:
+            throughput, p50, p99 = run_level(image_bytes, concurrency, max(args.requests, concurrency))
+            print(f"{label:<12} {concurrency:>7} {throughput:>7.2f} {p50:>7.2f} {p99:>7.2f}")
+    workers.configure(0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+# benchmarks/bench_normalize_decode.py
+"""
+Peak memory and time of normalize_and_resize_image on large phone-sized
+photos: reduced-size decoding (current) vs a full-resolution decode.
+
+Each measurement runs in a fresh interpreter; "peak MB" is the growth of the
+process high-water mark (VmHWM, Linux only) over its footprint after imports. Pass --corpus with a folder of real JPEG/HEIC photos, otherwise a
+synthetic 12MP/48MP set is generated. The synthetic HEICs carry
+no embedded thumbnail, so they show the full-decode floor; camera HEICs only
+benefit when their thumbnail is at least the target size.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_normalize_decode [--corpus DIR] [--repeat 3]
+"""
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+SIZES = {'12MP': (4032, 3024), '48MP': (8064, 6048)}
+
+
+def full_decode_normalize(image_bytes: bytes, target_resolution) -> bytes:
+    """The previous implementation: decode everything, then thumbnail."""
+    from PIL import Image, ImageOps
+    img = ImageOps.exif_transpose(Image.open(io.BytesIO(image_bytes)))
+    img.thumbnail(target_resolution, Image.Resampling.LANCZOS)
+    if img.mode not in ['RGB', 'L']:
+        img = img.convert('RGB')
+    output_buffer = io.BytesIO()
+    img.save(output_buffer, format='JPEG', quality=85)
+    return output_buffer.getvalue()
+
+
+def measure(path: str, mode: str, repeat: int):
+    from features.multimedia.image_utils import normalize_and_resize_image, TARGET_RESOLUTION
+    normalize = normalize_and_resize_image if mode == 'reduced' else full_decode_normalize
+    with open(path, 'rb') as f:
+        image_bytes = f.read()
+    # Imports can leave the high-water mark above the current footprint, so
+    # reset it (Linux: clear_refs 5) and measure from the current RSS.
+    with open('/proc/self/clear_refs', 'w') as f:
+        f.write('5')
+    baseline_kb = _status_kb('VmRSS')
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        normalize(image_bytes, TARGET_RESOLUTION)
+        timings.append(time.perf_counter() - start)
+    print(json.dumps({'seconds': min(timings), 'peak_mb': (_status_kb('VmHWM') - baseline_kb) / 1024}))
+
+
+def _status_kb(field: str) -> int:
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(field + ':'):
+                return int(line.split()[1])
+    raise KeyError(field)
+
+
+def build_corpus(directory: str) -> list[str]:
+    import cv2
+    import pillow_heif
+    from PIL import Image
+    from benchmarks.synthetic import synthetic_photo
+
+    paths = []
+    for label, (width, height) in SIZES.items():
+        image = Image.fromarray(cv2.cvtColor(synthetic_photo(width, height, seed=width), cv2.COLOR_BGR2RGB))
+        jpeg_path = os.path.join(directory, f"{label}.jpg")
+        image.save(jpeg_path, quality=92)
+        paths.append(jpeg_path)
+        # Larger HEICs written by the bundled encoder don't always decode again
+        # with the same libheif build, so only the 12MP one is synthesized.
+        if width <= 4032:
+            heic_path = os.path.join(directory, f"{label}.heic")
+            pillow_heif.from_pillow(image).save(heic_path, quality=80)
+            paths.append(heic_path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--corpus', help="Folder of real photos (.jpg/.jpeg/.heic)")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--measure', help=argparse.SUPPRESS)
+    parser.add_argument('--mode', default='reduced', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        measure(args.measure, args.mode, args.repeat)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.corpus:
+            paths = sorted(os.path.join(args.corpus, name) for name in os.listdir(args.corpus)
+                           if name.lower().endswith(('.jpg', '.jpeg', '.heic', '.heif')))
+        else:
+            paths = build_corpus(tmp)
+
+        print(f"{'file':<22} {'MB':>6} {'mode':<8} {'seconds':>8} {'peak MB':>8}")
+        for path in paths:
+            size_mb = os.path.getsize(path) / 1024 / 1024
+            for mode in ('full', 'reduced'):
+                output = subprocess.run(
+                    [sys.executable, '-m', 'benchmarks.bench_normalize_decode', '--measure', path,
+                     '--mode', mode, '--repeat', str(args.repeat)],
+                    capture_output=True, text=True, check=True,
+                )
+                result = json.loads(output.stdout.strip().splitlines()[-1])
+                print(f"{os.path.basename(path)[:22]:<22} {size_mb:>6.1f} {mode:<8} {result['seconds']:>8.3f} {result['peak_mb']:>8.0f}")
+
+
+if __name__ == '__main__':
+    main()
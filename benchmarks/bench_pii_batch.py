@@ -0,0 +1,71 @@
+# benchmarks/bench_pii_batch.py
+"""
+Paragraphs/sec of PII analysis on a large generated contract: one
+analyzer.analyze call per paragraph (the previous redaction loop) vs the
+batched pass (analyze_texts, spaCy nlp.pipe) at several batch sizes. Also
+times the whole redact_word_document_pii call, and checks that both paths
+find the same entities. The batched path also analyzes repeated paragraphs
+only once (bench_pii_cache measures that on its own); the cross-request
+cache is disabled here.
+
+--model takes a spaCy package name or the path of a saved pipeline (the
+default matches create_app). Speedups depend heavily on the model: the
+transformer-free en_core_web_* models gain mostly from nlp.pipe batching
+of the tagger/parser/NER.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_pii_batch [--paragraphs 2000] [--batch-sizes 16 64 256]
+        [--model en_core_web_lg]
+"""
+import argparse
+import io
+import time
+
+from flask import Flask
+
+from benchmarks.pii_documents import build_analyzer, contract_docx
+from features.pii_redaction.analysis_utils import analyze_texts
+from features.pii_redaction.cache_utils import PII_ANALYSIS_CACHE
+from features.pii_redaction.routes import iter_word_paragraphs, redact_word_document_pii
+
+
+def spans(results):
+    return [sorted((r.entity_type, r.start, r.end) for r in text_results) for text_results in results]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--paragraphs', type=int, default=2000)
+    parser.add_argument('--batch-sizes', nargs='+', type=int, default=[16, 64, 256])
+    parser.add_argument('--model', default='en_core_web_lg')
+    args = parser.parse_args()
+
+    from docx import Document
+    analyzer = build_analyzer(args.model)
+    docx_bytes = contract_docx(args.paragraphs)
+    texts = [para.text for para in iter_word_paragraphs(Document(io.BytesIO(docx_bytes)))]
+    analyzer.analyze(text=texts[0], language='en')  # warm up
+
+    print(f"{len(texts)} paragraphs/cells, model {args.model}")
+    print(f"{'path':<16} {'seconds':>8} {'paragraphs/s':>13} {'same entities':>14}")
+    start = time.perf_counter()
+    baseline = [analyzer.analyze(text=text, language='en') if text.strip() else [] for text in texts]
+    seconds = time.perf_counter() - start
+    print(f"{'per paragraph':<16} {seconds:>8.2f} {len(texts) / seconds:>13.0f} {'-':>14}")
+
+    for batch_size in args.batch_sizes:
+        start = time.perf_counter()
+        results = analyze_texts(texts, analyzer, batch_size, cache=None)
+        seconds = time.perf_counter() - start
+        same = spans(results) == spans(baseline)
+        print(f"{f'batch {batch_size}':<16} {seconds:>8.2f} {len(texts) / seconds:>13.0f} {str(same):>14}")
+
+    with Flask(__name__).app_context():
+        PII_ANALYSIS_CACHE.configure(max_entries=0)  # measure analysis, not cache hits
+        start = time.perf_counter()
+        redact_word_document_pii(io.BytesIO(docx_bytes), analyzer, batch_size=64)
+        print(f"redact_word_document_pii end to end: {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
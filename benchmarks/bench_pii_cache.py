@@ -0,0 +1,67 @@
+# benchmarks/bench_pii_cache.py
+"""
+Effect of the PII analysis cache on documents full of repeated text.
+
+For each boilerplate share, the same generated contract is analyzed:
+    no cache     every paragraph analyzed (batched), repeats included
+    first upload repeats within the document analyzed once (cold cache)
+    re-upload    the same document again, served from the process-wide cache
+A second, different document with the same boilerplate shows the cross-request
+hit rate on new content. Hit ratios come from the cache's own metrics (the
+same counters /metrics/caches reports).
+
+Usage (from the repo root):
+    python -m benchmarks.bench_pii_cache [--paragraphs 2000] [--boilerplate 0 0.3 0.6]
+        [--model en_core_web_lg]
+"""
+import argparse
+import io
+import time
+
+from docx import Document
+
+from benchmarks.pii_documents import build_analyzer, contract_docx
+from caching import TTLCache
+from features.pii_redaction.analysis_utils import analyze_texts, _analyze_unique
+from features.pii_redaction.routes import iter_word_paragraphs
+
+
+def paragraphs_of(docx_bytes: bytes) -> list[str]:
+    return [para.text for para in iter_word_paragraphs(Document(io.BytesIO(docx_bytes)))]
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--paragraphs', type=int, default=2000)
+    parser.add_argument('--boilerplate', nargs='+', type=float, default=[0.0, 0.3, 0.6])
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--model', default='en_core_web_lg')
+    args = parser.parse_args()
+
+    analyzer = build_analyzer(args.model)
+    analyzer.analyze(text="warm up", language='en')
+
+    print(f"{'boilerplate':>11} {'distinct':>9} {'no cache s':>11} {'first s':>8} {'re-upload s':>12} "
+          f"{'other doc s':>12} {'hit ratio':>10}")
+    for share in args.boilerplate:
+        texts = paragraphs_of(contract_docx(args.paragraphs, seed=1, boilerplate=share))
+        other = paragraphs_of(contract_docx(args.paragraphs, seed=2, boilerplate=share))
+        cache = TTLCache(max_entries=100_000, ttl_seconds=3600)
+        non_blank = [text for text in texts if text.strip()]
+
+        no_cache = timed(lambda: _analyze_unique(non_blank, analyzer, args.batch_size, 'en'))
+        first = timed(lambda: analyze_texts(texts, analyzer, args.batch_size, cache=cache))
+        again = timed(lambda: analyze_texts(texts, analyzer, args.batch_size, cache=cache))
+        other_doc = timed(lambda: analyze_texts(other, analyzer, args.batch_size, cache=cache))
+        print(f"{share:>11.0%} {len(set(non_blank)):>9} {no_cache:>11.2f} {first:>8.2f} {again:>12.3f} "
+              f"{other_doc:>12.2f} {cache.stats()['hit_ratio']:>10.1%}")
+
+
+if __name__ == '__main__':
+    main()
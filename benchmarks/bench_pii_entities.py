@@ -0,0 +1,68 @@
+# benchmarks/bench_pii_entities.py
+"""
+Per-request latency of PII redaction with an entity allow-list and minimum
+score, as the redact route runs it: only recognizers for the requested
+types, and no spaCy pass at all when none of them needs NER (needs_nlp).
+
+Each scenario redacts the same generated contract through
+redact_word_document_pii with the analysis cache off, and reports seconds,
+speedup over "all entities" and the number of entities found.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_pii_entities [--paragraphs 1000] [--model en_core_web_lg]
+"""
+import argparse
+import io
+import time
+
+from flask import Flask
+
+from benchmarks.pii_documents import build_analyzer, contract_docx
+from features.pii_redaction.analysis_utils import analyze_texts, needs_nlp
+from features.pii_redaction.cache_utils import PII_ANALYSIS_CACHE
+from features.pii_redaction.pattern_utils import PatternMatcher
+from features.pii_redaction.routes import iter_word_paragraphs, redact_word_document_pii
+
+SCENARIOS = [
+    ('all entities', None, 0.0),
+    ('all, min score 0.5', None, 0.5),
+    ('PERSON', ['PERSON'], 0.0),
+    ('PERSON, EMAIL_ADDRESS', ['PERSON', 'EMAIL_ADDRESS'], 0.0),
+    ('EMAIL_ADDRESS, PHONE_NUMBER', ['EMAIL_ADDRESS', 'PHONE_NUMBER'], 0.0),
+    ('CREDIT_CARD, US_SSN, IBAN_CODE', ['CREDIT_CARD', 'US_SSN', 'IBAN_CODE'], 0.0),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--paragraphs', type=int, default=1000)
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--model', default='en_core_web_lg')
+    args = parser.parse_args()
+
+    from docx import Document
+    analyzer = build_analyzer(args.model)
+    matcher = PatternMatcher(analyzer)
+    docx_bytes = contract_docx(args.paragraphs)
+    texts = [para.text for para in iter_word_paragraphs(Document(io.BytesIO(docx_bytes)))]
+    analyzer.analyze(text=texts[0], language='en')  # warm up
+
+    print(f"{len(texts)} paragraphs/cells, model {args.model}")
+    print(f"{'entities':<32} {'spaCy':>6} {'seconds':>8} {'speedup':>8} {'found':>6}")
+    baseline = None
+    with Flask(__name__).app_context():
+        PII_ANALYSIS_CACHE.configure(max_entries=0)
+        for label, entities, min_score in SCENARIOS:
+            pattern_matcher = None if needs_nlp(analyzer, matcher, entities, min_score) else matcher
+            start = time.perf_counter()
+            redact_word_document_pii(io.BytesIO(docx_bytes), analyzer, args.batch_size, pattern_matcher,
+                                     entities, min_score)
+            seconds = time.perf_counter() - start
+            baseline = baseline or seconds
+            found = sum(map(len, analyze_texts(texts, analyzer, args.batch_size, cache=None, pattern_matcher=pattern_matcher,
+                                               entities=entities, score_threshold=min_score)))
+            print(f"{label:<32} {'no' if pattern_matcher else 'yes':>6} {seconds:>8.2f} {baseline / seconds:>7.1f}x {found:>6}")
+
+
+if __name__ == '__main__':
+    main()
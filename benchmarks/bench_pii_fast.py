@@ -0,0 +1,83 @@
+# benchmarks/bench_pii_fast.py
+"""
+"full" vs "fast" PII redaction: the batched spaCy + recognizer pass
+(analyze_texts) against the pattern/checksum recognizers alone
+(PatternMatcher), on the paragraphs of a generated contract.
+
+Reports paragraphs/sec for both and the whole redact_word_document_pii call
+per mode, then recall per entity type on labelled paragraphs (a gold span
+counts if any detection overlaps it). Fast mode is expected to keep the
+structured identifiers (email, phone, card) and to drop names, places and
+most dates, which only spaCy finds. The analysis cache is off throughout.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_pii_fast [--paragraphs 2000] [--model en_core_web_lg]
+"""
+import argparse
+import io
+import random
+import time
+from collections import Counter
+
+from flask import Flask
+
+from benchmarks.pii_documents import build_analyzer, contract_docx, labelled_paragraph
+from features.pii_redaction.analysis_utils import analyze_texts
+from features.pii_redaction.cache_utils import PII_ANALYSIS_CACHE
+from features.pii_redaction.pattern_utils import PatternMatcher
+from features.pii_redaction.routes import iter_word_paragraphs, redact_word_document_pii
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def recall_by_type(corpus, results):
+    found, total = Counter(), Counter()
+    for (_, gold), detected in zip(corpus, results):
+        for entity_type, start, end in gold:
+            total[entity_type] += 1
+            found[entity_type] += any(r.start < end and start < r.end for r in detected)
+    return {entity_type: found[entity_type] / total[entity_type] for entity_type in sorted(total)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--paragraphs', type=int, default=2000)
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--model', default='en_core_web_lg')
+    args = parser.parse_args()
+
+    from docx import Document
+    analyzer = build_analyzer(args.model)
+    matcher = PatternMatcher(analyzer)
+    docx_bytes = contract_docx(args.paragraphs)
+    texts = [para.text for para in iter_word_paragraphs(Document(io.BytesIO(docx_bytes)))]
+    analyzer.analyze(text=texts[0], language='en')  # warm up
+
+    _, full_seconds = timed(lambda: analyze_texts(texts, analyzer, args.batch_size, cache=None))
+    _, fast_seconds = timed(lambda: analyze_texts(texts, analyzer, cache=None, pattern_matcher=matcher))
+    print(f"{len(texts)} paragraphs/cells, model {args.model}, fast-mode entities: {', '.join(matcher.entities)}")
+    print(f"{'mode':<6} {'analysis s':>11} {'paragraphs/s':>13} {'document s':>11}")
+    with Flask(__name__).app_context():
+        PII_ANALYSIS_CACHE.configure(max_entries=0)
+        for mode, seconds, pattern_matcher in (('full', full_seconds, None), ('fast', fast_seconds, matcher)):
+            _, document_seconds = timed(lambda: redact_word_document_pii(
+                io.BytesIO(docx_bytes), analyzer, args.batch_size, pattern_matcher))
+            print(f"{mode:<6} {seconds:>11.2f} {len(texts) / seconds:>13.0f} {document_seconds:>11.2f}")
+    print(f"fast mode analysis speedup: {full_seconds / fast_seconds:.1f}x")
+
+    rng = random.Random(7)
+    corpus = [labelled_paragraph(rng) for _ in range(min(args.paragraphs, 1000))]
+    corpus_texts = [text for text, _ in corpus]
+    full = recall_by_type(corpus, analyze_texts(corpus_texts, analyzer, args.batch_size, cache=None))
+    fast = recall_by_type(corpus, analyze_texts(corpus_texts, analyzer, cache=None, pattern_matcher=matcher))
+    print(f"\n{'recall':<14} {'full':>6} {'fast':>6}")
+    for entity_type in full:
+        print(f"{entity_type:<14} {full[entity_type]:>6.0%} {fast[entity_type]:>6.0%}")
+
+
+if __name__ == '__main__':
+    main()
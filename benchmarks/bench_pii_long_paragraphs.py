@@ -0,0 +1,92 @@
+# benchmarks/bench_pii_long_paragraphs.py
+"""
+Latency and peak memory of PII analysis on one very long paragraph (a
+converted PDF or legal exhibit), whole vs split into overlapping windows
+(PII_ANALYSIS_CHUNK_CHARS / PII_ANALYSIS_CHUNK_OVERLAP_CHARS).
+
+Each (length, mode) pair runs in a fresh interpreter so "peak MB" is the
+growth of the process high-water mark (VmHWM) during analysis alone. With
+windows, ms per 1k chars and peak memory should stay flat as the paragraph
+grows; whole, memory climbs with length and spaCy refuses texts over
+nlp.max_length. "same" checks that both modes find the same entities.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_pii_long_paragraphs [--lengths 5000 20000 100000 400000]
+        [--chunk-chars 4000] [--model en_core_web_lg]
+"""
+import argparse
+import json
+import random
+import subprocess
+import sys
+import time
+
+
+def long_paragraph(length: int) -> str:
+    from benchmarks.pii_documents import sample_paragraph
+    rng = random.Random(length)
+    parts, size = [], 0
+    while size < length:
+        parts.append(sample_paragraph(rng))
+        size += len(parts[-1]) + 1
+    return ' '.join(parts)[:length]
+
+
+def _status_kb(field: str) -> int:
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(field + ':'):
+                return int(line.split()[1])
+    raise KeyError(field)
+
+
+def measure(length: int, chunk_chars: int, model: str):
+    from benchmarks.pii_documents import build_analyzer
+    from features.pii_redaction.analysis_utils import CHUNKING, analyze_texts
+
+    analyzer = build_analyzer(model)
+    analyzer.analyze(text=long_paragraph(2000), language='en')  # warm up
+    text = long_paragraph(length)
+    CHUNKING.update(max_chars=chunk_chars or 10**9, overlap_chars=min(400, (chunk_chars or 4000) // 4))
+    baseline_kb = _status_kb('VmHWM')
+    start = time.perf_counter()
+    results = analyze_texts([text], analyzer, cache=None)[0]
+    seconds = time.perf_counter() - start
+    print(json.dumps({
+        'seconds': seconds,
+        'peak_mb': (_status_kb('VmHWM') - baseline_kb) / 1024,
+        'entities': sorted((r.entity_type, r.start, r.end) for r in results),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lengths', nargs='+', type=int, default=[5000, 20000, 100000, 400000])
+    parser.add_argument('--chunk-chars', type=int, default=4000)
+    parser.add_argument('--model', default='en_core_web_lg')
+    parser.add_argument('--measure', nargs=2, type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        measure(*args.measure, args.model)
+        return
+
+    print(f"{'chars':>8} {'mode':<8} {'seconds':>8} {'ms/1k chars':>12} {'peak MB':>8} {'entities':>9} {'same':>5}")
+    for length in args.lengths:
+        found = {}
+        for mode, chunk_chars in (('whole', 0), ('windows', args.chunk_chars)):
+            output = subprocess.run([sys.executable, '-m', 'benchmarks.bench_pii_long_paragraphs', '--model', args.model,
+                                     '--measure', str(length), str(chunk_chars)], capture_output=True, text=True)
+            if output.returncode != 0:
+                error = output.stderr.strip().splitlines()[-1] if output.stderr.strip() else output.returncode
+                print(f"{length:>8} {mode:<8} failed: {error}")
+                continue
+            result = json.loads(output.stdout.strip().splitlines()[-1])
+            found[mode] = result['entities']
+            same = '-' if len(found) < 2 else str(found['whole'] == found['windows'])
+            print(f"{length:>8} {mode:<8} {result['seconds']:>8.2f} {1000 * result['seconds'] * 1000 / length:>12.1f} "
+                  f"{result['peak_mb']:>8.0f} {len(result['entities']):>9} {same:>5}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+# benchmarks/bench_pii_models.py
+"""
+Throughput, memory and recall of the Presidio analyzer for different spaCy
+models and disabled pipeline components (PII_SPACY_MODEL /
+PII_SPACY_DISABLED_COMPONENTS).
+
+Each configuration is "model" or "model:component,component" (use "model:"
+to keep the full pipeline) and runs in a fresh interpreter, so "RSS MB" is
+the resident size after loading that model alone. Paragraphs go through the
+batched path with the analysis cache off.
+
+Recall is the share of gold PII spans overlapped by any detection (redaction
+doesn't care about the entity type); "FP/100" counts detections touching no
+gold span per 100 paragraphs. The corpus is generated with gold spans
+(benchmarks/pii_documents.labelled_paragraph) unless --corpus points at a
+JSONL file of {"text": ..., "spans": [[entity_type, start, end], ...]}.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_pii_models [--paragraphs 1000] [--corpus FILE]
+        [--configs en_core_web_sm: en_core_web_lg: en_core_web_lg:parser
+                   en_core_web_lg:parser,tagger,attribute_ruler,lemmatizer,tok2vec]
+"""
+import argparse
+import json
+import random
+import subprocess
+import sys
+import time
+from collections import Counter
+
+DEFAULT_CONFIGS = [
+    'en_core_web_sm:parser',
+    'en_core_web_md:parser',
+    'en_core_web_lg:',
+    'en_core_web_lg:parser',
+    'en_core_web_lg:parser,tagger,attribute_ruler,lemmatizer,tok2vec',
+]
+
+
+def load_corpus(path: str | None, paragraphs: int) -> list[tuple[str, list]]:
+    if path:
+        with open(path) as f:
+            return [(row['text'], [tuple(span) for span in row['spans']]) for row in map(json.loads, f) if row.get('text')]
+    from benchmarks.pii_documents import labelled_paragraph
+    rng = random.Random(7)
+    return [labelled_paragraph(rng) for _ in range(paragraphs)]
+
+
+def _status_kb(field: str) -> int:
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(field + ':'):
+                return int(line.split()[1])
+    raise KeyError(field)
+
+
+def measure(config: str, corpus_path: str | None, paragraphs: int, batch_size: int):
+    from features.pii_redaction.analysis_utils import analyze_texts, create_analyzer
+
+    model_name, _, disabled = config.partition(':')
+    corpus = load_corpus(corpus_path, paragraphs)
+    texts = [text for text, _ in corpus]
+    rss_before = _status_kb('VmRSS')
+    start = time.perf_counter()
+    analyzer = create_analyzer(model_name, [name for name in disabled.split(',') if name])
+    load_seconds = time.perf_counter() - start
+    analyzer.analyze(text=texts[0], language='en')
+
+    start = time.perf_counter()
+    results = analyze_texts(texts, analyzer, batch_size, cache=None)
+    seconds = time.perf_counter() - start
+
+    found, total, false_positives = Counter(), Counter(), 0
+    for (_, gold), detected in zip(corpus, results):
+        for entity_type, gold_start, gold_end in gold:
+            total[entity_type] += 1
+            if any(r.start < gold_end and gold_start < r.end for r in detected):
+                found[entity_type] += 1
+        false_positives += sum(1 for r in detected if not any(r.start < e and s < r.end for _, s, e in gold))
+
+    print(json.dumps({
+        'pipeline': analyzer.nlp_engine.nlp['en'].pipe_names,
+        'load_seconds': load_seconds,
+        'rss_mb': (_status_kb('VmRSS') - rss_before) / 1024,
+        'paragraphs_per_second': len(texts) / seconds,
+        'recall': sum(found.values()) / max(1, sum(total.values())),
+        'recall_by_type': {t: found[t] / total[t] for t in sorted(total)},
+        'false_positives_per_100': 100 * false_positives / len(texts),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--configs', nargs='+', default=DEFAULT_CONFIGS)
+    parser.add_argument('--corpus', help="JSONL file of labelled paragraphs")
+    parser.add_argument('--paragraphs', type=int, default=1000)
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--measure', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        measure(args.measure, args.corpus, args.paragraphs, args.batch_size)
+        return
+
+    print(f"{'configuration':<66} {'load s':>7} {'RSS MB':>7} {'para/s':>7} {'recall':>7} {'FP/100':>7}")
+    by_type = {}
+    for config in args.configs:
+        command = [sys.executable, '-m', 'benchmarks.bench_pii_models', '--measure', config,
+                   '--paragraphs', str(args.paragraphs), '--batch-size', str(args.batch_size)]
+        if args.corpus:
+            command += ['--corpus', args.corpus]
+        output = subprocess.run(command, capture_output=True, text=True)
+        if output.returncode != 0:
+            print(f"{config:<66} failed: {output.stderr.strip().splitlines()[-1] if output.stderr.strip() else output.returncode}")
+            continue
+        result = json.loads(output.stdout.strip().splitlines()[-1])
+        by_type[config] = result['recall_by_type']
+        print(f"{config:<66} {result['load_seconds']:>7.1f} {result['rss_mb']:>7.0f} {result['paragraphs_per_second']:>7.0f} "
+              f"{result['recall']:>7.1%} {result['false_positives_per_100']:>7.1f}")
+
+    if by_type:
+        print("\nrecall by entity type")
+        for config, recalls in by_type.items():
+            print(f"  {config}: " + ", ".join(f"{t} {r:.0%}" for t, r in recalls.items()))
+
+
+if __name__ == '__main__':
+    main()
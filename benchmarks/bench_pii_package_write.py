@@ -0,0 +1,93 @@
+# benchmarks/bench_pii_package_write.py
+"""
+Writing a redacted deck: presentation.save() (every part re-serialized and
+recompressed) vs write_modified_package (only the slides with redacted text
+rewritten, every other zip entry copied still compressed).
+
+Redacts generated decks with a growing number of photos (fast mode, so the
+analysis itself is quick), then times both writers on the same redacted
+presentation and records their peak Python allocations (tracemalloc, in a
+separate pass so tracing doesn't skew the timings). "same" checks that both
+outputs reopen with identical slide text and media.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_pii_package_write [--slides 40] [--photos 0 20 80] [--model en_core_web_lg]
+"""
+import argparse
+import io
+import time
+import tracemalloc
+import zipfile
+
+from pptx import Presentation
+
+from benchmarks.pii_documents import build_analyzer, deck_pptx
+from features.pii_redaction.analysis_utils import analyze_texts
+from features.pii_redaction.package_utils import write_modified_package
+from features.pii_redaction.pattern_utils import PatternMatcher
+from features.pii_redaction.redaction_utils import redact_paragraph
+from features.pii_redaction.routes import iter_powerpoint_paragraphs
+
+
+def save_whole(source, presentation, parts):
+    output = io.BytesIO()
+    presentation.save(output)
+    return output
+
+
+def save_modified(source, presentation, parts):
+    return write_modified_package(source, parts)
+
+
+WRITERS = [('save()', save_whole), ('modified', save_modified)]
+
+
+def measure(writer, *args):
+    start = time.perf_counter()
+    output = writer(*args)
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    writer(*args)
+    peak_mb = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return output, seconds, peak_mb
+
+
+def contents(output):
+    """Slide text and media bytes of a written deck."""
+    output.seek(0)
+    texts = [para.text for para in iter_powerpoint_paragraphs(Presentation(output))]
+    with zipfile.ZipFile(output) as package:
+        media = {name: package.read(name) for name in package.namelist() if name.startswith('ppt/media/')}
+    return texts, media
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--slides', type=int, default=40)
+    parser.add_argument('--photos', nargs='+', type=int, default=[0, 20, 80])
+    parser.add_argument('--model', default='en_core_web_lg')
+    args = parser.parse_args()
+
+    analyzer = build_analyzer(args.model)
+    matcher = PatternMatcher(analyzer)
+    print(f"{'photos':>6} {'deck MB':>8} {'parts':>6} {'changed':>8} {'writer':<9} {'seconds':>8} {'peak MB':>8} {'same':>5}")
+    for photos in args.photos:
+        source = io.BytesIO(deck_pptx(args.slides, photos=photos))
+        presentation = Presentation(source)
+        paragraphs = list(iter_powerpoint_paragraphs(presentation))
+        parts = {para.part for para, results in zip(paragraphs, analyze_texts(
+                 [para.text for para in paragraphs], analyzer, cache=None, pattern_matcher=matcher))
+                 if redact_paragraph(para, results)}
+        with zipfile.ZipFile(source) as package:
+            entries = len(package.infolist())
+        outputs = {}
+        for label, writer in WRITERS:
+            outputs[label], seconds, peak_mb = measure(writer, source, presentation, parts)
+            same = '-' if len(outputs) < 2 else str(contents(outputs['save()']) == contents(outputs['modified']))
+            print(f"{photos:>6} {len(source.getvalue()) / 2**20:>8.1f} {entries:>6} {len(parts):>8} {label:<9} "
+                  f"{seconds:>8.3f} {peak_mb:>8.1f} {same:>5}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+# benchmarks/bench_pii_redaction_engine.py
+"""
+Micro-benchmarks for applying analyzer results to paragraph runs and plain
+strings: the previous per-run x per-result loops with per-character
+replacement vs the merged-interval sweep in redaction_utils. Outputs are
+checked to be identical. No NLP model is needed; runs and results are
+synthetic.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_pii_redaction_engine [--repeat 5]
+"""
+import argparse
+import random
+import time
+from dataclasses import dataclass
+
+from features.pii_redaction.redaction_utils import apply_redaction_to_text, redact_runs, merge_intervals
+
+# (runs, entities, characters per run)
+CASES = [(5, 2, 40), (50, 10, 40), (200, 50, 30), (1000, 300, 20), (2000, 2000, 12)]
+
+
+@dataclass
+class Run:
+    text: str
+
+
+@dataclass
+class Result:
+    start: int
+    end: int
+
+
+def previous_redact_runs(runs, results) -> int:
+    """The previous loop from redact_runs_in_paragraph."""
+    current_offset, modified = 0, 0
+    for run in runs:
+        run_text = run.text
+        run_len = len(run_text)
+        if run_len == 0:
+            continue
+        run_start, run_end = current_offset, current_offset + run_len
+        new_run_chars = list(run_text)
+        run_modified = False
+        for res in results:
+            overlap_start, overlap_end = max(run_start, res.start), min(run_end, res.end)
+            if overlap_start < overlap_end:
+                for i in range(overlap_start - run_start, overlap_end - run_start):
+                    new_run_chars[i] = '█'
+                run_modified = True
+        if run_modified:
+            run.text = "".join(new_run_chars)
+            modified += 1
+        current_offset += run_len
+    return modified
+
+
+def previous_apply_redaction_to_text(text, analysis_results):
+    if not analysis_results:
+        return text
+    text_chars = list(text)
+    for res in analysis_results:
+        for i in range(max(0, res.start), min(len(text_chars), res.end)):
+            text_chars[i] = '█'
+    return "".join(text_chars)
+
+
+def make_case(runs: int, entities: int, run_chars: int, seed: int):
+    rng = random.Random(seed)
+    texts = [''.join(rng.choice('abcdefghij ') for _ in range(run_chars)) for _ in range(runs)]
+    length = runs * run_chars
+    results = []
+    for _ in range(entities):
+        start = rng.randrange(length)
+        results.append(Result(start, min(length, start + rng.randint(3, 30))))
+    return texts, results
+
+
+def best_of(repeat: int, fn) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'runs':>5} {'entities':>8} {'old runs ms':>12} {'new runs ms':>12} {'speedup':>8} "
+          f"{'old text ms':>12} {'new text ms':>12} {'speedup':>8} {'same':>5}")
+    for runs, entities, run_chars in CASES:
+        texts, results = make_case(runs, entities, run_chars, seed=runs)
+        old_runs, new_runs = [Run(t) for t in texts], [Run(t) for t in texts]
+        previous_redact_runs(old_runs, results)
+        redact_runs(new_runs, merge_intervals(results))
+        full_text = ''.join(texts)
+        same = ([r.text for r in old_runs] == [r.text for r in new_runs]
+                and previous_apply_redaction_to_text(full_text, results) == apply_redaction_to_text(full_text, results))
+
+        # Each timing gets fresh runs, as a real paragraph would.
+        old_ms = best_of(args.repeat, lambda: previous_redact_runs([Run(t) for t in texts], results)) * 1000
+        new_ms = best_of(args.repeat, lambda: redact_runs([Run(t) for t in texts], merge_intervals(results))) * 1000
+        old_text_ms = best_of(args.repeat, lambda: previous_apply_redaction_to_text(full_text, results)) * 1000
+        new_text_ms = best_of(args.repeat, lambda: apply_redaction_to_text(full_text, results)) * 1000
+        print(f"{runs:>5} {entities:>8} {old_ms:>12.3f} {new_ms:>12.3f} {old_ms / new_ms:>7.1f}x "
+              f"{old_text_ms:>12.3f} {new_text_ms:>12.3f} {old_text_ms / new_text_ms:>7.1f}x {str(same):>5}")
+
+
+if __name__ == '__main__':
+    main()
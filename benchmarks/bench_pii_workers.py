@@ -0,0 +1,83 @@
+# benchmarks/bench_pii_workers.py
+"""
+PII analysis of a large document inline vs split across forked worker
+processes (PII_WORKER_PROCESSES), with the analysis cache off.
+
+Reports seconds and speedup over inline per worker count, whether the
+results match inline analysis exactly, and per worker the memory it shares
+with the parent (the copy-on-write model pages) vs its own private pages,
+from /proc/<pid>/smaps_rollup. Speedup is bounded by the cores available
+(os.cpu_count() is printed); on one core expect none, only the overhead.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_pii_workers [--paragraphs 2000] [--workers 1 2 4 8]
+        [--model en_core_web_lg]
+"""
+import argparse
+import io
+import os
+import time
+
+from benchmarks.pii_documents import build_analyzer, contract_docx
+from features.pii_redaction import workers
+from features.pii_redaction.analysis_utils import analyze_texts
+from features.pii_redaction.routes import iter_word_paragraphs
+
+
+def _rollup_mb(pid: int) -> dict:
+    """Shared and private resident MB of a process."""
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1]) / 1024
+    return {
+        'shared': fields.get('Shared_Clean', 0) + fields.get('Shared_Dirty', 0),
+        'private': fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0),
+    }
+
+
+def _flatten(results):
+    return [None if r is None else sorted((x.entity_type, x.start, x.end, round(x.score, 6)) for x in r)
+            for r in results]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--paragraphs', type=int, default=2000)
+    parser.add_argument('--workers', nargs='+', type=int, default=[1, 2, 4, 8])
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--model', default='en_core_web_lg')
+    args = parser.parse_args()
+
+    from docx import Document
+    analyzer = build_analyzer(args.model)
+    texts = [para.text for para in iter_word_paragraphs(Document(io.BytesIO(contract_docx(args.paragraphs))))]
+    analyzer.analyze(text=texts[0], language='en')  # warm up
+
+    start = time.perf_counter()
+    inline = _flatten(analyze_texts(texts, analyzer, args.batch_size, cache=None))
+    inline_seconds = time.perf_counter() - start
+    print(f"{len(texts)} paragraphs/cells, model {args.model}, {os.cpu_count()} CPUs")
+    print(f"{'workers':>7} {'seconds':>8} {'speedup':>8} {'same':>5} {'shared MB':>10} {'private MB':>11}")
+    print(f"{'inline':>7} {inline_seconds:>8.2f} {1:>7.1f}x {'-':>5} {'-':>10} {'-':>11}")
+
+    for count in args.workers:
+        workers.configure(count, min_paragraphs=1)
+        workers.start(analyzer)
+        try:
+            start = time.perf_counter()
+            results = _flatten(analyze_texts(texts, analyzer, args.batch_size, cache=None))
+            seconds = time.perf_counter() - start
+            memory = [_rollup_mb(pid) for pid in workers._pool._processes]
+        finally:
+            workers.stop()
+        shared = sum(m['shared'] for m in memory) / len(memory)
+        private = sum(m['private'] for m in memory) / len(memory)
+        print(f"{count:>7} {seconds:>8.2f} {inline_seconds / seconds:>7.1f}x {str(results == inline):>5} "
+              f"{shared:>10.0f} {private:>11.0f}")
+
+
+if __name__ == '__main__':
+    main()
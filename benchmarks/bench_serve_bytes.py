@@ -0,0 +1,64 @@
+# benchmarks/bench_serve_bytes.py
+"""
+Bytes transferred per blur results page view: the images a browser fetches
+for the side-by-side view, first visit and repeat visit.
+
+"full" fetches the stored images as the page used to; "preview" fetches the
+?w=480 / ?w=960 sizes the partial now references (depending on --dpr), and
+repeat visits send If-None-Match. Storage is a local directory stand-in.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_serve_bytes [--size 4032x3024] [--dpr 1]
+"""
+import argparse
+import io
+import re
+
+import cv2
+
+from benchmarks.group_photos import group_photo
+from benchmarks.local_storage import LocalBucket, multimedia_app
+
+
+def fetch(client, url: str, etags: dict) -> tuple[int, int]:
+    headers = {'If-None-Match': etags[url]} if url in etags else {}
+    response = client.get(url, headers=headers)
+    if response.headers.get('ETag'):
+        etags[url] = response.headers['ETag']
+    return response.status_code, len(response.data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', default='4032x3024')
+    parser.add_argument('--dpr', type=int, default=1, choices=[1, 2], help="Device pixel ratio (picks 480 or 960)")
+    args = parser.parse_args()
+    width, height = (int(v) for v in args.size.split('x'))
+
+    bucket = LocalBucket()
+    try:
+        app = multimedia_app(bucket)
+        client = app.test_client()
+        image, _ = group_photo(width, height, faces=6, face_height=height // 6, seed=11)
+        upload = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, 92])[1].tobytes()
+        page = client.post('/process/multimedia/blur/process_image',
+                           data={'file': (io.BytesIO(upload), 'group.jpg'), 'blur_strength': '2'},
+                           content_type='multipart/form-data').get_data(as_text=True)
+        full_urls = sorted(set(re.findall(r'<a href="([^"]+)"', page)))
+        preview_width = 480 * args.dpr
+
+        print(f"{'variant':<8} {'visit':<7} {'requests':>8} {'304s':>5} {'KB':>9}")
+        for variant in ('full', 'preview'):
+            urls = full_urls if variant == 'full' else [f"{url}?w={preview_width}" for url in full_urls]
+            etags = {}
+            for visit in ('first', 'repeat'):
+                results = [fetch(client, url, etags) for url in urls]
+                not_modified = sum(1 for status, _ in results if status == 304)
+                total_kb = sum(size for _, size in results) / 1024
+                print(f"{variant:<8} {visit:<7} {len(results):>8} {not_modified:>5} {total_kb:>9.1f}")
+    finally:
+        bucket.close()
+
+
+if __name__ == '__main__':
+    main()
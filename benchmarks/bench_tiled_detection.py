@@ -0,0 +1,59 @@
+# benchmarks/bench_tiled_detection.py
+"""
+Recall and latency of tiled face detection on large synthetic group photos.
+
+"downscaled" reproduces the default path (normalize to 1920px, detect, map
+boxes back); "tiled" runs detect_faces_tiled at native resolution with the
+given worker counts. A last row checks a close-up portrait whose face is
+bigger than a tile, which only the whole-image pass of detect_faces_tiled
+finds in one piece (recall must be 1.00). Requires mtcnn/TensorFlow.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_tiled_detection [--size 6000x4000] [--faces 40] [--face-height 48 64]
+"""
+import argparse
+import time
+
+from features.multimedia.blur_utils import detect_faces_downscaled, detect_faces_tiled, get_face_detector
+from benchmarks.group_photos import close_up_portrait, group_photo, recall
+
+
+def downscaled(image, target=1920):
+    return [face['box'] for face in detect_faces_downscaled(image, target)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', default='6000x4000')
+    parser.add_argument('--faces', type=int, default=40)
+    parser.add_argument('--face-height', nargs='+', type=int, default=[48, 64, 120])
+    parser.add_argument('--tile-size', type=int, default=1024)
+    parser.add_argument('--overlap', type=int, default=192)
+    parser.add_argument('--workers', nargs='+', type=int, default=[1, 2, 4])
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.size.lower().split('x'))
+    get_face_detector()  # keep model load out of the timings
+
+    print(f"{'face px':>8}  {'mode':<14} {'recall':>7} {'detections':>11} {'seconds':>8}")
+    for face_height in args.face_height:
+        image, truth = group_photo(width, height, args.faces, face_height)
+        runs = [('downscaled', lambda: downscaled(image))]
+        for workers in args.workers:
+            runs.append((f"tiled x{workers}", lambda w=workers: [f['box'] for f in detect_faces_tiled(
+                image, tile_size=args.tile_size, overlap=args.overlap, max_workers=w)]))
+        for name, fn in runs:
+            start = time.perf_counter()
+            boxes = fn()
+            elapsed = time.perf_counter() - start
+            print(f"{face_height:>8}  {name:<14} {recall(truth, boxes):>7.2f} {len(boxes):>11} {elapsed:>8.2f}")
+
+    image, truth = close_up_portrait(min(width, height), max(width, height))
+    start = time.perf_counter()
+    boxes = [f['box'] for f in detect_faces_tiled(image, tile_size=args.tile_size, overlap=args.overlap)]
+    elapsed = time.perf_counter() - start
+    print(f"{truth[0][3]:>8}  {'tiled close-up':<14} {recall(truth, boxes):>7.2f} {len(boxes):>11} {elapsed:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+# benchmarks/bench_video_blur.py
+"""
+Video blurring throughput (frames/sec on CPU) for different detection
+intervals. detect_every=1 runs MTCNN on every frame; larger values track boxes
+with optical flow in between.
+
+The clip is synthetic: a camera panning across a group photo, so faces move a
+few pixels per frame.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_video_blur [--frames 90] [--size 1280x720]
+        [--detect-every 1 5 10] [--format webm]
+"""
+import argparse
+import os
+import tempfile
+
+import cv2
+
+from features.multimedia.video_utils import blur_video
+from benchmarks.group_photos import group_photo
+
+
+def write_panning_clip(path: str, frames: int, width: int, height: int, fps: float = 30.0):
+    canvas, _ = group_photo(width + frames * 4, height, faces=4, face_height=height // 4, seed=3)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    for i in range(frames):
+        writer.write(canvas[:, i * 4:i * 4 + width])
+    writer.release()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--frames', type=int, default=90)
+    parser.add_argument('--size', default='1280x720')
+    parser.add_argument('--detect-every', nargs='+', type=int, default=[1, 5, 10])
+    parser.add_argument('--format', default='webm', choices=['webm', 'mp4'])
+    args = parser.parse_args()
+    width, height = (int(v) for v in args.size.split('x'))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, 'source.mp4')
+        write_panning_clip(source, args.frames, width, height)
+
+        print(f"{'detect every':>12} {'frames':>7} {'detections':>10} {'fps':>7} {'seconds':>8}")
+        for detect_every in args.detect_every:
+            output = os.path.join(tmp, f"out-{detect_every}.{args.format}")
+            stats = blur_video(source, output, 151, 'fast_blur', detect_every=detect_every, output_format=args.format)
+            print(f"{detect_every:>12} {stats['frames']:>7} {stats['detections']:>10} {stats['fps']:>7.1f} {stats['seconds']:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+# benchmarks/group_photos.py
+# Synthetic "group photos": the repo's profile picture pasted many times at a
+# known size onto a large photo-like canvas, giving exact ground-truth boxes.
+import os
+
+import cv2
+import numpy as np
+
+from benchmarks.synthetic import synthetic_photo
+
+FACE_SOURCE = os.path.join(os.path.dirname(__file__), '..', 'static', 'images', 'paulohagan-profile-pic.jpeg')
+# Face box inside FACE_SOURCE (x, y, w, h), as reported by MTCNN.
+FACE_SOURCE_BOX = (100, 98, 233, 293)
+
+
+def group_photo(width: int, height: int, faces: int, face_height: int, seed: int = 0):
+    """
+    Returns (BGR image, ground-truth boxes). Faces are laid out on a jittered
+    grid so they never overlap; face_height is the height of the face box.
+    """
+    rng = np.random.default_rng(seed)
+    canvas = synthetic_photo(width, height, seed=seed)
+    portrait = cv2.imread(FACE_SOURCE)
+    scale = face_height / FACE_SOURCE_BOX[3]
+    sprite = cv2.resize(portrait, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    sprite_h, sprite_w = sprite.shape[:2]
+
+    cols = max(1, int(np.ceil(np.sqrt(faces * width / height))))
+    rows = int(np.ceil(faces / cols))
+    cell_w, cell_h = width // cols, height // rows
+    if cell_w < sprite_w or cell_h < sprite_h:
+        raise ValueError("Too many faces for this canvas size.")
+
+    boxes = []
+    for i in range(faces):
+        row, col = divmod(i, cols)
+        x = col * cell_w + int(rng.integers(0, cell_w - sprite_w + 1))
+        y = row * cell_h + int(rng.integers(0, cell_h - sprite_h + 1))
+        canvas[y:y + sprite_h, x:x + sprite_w] = sprite
+        fx, fy, fw, fh = (int(round(v * scale)) for v in FACE_SOURCE_BOX)
+        boxes.append((x + fx, y + fy, fw, fh))
+    return canvas, boxes
+
+
+def close_up_portrait(width: int, height: int, fill: float = 0.7, seed: int = 0):
+    """
+    Returns (BGR image, [ground-truth box]) for one face whose box is `fill`
+    of the image height, centred: a close-up far bigger than a detection tile.
+    """
+    canvas = synthetic_photo(width, height, seed=seed)
+    scale = fill * height / FACE_SOURCE_BOX[3]
+    sprite = cv2.resize(cv2.imread(FACE_SOURCE), None, fx=scale, fy=scale, interpolation=cv2.INTER_CUBIC)
+    fx, fy, fw, fh = (int(round(v * scale)) for v in FACE_SOURCE_BOX)
+    # Sprite offset that centres the face box on the canvas.
+    ox, oy = width // 2 - (fx + fw // 2), height // 2 - (fy + fh // 2)
+    x1, y1 = max(0, ox), max(0, oy)
+    x2, y2 = min(width, ox + sprite.shape[1]), min(height, oy + sprite.shape[0])
+    canvas[y1:y2, x1:x2] = sprite[y1 - oy:y2 - oy, x1 - ox:x2 - ox]
+    return canvas, [(ox + fx, oy + fy, fw, fh)]
+
+
+def iou(a, b) -> float:
+    ax2, ay2, bx2, by2 = a[0] + a[2], a[1] + a[3], b[0] + b[2], b[1] + b[3]
+    inter = max(0, min(ax2, bx2) - max(a[0], b[0])) * max(0, min(ay2, by2) - max(a[1], b[1]))
+    union = a[2] * a[3] + b[2] * b[3] - inter
+    return inter / union if union else 0.0
+
+
+def recall(truth: list, detected: list, threshold: float = 0.3) -> float:
+    """Share of ground-truth boxes matched by any detection with IoU >= threshold."""
+    if not truth:
+        return 1.0
+    hits = sum(1 for t in truth if any(iou(t, d) >= threshold for d in detected))
+    return hits / len(truth)
@@ -0,0 +1,85 @@
+# benchmarks/local_storage.py
+# Directory-backed stand-in for the S3 bucket adapter (s3_adapter.S3Bucket),
+# plus a minimal app with only the multimedia blueprint, so route-level
+# benchmarks run without credentials, Presidio or network access.
+import os
+import shutil
+import tempfile
+
+
+class LocalBlob:
+    def __init__(self, root: str, name: str):
+        self.name = name
+        self.path = os.path.join(root, name)
+
+    def upload_from_string(self, data, content_type=None):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, 'wb') as f:
+            f.write(data.encode() if isinstance(data, str) else data)
+
+    def upload_from_file(self, file_obj, content_type=None):
+        if hasattr(file_obj, 'seek'):
+            file_obj.seek(0)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, 'wb') as f:
+            shutil.copyfileobj(file_obj, f)
+
+    def download_as_bytes(self):
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+    def download_to_file(self, file_obj):
+        with open(self.path, 'rb') as f:
+            shutil.copyfileobj(f, file_obj)
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def delete(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class LocalBucket:
+    def __init__(self, root: str | None = None):
+        self.root = root or tempfile.mkdtemp(prefix='agentshowcase-bucket-')
+        self.name = os.path.basename(self.root)
+
+    def blob(self, blob_name):
+        return LocalBlob(self.root, blob_name)
+
+    def reload(self):
+        pass
+
+    def delete_blobs(self, blobs, on_error=None):
+        for blob in blobs:
+            try:
+                blob.delete()
+            except OSError:
+                if on_error:
+                    on_error(blob)
+
+    def close(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+def multimedia_app(bucket: LocalBucket, **config):
+    """Flask app with just the multimedia blueprint, CSRF and rate limits off."""
+    os.environ.setdefault('FLASK_DEBUG', '1')  # lets Config fall back to a dev secret key
+    from flask import Flask
+    from jinja2 import ChoiceLoader, FileSystemLoader
+    from config import Config
+    from extensions import limiter
+    from features.multimedia.routes import bp as multimedia_bp
+
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    app = Flask('app', root_path=repo_root)
+    app.config.from_object(Config)
+    app.config.update(WTF_CSRF_ENABLED=False, RATELIMIT_ENABLED=False, SESSION_COOKIE_SECURE=False,
+                      GCS_AVAILABLE=True, GEMINI_CONFIGURED=False)
+    app.config.update(config)
+    app.jinja_loader = ChoiceLoader([app.jinja_loader, FileSystemLoader(os.path.join(repo_root, 'features'))])
+    limiter.init_app(app)
+    app.gcs_bucket = bucket
+    app.register_blueprint(multimedia_bp)
+    return app
@@ -0,0 +1,136 @@
+# benchmarks/pii_documents.py
+# Generated Word/PowerPoint documents full of PII, and the Presidio analyzer
+# configured the way create_app does, for the PII redaction benchmarks.
+import io
+import random
+
+FIRST_NAMES = ['James', 'Maria', 'Wei', 'Aisha', 'Liam', 'Sofia', 'Noah', 'Priya', 'Lucas', 'Emma', 'Mateo', 'Olivia']
+LAST_NAMES = ['Smith', 'Garcia', 'Chen', 'Khan', 'Murphy', 'Rossi', 'Johnson', 'Patel', 'Silva', 'Brown', 'Novak', 'Kim']
+CITIES = ['Boston', 'Chicago', 'Seattle', 'Denver', 'Austin', 'Portland', 'Atlanta', 'Phoenix']
+STREETS = ['Maple Street', 'Oak Avenue', 'Pine Road', 'Cedar Lane', 'Elm Drive', 'Harbor Way']
+FILLER = [
+    "The parties agree that the obligations set out in this section survive termination of the agreement.",
+    "Payment is due within thirty days of receipt of a valid invoice.",
+    "Neither party may assign this agreement without the prior written consent of the other party.",
+    "This clause shall be interpreted in accordance with the governing law stated below.",
+    "All notices must be delivered in writing to the addresses listed in the schedule.",
+    "The supplier shall maintain adequate insurance for the duration of the services.",
+]
+# Repeated verbatim in corporate documents: disclaimers, footers, table headers.
+BOILERPLATE = [
+    "CONFIDENTIAL - This document contains proprietary information of Example Holdings Inc. and may not be disclosed without permission.",
+    "For questions about this policy contact the compliance office at compliance@example.com or 800-555-0100.",
+    "This agreement constitutes the entire understanding between the parties and supersedes all prior agreements.",
+    "Page intentionally left blank.",
+    "Printed copies are uncontrolled. Refer to the document management system for the current version.",
+]
+
+
+def _person(rng):
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+def labelled_paragraph(rng: random.Random) -> tuple[str, list[tuple[str, int, int]]]:
+    """
+    One contract-style paragraph and its gold PII spans (entity_type, start, end).
+    Most carry a name, email, phone, city, date or card number.
+    """
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    name = f"{first} {last}"
+    phone = f"{rng.randint(201, 989)}-555-{rng.randint(1000, 9999)}"
+    templates = [
+        lambda: [(rng.choice(FILLER), None)],
+        lambda: [("Contact ", None), (name, 'PERSON'), (" at ", None),
+                 (f"{first.lower()}.{last.lower()}@example.com", 'EMAIL_ADDRESS'), (" for questions about this section.", None)],
+        lambda: [(name, 'PERSON'), (" can be reached on ", None), (phone, 'PHONE_NUMBER'), (" during business hours.", None)],
+        lambda: [(f"Deliveries go to {rng.randint(10, 9999)} {rng.choice(STREETS)}, ", None), (rng.choice(CITIES), 'LOCATION'),
+                 (", attention ", None), (name, 'PERSON'), (".", None)],
+        lambda: [("Signed on ", None), (f"{rng.randint(1, 28)} March {rng.randint(2015, 2025)}", 'DATE_TIME'), (" by ", None),
+                 (name, 'PERSON'), (" on behalf of the client. " + rng.choice(FILLER), None)],
+        lambda: [("Card ", None), (rng.choice(['4111 1111 1111 1111', '5500 0000 0000 0004']), 'CREDIT_CARD'),
+                 ("; receipt sent to ", None), (f"{first.lower()}@example.org", 'EMAIL_ADDRESS'), (".", None)],
+    ]
+    text, spans = '', []
+    for segment, entity_type in rng.choice(templates)():
+        if entity_type:
+            spans.append((entity_type, len(text), len(text) + len(segment)))
+        text += segment
+    return text, spans
+
+
+def sample_paragraph(rng: random.Random) -> str:
+    return labelled_paragraph(rng)[0]
+
+
+def contract_docx(paragraphs: int, seed: int = 0, table_rows: int = 20, boilerplate: float = 0.0) -> bytes:
+    """
+    A .docx with `paragraphs` body paragraphs (split into a few runs each) plus
+    a contacts table. A `boilerplate` fraction of the paragraphs are verbatim
+    repeats from BOILERPLATE.
+    """
+    from docx import Document
+
+    rng = random.Random(seed)
+    document = Document()
+    for i in range(paragraphs):
+        text = rng.choice(BOILERPLATE) if boilerplate and rng.random() < boilerplate else sample_paragraph(rng)
+        para = document.add_paragraph()
+        # Real documents split text across runs (formatting, spell-check, edits).
+        cut_points = sorted(rng.sample(range(1, len(text)), k=min(3, len(text) - 1)))
+        for j, (start, end) in enumerate(zip([0] + cut_points, cut_points + [len(text)])):
+            run = para.add_run(text[start:end])
+            run.bold = j % 2 == 1
+    table = document.add_table(rows=table_rows, cols=3)
+    for row in table.rows:
+        name = _person(rng)
+        row.cells[0].text = name
+        row.cells[1].text = f"{name.split()[0].lower()}@example.com"
+        row.cells[2].text = f"{rng.randint(201, 989)}-555-{rng.randint(1000, 9999)}"
+    output = io.BytesIO()
+    document.save(output)
+    return output.getvalue()
+
+
+def photo_jpeg(rng: random.Random, width: int = 1600, height: int = 1200) -> bytes:
+    """A JPEG that compresses like a photo (noise over a gradient), ~1 MB at the default size."""
+    from PIL import Image
+
+    noise = Image.frombytes('L', (width, height), rng.randbytes(width * height))
+    gradient = Image.linear_gradient('L').resize((width, height))
+    image = Image.merge('RGB', (noise, gradient, Image.blend(noise, gradient, 0.5)))
+    output = io.BytesIO()
+    image.save(output, format='JPEG', quality=85)
+    return output.getvalue()
+
+
+def deck_pptx(slides: int, seed: int = 0, paragraphs_per_slide: int = 6, photos: int = 0) -> bytes:
+    """
+    A .pptx with one text box of PII-heavy bullet paragraphs per slide. With
+    `photos`, that many distinct photo-like JPEGs are spread over the slides,
+    as in a media-heavy deck.
+    """
+    from pptx import Presentation
+    from pptx.util import Inches
+
+    rng = random.Random(seed)
+    presentation = Presentation()
+    for i in range(slides):
+        slide = presentation.slides.add_slide(presentation.slide_layouts[6])
+        for _ in range(photos // slides + (i < photos % slides)):
+            slide.shapes.add_picture(io.BytesIO(photo_jpeg(rng)), Inches(6), Inches(4), Inches(3.5))
+        frame = slide.shapes.add_textbox(Inches(0.5), Inches(0.5), Inches(9), Inches(6)).text_frame
+        for i in range(paragraphs_per_slide):
+            para = frame.paragraphs[0] if i == 0 else frame.add_paragraph()
+            text = sample_paragraph(rng)
+            middle = len(text) // 2
+            para.add_run().text = text[:middle]
+            para.add_run().text = text[middle:]
+    output = io.BytesIO()
+    presentation.save(output)
+    return output.getvalue()
+
+
+def build_analyzer(model_name: str = 'en_core_web_lg', disabled_components=('parser',)):
+    """The analyzer create_app builds; model_name may also be a path to a saved pipeline."""
+    from features.pii_redaction.analysis_utils import create_analyzer
+    return create_analyzer(model_name, disabled_components)
@@ -0,0 +1,29 @@
+# benchmarks/synthetic.py
+# Deterministic, photo-like test images so benchmark numbers are comparable
+# from commit to commit without shipping a binary corpus.
+import numpy as np
+
+
+def synthetic_photo(width: int, height: int, seed: int = 0) -> np.ndarray:
+    """
+    Returns a BGR uint8 image with smooth gradients, a few soft blobs and mild
+    sensor-style noise. Flat test patterns compress unrealistically well, so
+    this approximates the entropy of a real camera photo.
+    """
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[0:height, 0:width].astype(np.float32)
+    image = np.empty((height, width, 3), dtype=np.float32)
+    for channel in range(3):
+        fx, fy = rng.uniform(0.5, 3.0, size=2)
+        phase = rng.uniform(0, np.pi)
+        image[..., channel] = 128 + 80 * np.sin(fx * np.pi * xx / width + phase) * np.cos(fy * np.pi * yy / height)
+
+    for _ in range(12):
+        cx, cy = rng.uniform(0, width), rng.uniform(0, height)
+        radius = rng.uniform(0.03, 0.15) * max(width, height)
+        color = rng.uniform(-90, 90, size=3)
+        falloff = np.exp(-((xx - cx) ** 2 + (yy - cy) ** 2) / (2 * radius ** 2))
+        image += falloff[..., None] * color
+
+    image += rng.normal(0, 6, size=image.shape)
+    return np.clip(image, 0, 255).astype(np.uint8)
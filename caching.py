@@ -0,0 +1,107 @@
+# caching.py
+# Small in-process caches shared by the feature blueprints. Entries only live in
+# this worker's memory (they are not shared between replicas), so every caller
+# must treat a miss as normal and be able to recompute or ask for a re-upload.
+import threading
+import time
+from collections import OrderedDict
+
+# name -> TTLCache, for the metrics endpoint.
+_REGISTRY = {}
+
+
+def cache_stats() -> dict:
+    """Hit/miss counters and latency saved for every named cache."""
+    return {name: cache.stats() for name, cache in sorted(_REGISTRY.items())}
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries also expire ttl_seconds after being stored.
+
+    Callers can pass the cost of computing a value to set(); every later hit adds
+    it to latency_saved_seconds. Named caches are reported by cache_stats().
+    """
+
+    def __init__(self, max_entries: int = 128, ttl_seconds: float = 3600, name: str | None = None):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (expires_at, value, cost_seconds)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.latency_saved_seconds = 0.0
+        if name:
+            _REGISTRY[name] = self
+
+    def configure(self, max_entries: int | None = None, ttl_seconds: float | None = None):
+        """Applies app config to a cache created at import time."""
+        with self._lock:
+            if max_entries is not None:
+                self.max_entries = max_entries
+            if ttl_seconds is not None:
+                self.ttl_seconds = ttl_seconds
+            self._evict()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.latency_saved_seconds += entry[2]
+            return entry[1]
+
+    def set(self, key, value, cost_seconds: float = 0.0):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value, cost_seconds)
+            self._entries.move_to_end(key)
+            self._evict()
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            return default if entry is None else entry[1]
+
+    def items(self) -> list:
+        """
+        Snapshot of live (key, value, cost_seconds) tuples, most recently used
+        last. Does not touch the counters.
+        """
+        now = time.monotonic()
+        with self._lock:
+            return [(key, entry[1], entry[2]) for key, entry in self._entries.items() if entry[0] >= now]
+
+    def record_hit(self, cost_seconds: float = 0.0):
+        """Counts a hit found outside get(), e.g. by a near-duplicate scan over items()."""
+        with self._lock:
+            self.hits += 1
+            self.misses = max(0, self.misses - 1)
+            self.latency_saved_seconds += cost_seconds
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'latency_saved_seconds': round(self.latency_saved_seconds, 3),
+            }
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
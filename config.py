@@ -45,8 +45,123 @@ class Config:
         "Hindi", "Bengali", "Marathi", "Telugu", "Tamil"
     ]
     
+    # --- Feature: Multimedia (Facial Redaction) ---
+    # "auto" keeps the input encoding (JPEG/WebP stay lossy, PNG stays lossless);
+    # set to jpeg, webp or png to force one.
+    BLUR_OUTPUT_FORMAT = os.environ.get("BLUR_OUTPUT_FORMAT", "auto").lower()
+    BLUR_OUTPUT_QUALITY = int(os.environ.get("BLUR_OUTPUT_QUALITY", "90"))
+    BLUR_PNG_COMPRESSION = int(os.environ.get("BLUR_PNG_COMPRESSION", "1"))  # 0-9, lower is faster
+
+    # Opt-in tiled detection for large group photos / panoramas: normalize to
+    # BLUR_TILED_MAX_RESOLUTION instead of 1920px, run MTCNN on overlapping
+    # tiles (BLUR_TILE_WORKERS threads) and blur at that resolution.
+    BLUR_TILED_DETECTION = os.environ.get("BLUR_TILED_DETECTION") == "1"
+    BLUR_TILED_MAX_RESOLUTION = int(os.environ.get("BLUR_TILED_MAX_RESOLUTION", "6000"))
+    BLUR_TILE_SIZE = int(os.environ.get("BLUR_TILE_SIZE", "1024"))
+    BLUR_TILE_OVERLAP = int(os.environ.get("BLUR_TILE_OVERLAP", "192"))
+    BLUR_TILE_WORKERS = int(os.environ.get("BLUR_TILE_WORKERS", "2"))
+
+    # Batch blur endpoint: images (or zips of images) per request and the
+    # worker threads pipelining them.
+    BLUR_BATCH_MAX_FILES = int(os.environ.get("BLUR_BATCH_MAX_FILES", "500"))
+    BLUR_BATCH_CONCURRENCY = int(os.environ.get("BLUR_BATCH_CONCURRENCY", "4"))
+    BLUR_BATCH_MAX_UPLOAD_MB = int(os.environ.get("BLUR_BATCH_MAX_UPLOAD_MB", "500"))
+
+    # Video blurring: MTCNN every BLUR_VIDEO_DETECT_EVERY frames on a copy
+    # downscaled to BLUR_VIDEO_DETECT_MAX_DIMENSION, optical-flow tracking in
+    # between. Output is webm (VP8, plays in browsers) or mp4 (MPEG-4 Part 2).
+    BLUR_VIDEO_DETECT_EVERY = int(os.environ.get("BLUR_VIDEO_DETECT_EVERY", "5"))
+    BLUR_VIDEO_DETECT_MAX_DIMENSION = int(os.environ.get("BLUR_VIDEO_DETECT_MAX_DIMENSION", "960"))
+    BLUR_VIDEO_OUTPUT_FORMAT = os.environ.get("BLUR_VIDEO_OUTPUT_FORMAT", "webm").lower()
+    BLUR_VIDEO_MAX_SECONDS = int(os.environ.get("BLUR_VIDEO_MAX_SECONDS", "120"))  # longer clips are cut
+    BLUR_VIDEO_MAX_UPLOAD_MB = int(os.environ.get("BLUR_VIDEO_MAX_UPLOAD_MB", "200"))
+
+    # Batch image analytics upload cap (the other batch settings are below).
+    ANALYTICS_BATCH_MAX_UPLOAD_MB = int(os.environ.get("ANALYTICS_BATCH_MAX_UPLOAD_MB", "100"))
+
+    # Upload caps that replace MAX_CONTENT_LENGTH for these endpoints (see app.py).
+    MAX_CONTENT_LENGTH_OVERRIDES = {
+        'multimedia.process_multimedia_blur_batch_route': BLUR_BATCH_MAX_UPLOAD_MB * 1024 * 1024,
+        'multimedia.process_multimedia_blur_video_route': BLUR_VIDEO_MAX_UPLOAD_MB * 1024 * 1024,
+        'multimedia.process_multimedia_analyze_batch_route': ANALYTICS_BATCH_MAX_UPLOAD_MB * 1024 * 1024,
+    }
+
+    # --- Feature: Multimedia (Result Caches) ---
+    # Face boxes and Gemini analyses keyed by a hash of the normalized image.
+    MULTIMEDIA_CACHE_MAX_ENTRIES = int(os.environ.get("MULTIMEDIA_CACHE_MAX_ENTRIES", "256"))
+    MULTIMEDIA_CACHE_TTL_SECONDS = int(os.environ.get("MULTIMEDIA_CACHE_TTL_SECONDS", "3600"))
+    # Widths the serve route may downscale to (?w=...), and how many previews to keep.
+    MULTIMEDIA_PREVIEW_WIDTHS = (480, 960)
+    MULTIMEDIA_PREVIEW_CACHE_MAX_ENTRIES = int(os.environ.get("MULTIMEDIA_PREVIEW_CACHE_MAX_ENTRIES", "256"))
+    # Max dHash bit distance for near-duplicate analysis hits (e.g. 4). Unset disables it.
+    ANALYTICS_PHASH_MAX_DISTANCE = int(os.environ["ANALYTICS_PHASH_MAX_DISTANCE"]) if os.environ.get("ANALYTICS_PHASH_MAX_DISTANCE") else None
+
+    # --- Feature: Multimedia (Image Workers) ---
+    # Process pool for normalize/detect/render/colors. 0 runs them inline on the
+    # request thread. Each worker pins TensorFlow/OpenCV to WORKER_THREADS threads,
+    # so PROCESSES * THREADS should not exceed the available cores.
+    MULTIMEDIA_WORKER_PROCESSES = int(os.environ.get("MULTIMEDIA_WORKER_PROCESSES", "0"))
+    MULTIMEDIA_WORKER_THREADS = int(os.environ.get("MULTIMEDIA_WORKER_THREADS", "1"))
+    # Jobs allowed in flight before requests wait for a slot (default 2x processes).
+    MULTIMEDIA_WORKER_MAX_PENDING = int(os.environ["MULTIMEDIA_WORKER_MAX_PENDING"]) if os.environ.get("MULTIMEDIA_WORKER_MAX_PENDING") else None
+    # Longest a request waits for one job (e.g. tiled detection) before giving up.
+    MULTIMEDIA_WORKER_JOB_TIMEOUT_SECONDS = float(os.environ.get("MULTIMEDIA_WORKER_JOB_TIMEOUT_SECONDS", "120"))
+
+    # --- Feature: Multimedia (Image Analytics) ---
+    # Overall budget for one analyze request; the Gemini call is abandoned past it.
+    ANALYTICS_DEADLINE_SECONDS = float(os.environ.get("ANALYTICS_DEADLINE_SECONDS", "60"))
+    # Long edge (px) of the JPEG sent to Gemini, independent of the 1920px
+    # normalization used for display. 0 sends the normalized image as-is.
+    ANALYTICS_MAX_DIMENSION = int(os.environ.get("ANALYTICS_MAX_DIMENSION", "768"))
+    ANALYTICS_JPEG_QUALITY = int(os.environ.get("ANALYTICS_JPEG_QUALITY", "85"))
+    # Long edge (px) of the preview shown next to the analysis (served by URL).
+    ANALYTICS_PREVIEW_WIDTH = int(os.environ.get("ANALYTICS_PREVIEW_WIDTH", "960"))
+    # Batch analytics: images packed into one Gemini call (1 = a call per image),
+    # and the most images one request may carry.
+    ANALYTICS_BATCH_SIZE = int(os.environ.get("ANALYTICS_BATCH_SIZE", "8"))
+    ANALYTICS_BATCH_MAX_IMAGES = int(os.environ.get("ANALYTICS_BATCH_MAX_IMAGES", "24"))
+    # Rate limit of the batch route counted in images, not requests, so a batch
+    # costs what the same images would one by one. Each window must allow at
+    # least ANALYTICS_BATCH_MAX_IMAGES or full batches are always refused.
+    ANALYTICS_BATCH_RATE_LIMIT = os.environ.get("ANALYTICS_BATCH_RATE_LIMIT", "24 per hour")
+    # USD per million tokens, for the cost estimate reported with batch results.
+    GEMINI_INPUT_USD_PER_MTOK = float(os.environ.get("GEMINI_INPUT_USD_PER_MTOK", "0.075"))
+    GEMINI_OUTPUT_USD_PER_MTOK = float(os.environ.get("GEMINI_OUTPUT_USD_PER_MTOK", "0.30"))
+
     # --- Feature: PII Redaction ---
     PII_ALLOWED_EXTENSIONS = {'docx', 'pptx'}
+    # spaCy model behind Presidio: en_core_web_sm / md / lg / trf (must be
+    # installed; the Dockerfile's PII_SPACY_MODEL build arg downloads it).
+    PII_SPACY_MODEL = os.environ.get("PII_SPACY_MODEL", "en_core_web_lg")
+    # Pipeline components to switch off. Presidio never uses the parser. Adding
+    # "tok2vec,tagger,attribute_ruler,lemmatizer" is faster again but drops the
+    # lemma-based context boost (don't disable tok2vec/transformer on trf).
+    PII_SPACY_DISABLED_COMPONENTS = tuple(
+        name.strip() for name in os.environ.get("PII_SPACY_DISABLED_COMPONENTS", "parser").split(",") if name.strip()
+    )
+    # "full" (spaCy NER + pattern recognizers) or "fast" (pattern/checksum
+    # recognizers only: emails, phones, card/ID numbers, IBANs, IPs). Preselected
+    # in the form; each request can pick either.
+    PII_DEFAULT_REDACTION_MODE = os.environ.get("PII_DEFAULT_REDACTION_MODE", "full")
+    # Paragraphs per spaCy nlp.pipe batch when analyzing a document.
+    PII_ANALYSIS_BATCH_SIZE = int(os.environ.get("PII_ANALYSIS_BATCH_SIZE", "64"))
+    # Paragraphs longer than this many characters (converted PDFs, exhibits)
+    # go through spaCy as overlapping windows cut at sentence ends, keeping
+    # memory flat and far below nlp.max_length.
+    PII_ANALYSIS_CHUNK_CHARS = int(os.environ.get("PII_ANALYSIS_CHUNK_CHARS", "4000"))
+    PII_ANALYSIS_CHUNK_OVERLAP_CHARS = int(os.environ.get("PII_ANALYSIS_CHUNK_OVERLAP_CHARS", "400"))
+    # Worker processes forked at startup (sharing the loaded spaCy model) that
+    # split the analysis of large documents. 0 analyzes on the request thread.
+    # Documents with fewer distinct paragraphs than MIN_PARAGRAPHS stay inline.
+    PII_WORKER_PROCESSES = int(os.environ.get("PII_WORKER_PROCESSES", "0"))
+    PII_WORKER_MIN_PARAGRAPHS = int(os.environ.get("PII_WORKER_MIN_PARAGRAPHS", "200"))
+    # Analyzer results for repeated paragraphs (boilerplate, headers, footers),
+    # shared across requests. Keyed by a hash of the text + recognizer setup, so
+    # never stale and never holding the text itself.
+    PII_ANALYSIS_CACHE_MAX_ENTRIES = int(os.environ.get("PII_ANALYSIS_CACHE_MAX_ENTRIES", "4096"))
+    PII_ANALYSIS_CACHE_TTL_SECONDS = int(os.environ.get("PII_ANALYSIS_CACHE_TTL_SECONDS", "3600"))
+    # Longer paragraphs are analyzed but never cached.
+    PII_ANALYSIS_CACHE_MAX_TEXT_CHARS = int(os.environ.get("PII_ANALYSIS_CACHE_MAX_TEXT_CHARS", "10000"))
 
     # --- Feature: Summarization & PPT Builder ---
     # Constants defined directly here to decouple from logic folders
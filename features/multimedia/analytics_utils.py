@@ -2,23 +2,25 @@
 import google.generativeai as genai
 import json
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from PIL import Image
 import io
+import numpy as np
 from pillow_heif import register_heif_opener
 
 # Register HEIC/HEIF support for PIL
 register_heif_opener()
 
-def build_analytics_prompt():
-    """
-    Creates a robust, structured prompt for the Gemini vision model.
-    """
-    return """
-    You are a strict, literal-minded content safety analyst. Your task is to analyze the attached image and provide a factual, evidence-based analysis based ONLY on the visual information present. Do not make inferences, assumptions, or judgments based on historical, cultural, or symbolic context.
+# Shared pool for the blocking Gemini vision calls, so the request thread can do
+# the local image work while the network call is in flight.
+_GEMINI_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix='gemini-vision')
 
-    Respond ONLY with a single, valid JSON object. Do not include markdown backticks (```json) or any text outside of the JSON object.
+class AnalysisCancelled(Exception):
+    """The client went away before the analysis finished."""
 
-    The JSON object must adhere to the following strict definitions:
+# The fields every analysis carries; shared by the single-image and batch prompts.
+ANALYSIS_OBJECT_SCHEMA = """
     {
       "description": "A 1-2 sentence, objective description of the visual elements in the image. This should be very concise and factual.",
       "rich_description": "A more detailed and engaging narrative description in a short paragraph (3-5 sentences). As a photo curator, describe the mood, composition, and potential interactions between subjects, while still grounding your description in visual evidence.",
@@ -34,19 +36,81 @@ def build_analytics_prompt():
     }
     """
 
-def analyze_image_with_gemini(image_bytes: bytes, gemini_model) -> dict | None:
+def build_analytics_prompt():
+    """
+    Creates a robust, structured prompt for the Gemini vision model.
+    """
+    return """
+    You are a strict, literal-minded content safety analyst. Your task is to analyze the attached image and provide a factual, evidence-based analysis based ONLY on the visual information present. Do not make inferences, assumptions, or judgments based on historical, cultural, or symbolic context.
+
+    Respond ONLY with a single, valid JSON object. Do not include markdown backticks (```json) or any text outside of the JSON object.
+
+    The JSON object must adhere to the following strict definitions:
+    """ + ANALYSIS_OBJECT_SCHEMA
+
+def build_batch_analytics_prompt(image_count: int):
+    """
+    Prompt for several images in one call. Each image follows an "Image <n>:"
+    label, and the model answers with one object per image, keyed by "index".
+    """
+    return f"""
+    You are a strict, literal-minded content safety analyst. You are given {image_count} images, each preceded by a label "Image <n>:" where n runs from 0 to {image_count - 1}. Analyze each image independently and provide a factual, evidence-based analysis based ONLY on the visual information present in that image. Do not make inferences, assumptions, or judgments based on historical, cultural, or symbolic context, and do not let one image influence the analysis of another.
+
+    Respond ONLY with a single, valid JSON array containing exactly {image_count} objects, one per image. Do not include markdown backticks (```json) or any text outside of the JSON array.
+
+    Each object must have an integer "index" field with the image's number, plus the following fields with these strict definitions:
+    """ + ANALYSIS_OBJECT_SCHEMA
+
+def prepare_image_for_analysis(image_bytes: bytes, max_dimension: int | None = 768, quality: int = 85) -> bytes:
+    """
+    Returns JPEG bytes no larger than max_dimension on the long edge, ready to
+    send to Gemini as-is. A JPEG that already fits is passed through untouched;
+    anything else is decoded (JPEG at reduced DCT scale) and encoded exactly once.
+    """
+    image = Image.open(io.BytesIO(image_bytes))
+    fits = not max_dimension or max(image.size) <= max_dimension
+    if image.format == 'JPEG' and fits:
+        return image_bytes
+
+    if max_dimension:
+        # JPEG only: let libjpeg decode at 1/2, 1/4 or 1/8 scale when possible.
+        image.draft('RGB', (max_dimension, max_dimension))
+        image.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+
+    output_buffer = io.BytesIO()
+    image.save(output_buffer, format='JPEG', quality=quality)
+    return output_buffer.getvalue()
+
+def analyze_image_with_gemini(image_bytes: bytes, gemini_model, timeout: float | None = None,
+                              max_dimension: int | None = 768, jpeg_quality: int = 85,
+                              usage: dict | None = None) -> dict | None:
     """
     Sends the image and a structured prompt to the Gemini model for analysis.
+
+    The image is downscaled to the analysis resolution and sent as encoded JPEG
+    bytes, so the SDK does not re-encode a PIL image. timeout (seconds) is passed
+    to the API client so a hung call can't pin a worker thread. If given, usage
+    accumulates the call count and token usage (see record_usage).
     """
     if not image_bytes:
         return None
 
+    json_string = ""
     try:
-        image_for_model = Image.open(io.BytesIO(image_bytes))
+        payload = prepare_image_for_analysis(image_bytes, max_dimension, jpeg_quality)
         prompt = build_analytics_prompt()
         
-        logging.info("Sending image to Gemini for analysis with robust prompt...")
-        response = gemini_model.generate_content([prompt, image_for_model])
+        logging.info(f"Sending image to Gemini for analysis with robust prompt ({len(payload) / 1024:.0f} KB JPEG payload)...")
+        request_start_time = time.time()
+        request_options = {'timeout': timeout} if timeout else None
+        response = gemini_model.generate_content(
+            [prompt, {'mime_type': 'image/jpeg', 'data': payload}],
+            request_options=request_options,
+        )
+        logging.info(f"Gemini image analysis responded in {time.time() - request_start_time:.2f}s.")
+        record_usage(usage, response)
 
         # Clean the response text to isolate the JSON object
         raw_text = response.text.strip()
@@ -70,45 +134,259 @@ def analyze_image_with_gemini(image_bytes: bytes, gemini_model) -> dict | None:
         logging.error(f"An unexpected error occurred during Gemini image analysis: {e}", exc_info=True)
         return {"error": f"An unexpected error occurred: {str(e)}"}
 
-def extract_dominant_colors(image_bytes: bytes, num_colors: int = 5) -> list[str]:
+def new_usage() -> dict:
+    return {'calls': 0, 'prompt_tokens': 0, 'output_tokens': 0, 'fallbacks': 0}
+
+def record_usage(usage: dict | None, response):
+    """Adds one call and its usage_metadata token counts (when reported) to usage."""
+    if usage is None:
+        return
+    usage['calls'] += 1
+    metadata = getattr(response, 'usage_metadata', None)
+    usage['prompt_tokens'] += getattr(metadata, 'prompt_token_count', 0) or 0
+    usage['output_tokens'] += getattr(metadata, 'candidates_token_count', 0) or 0
+
+def merge_usage(usages) -> dict:
+    total = new_usage()
+    for usage in usages:
+        for key in total:
+            total[key] += usage[key]
+    return total
+
+def estimate_cost_usd(usage: dict, input_usd_per_mtok: float, output_usd_per_mtok: float) -> float:
+    return (usage['prompt_tokens'] * input_usd_per_mtok + usage['output_tokens'] * output_usd_per_mtok) / 1_000_000
+
+def _parse_batch_response(raw_text: str, image_count: int) -> dict[int, dict]:
+    """
+    Pulls the per-image objects out of a batch response, keyed by their
+    "index". Entries that are malformed, out of range or repeated are left
+    out, so the caller can retry just those images.
+    """
+    json_start = raw_text.find('[')
+    json_end = raw_text.rfind(']') + 1
+    if json_start == -1 or json_end == 0:
+        return {}
+    try:
+        entries = json.loads(raw_text[json_start:json_end])
+    except json.JSONDecodeError:
+        return {}
+
+    analyses = {}
+    for entry in entries if isinstance(entries, list) else []:
+        if not isinstance(entry, dict) or 'description' not in entry:
+            continue
+        index = entry.pop('index', None)
+        if isinstance(index, str) and index.strip().isdigit():
+            index = int(index)
+        if isinstance(index, int) and 0 <= index < image_count and index not in analyses:
+            analyses[index] = entry
+    return analyses
+
+def analyze_images_batch_with_gemini(images: list[bytes], gemini_model, timeout: float | None = None,
+                                     max_dimension: int | None = 768, jpeg_quality: int = 85,
+                                     usage: dict | None = None) -> list[dict | None]:
     """
-    Extracts a palette of the most dominant colors from an image using Pillow (PIL).
-    Replaces the heavy scikit-learn dependency.
+    Analyzes several images with a single generate_content call.
+
+    The images are interleaved with "Image <n>:" labels and the model returns
+    a JSON array keyed by index. Any image whose entry is missing or fails to
+    parse (or all of them, if the call itself fails) falls back to its own
+    analyze_image_with_gemini call. Returns one result per image, in order.
+    """
+    if len(images) == 1:
+        return [analyze_image_with_gemini(images[0], gemini_model, timeout, max_dimension, jpeg_quality, usage)]
+
+    analyses = {}
+    try:
+        contents = [build_batch_analytics_prompt(len(images))]
+        for index, image_bytes in enumerate(images):
+            contents.append(f"Image {index}:")
+            contents.append({'mime_type': 'image/jpeg', 'data': prepare_image_for_analysis(image_bytes, max_dimension, jpeg_quality)})
+
+        logging.info(f"Sending {len(images)} images to Gemini for analysis in one request...")
+        request_start_time = time.time()
+        request_options = {'timeout': timeout} if timeout else None
+        response = gemini_model.generate_content(contents, request_options=request_options)
+        logging.info(f"Gemini batch analysis of {len(images)} images responded in {time.time() - request_start_time:.2f}s.")
+        record_usage(usage, response)
+        analyses = _parse_batch_response(response.text.strip(), len(images))
+    except Exception as e:
+        logging.error(f"Gemini batch image analysis failed, falling back to single-image calls: {e}", exc_info=True)
+
+    results = []
+    for index, image_bytes in enumerate(images):
+        if index in analyses:
+            results.append(analyses[index])
+            continue
+        logging.warning(f"No usable batch entry for image {index}; analyzing it on its own.")
+        if usage is not None:
+            usage['fallbacks'] += 1
+        results.append(analyze_image_with_gemini(image_bytes, gemini_model, timeout, max_dimension, jpeg_quality, usage))
+    return results
+
+def analyze_images_in_batches(images: list[bytes], gemini_model, batch_size: int = 8,
+                              deadline_seconds: float = 60.0, is_disconnected=None,
+                              max_dimension: int | None = 768, jpeg_quality: int = 85) -> tuple[list[dict | None], dict]:
+    """
+    Splits images into groups of batch_size and analyzes each group with one
+    call (batch_size=1 means one call per image). Groups run concurrently on
+    the shared Gemini executor, under one overall deadline.
+
+    Returns (results in input order, usage summed over all calls). Raises
+    TimeoutError / AnalysisCancelled like analyze_image_concurrently.
+    """
+    batch_size = max(1, batch_size)
+    deadline = time.monotonic() + deadline_seconds
+    groups = [images[i:i + batch_size] for i in range(0, len(images), batch_size)]
+    usages = [new_usage() for _ in groups]
+    futures = [
+        _GEMINI_EXECUTOR.submit(analyze_images_batch_with_gemini, group, gemini_model, deadline_seconds,
+                                max_dimension, jpeg_quality, group_usage)
+        for group, group_usage in zip(groups, usages)
+    ]
+    try:
+        results = []
+        for future in futures:
+            results.extend(_wait_for_result(future, deadline, is_disconnected))
+        return results, merge_usage(usages)
+    finally:
+        for future in futures:
+            future.cancel()
+
+def load_rgb_pixels(image_bytes: bytes, max_dimension: int | None = None) -> np.ndarray:
+    """
+    Decodes image bytes into an HxWx3 uint8 RGB array, optionally no larger than
+    max_dimension (JPEGs are decoded at reduced DCT scale when possible).
+    """
+    image = Image.open(io.BytesIO(image_bytes))
+    if max_dimension:
+        image.draft('RGB', (max_dimension, max_dimension))
+        image.thumbnail((max_dimension, max_dimension))
+    return np.asarray(image.convert('RGB'))
+
+def extract_dominant_colors(image: bytes | np.ndarray, num_colors: int = 5, max_samples: int = 40000,
+                            min_distance: float = 40.0) -> list[dict]:
+    """
+    Extracts the most dominant colors with NumPy histogram binning.
+
+    Pixels (subsampled to at most max_samples) are binned into a 16x16x16 RGB
+    grid; the fullest bins that are at least min_distance apart seed the
+    palette, every bin is assigned to its nearest seed, and the seeds move to
+    the pixel-weighted mean of their bins.
+
+    Args:
+        image: Encoded image bytes, or an already decoded RGB uint8 array
+               (HxWx3 or Nx3) to share a decode done elsewhere.
 
     Returns:
-        A list of hex color strings.
+        [{'hex': '#rrggbb', 'coverage': percent}, ...] sorted by coverage, largest first.
     """
     try:
-        # Open the image and convert to RGB
-        image = Image.open(io.BytesIO(image_bytes)).convert('RGB')
-        
-        # Resize to a small thumbnail for speed
-        image.thumbnail((150, 150))
-        
-        # Use Pillow's built-in quantization to reduce the image to 'num_colors'
-        # Method 2 = Fast Octree
-        quantized = image.quantize(colors=num_colors, method=2)
-        
-        # Get the palette (comes as a flat list [r, g, b, r, g, b, ...])
-        palette = quantized.getpalette()
-        
-        hex_colors = []
-        if palette:
-            # We only want the first 'num_colors' RGB triplets
-            for i in range(num_colors):
-                idx = i * 3
-                # Safety check to ensure we don't go out of bounds
-                if idx + 2 < len(palette):
-                    r = palette[idx]
-                    g = palette[idx+1]
-                    b = palette[idx+2]
-                    
-                    # Convert RGB to Hex
-                    hex_color = '#{:02x}{:02x}{:02x}'.format(r, g, b)
-                    hex_colors.append(hex_color)
-            
-        return hex_colors
+        if isinstance(image, np.ndarray):
+            pixels = image
+        else:
+            # 150px is plenty for a palette and lets JPEGs decode at 1/8 scale.
+            pixels = load_rgb_pixels(image, max_dimension=150)
+        pixels = pixels.reshape(-1, 3)
+        if pixels.shape[0] == 0:
+            return []
+
+        step = max(1, pixels.shape[0] // max_samples)
+        pixels = pixels[::step].astype(np.int64)
+
+        quantized = pixels >> 4
+        bin_ids = (quantized[:, 0] << 8) | (quantized[:, 1] << 4) | quantized[:, 2]
+        counts = np.bincount(bin_ids, minlength=4096)
+        occupied = np.flatnonzero(counts)
+        bin_counts = counts[occupied].astype(np.float64)
+        bin_means = np.stack(
+            [np.bincount(bin_ids, weights=pixels[:, c], minlength=4096)[occupied] for c in range(3)],
+            axis=1,
+        ) / bin_counts[:, None]
+
+        # Seed with the fullest bins, skipping near-duplicates of colors already chosen.
+        seeds = []
+        for idx in np.argsort(-bin_counts, kind='stable'):
+            candidate = bin_means[idx]
+            if all(np.linalg.norm(candidate - seed) >= min_distance for seed in seeds):
+                seeds.append(candidate)
+                if len(seeds) == num_colors:
+                    break
+        centers = np.array(seeds)
+
+        # Assign every occupied bin to its nearest seed and refine once.
+        distances = ((bin_means[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+        labels = distances.argmin(axis=1)
+        coverage = np.bincount(labels, weights=bin_counts, minlength=len(centers))
+        for c in range(3):
+            centers[:, c] = np.bincount(labels, weights=bin_means[:, c] * bin_counts, minlength=len(centers)) / np.maximum(coverage, 1)
+
+        total = coverage.sum()
+        palette = []
+        for i in np.argsort(-coverage, kind='stable'):
+            if coverage[i] <= 0:
+                continue
+            r, g, b = (int(round(v)) for v in centers[i])
+            palette.append({
+                'hex': '#{:02x}{:02x}{:02x}'.format(r, g, b),
+                'coverage': round(100.0 * coverage[i] / total, 1),
+            })
+        return palette
 
     except Exception as e:
         logging.error(f"Could not extract dominant colors: {e}", exc_info=True)
-        return []
\ No newline at end of file
+        return []
+
+def _wait_for_result(future, deadline: float, is_disconnected=None, poll_interval: float = 0.25):
+    """
+    Blocks until `future` finishes, the monotonic deadline passes (TimeoutError)
+    or is_disconnected() reports the client has gone (AnalysisCancelled).
+    """
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError("Image analysis did not finish before the deadline.")
+        if is_disconnected is not None and is_disconnected():
+            raise AnalysisCancelled()
+        try:
+            return future.result(timeout=min(poll_interval, remaining))
+        except FutureTimeoutError:
+            continue
+
+def build_preview_and_colors(image_bytes: bytes, preview_width: int = 960, quality: int = 80,
+                             num_colors: int = 5) -> tuple[bytes, list[dict]]:
+    """
+    Decodes the image once, at (about) preview size, and derives both the JPEG
+    preview shown next to the analysis and the dominant-color palette from it.
+    Returns (preview_jpeg_bytes, dominant_colors).
+    """
+    image = Image.open(io.BytesIO(image_bytes))
+    image.draft('RGB', (preview_width, preview_width))
+    image.thumbnail((preview_width, preview_width), Image.Resampling.LANCZOS)
+    image = image.convert('RGB')
+    output_buffer = io.BytesIO()
+    image.save(output_buffer, format='JPEG', quality=quality)
+    return output_buffer.getvalue(), extract_dominant_colors(np.asarray(image), num_colors)
+
+def analyze_image_concurrently(image_bytes: bytes, analyze_fn, deadline_seconds: float = 60.0,
+                               is_disconnected=None, preview_fn=None) -> tuple[dict | None, list, bytes]:
+    """
+    Runs analyze_fn(image_bytes) - the network-bound Gemini call - on the shared
+    executor while this thread builds the preview and extracts the dominant
+    colors, so the critical path is max(Gemini, local work) instead of the sum.
+
+    Returns (analysis_results, dominant_colors, preview_bytes). Raises
+    TimeoutError past the deadline and AnalysisCancelled if the client
+    disconnects; in both cases the pending call is abandoned.
+    preview_fn(image_bytes) -> (preview_bytes, colors) overrides
+    build_preview_and_colors (e.g. to run it in the image worker pool).
+    """
+    deadline = time.monotonic() + deadline_seconds
+    future = _GEMINI_EXECUTOR.submit(analyze_fn, image_bytes)
+    try:
+        preview_bytes, dominant_colors = (preview_fn or build_preview_and_colors)(image_bytes)
+        analysis_results = _wait_for_result(future, deadline, is_disconnected)
+        return analysis_results, dominant_colors, preview_bytes
+    finally:
+        # No-op once finished; drops the call if it is still queued.
+        future.cancel()
@@ -0,0 +1,179 @@
+# features/multimedia/batch_utils.py
+# Helpers for the batch blur endpoint: expanding uploads (loose images and/or
+# zips) into sources, pipelining them across a bounded set of threads, and
+# writing the result zip to a non-seekable stream chunk by chunk.
+import os
+import time
+import shutil
+import zipfile
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from werkzeug.utils import secure_filename
+
+from .blur_utils import allowed_file, resolve_output_format, OUTPUT_FORMATS
+from . import workers
+
+def _unique_root(name: str, used: set) -> str:
+    root = os.path.splitext(secure_filename(name.replace('/', '_')) or 'image')[0] or 'image'
+    candidate, counter = root, 1
+    while candidate in used:
+        counter += 1
+        candidate = f"{root}-{counter}"
+    used.add(candidate)
+    return candidate
+
+
+def collect_batch_sources(files, max_files: int, max_image_bytes: int) -> tuple[list[dict], list]:
+    """
+    Expands uploaded FileStorage objects into a flat list of image sources.
+
+    Each upload is first copied to a temp file owned by the batch: Flask closes
+    the request's files as soon as the view returns, before a streamed response
+    is consumed. Zips are then read member by member (nothing is extracted up
+    front), so only the images currently in flight are held in memory.
+
+    Returns (sources, spools). Each source is {'name', 'file_root', 'read'}
+    where read() returns the bytes; the caller closes the spools when done.
+    Raises ValueError when there are no images or more than max_files.
+    """
+    sources, spools, used_roots = [], [], set()
+
+    def add(name, read):
+        sources.append({'name': name, 'file_root': _unique_root(name, used_roots), 'read': read})
+        if len(sources) > max_files:
+            raise ValueError(f"Too many images. A batch can contain at most {max_files}.")
+
+    try:
+        for file in files:
+            if not file or not file.filename:
+                continue
+            is_zip = file.filename.lower().endswith('.zip')
+            if not is_zip and not allowed_file(file.filename):
+                continue
+            spool = tempfile.TemporaryFile()
+            spools.append(spool)
+            shutil.copyfileobj(file.stream, spool)
+            spool.seek(0)
+            if is_zip:
+                try:
+                    archive = zipfile.ZipFile(spool)
+                except zipfile.BadZipFile:
+                    raise ValueError(f"'{file.filename}' is not a valid zip archive.")
+                for info in archive.infolist():
+                    base_name = os.path.basename(info.filename)
+                    if info.is_dir() or info.filename.startswith('__MACOSX/') or base_name.startswith('.') or not allowed_file(base_name):
+                        continue
+                    add(info.filename, _zip_member_reader(archive, info, max_image_bytes))
+            else:
+                add(file.filename, _spool_reader(spool))
+
+        if not sources:
+            raise ValueError("No valid images found. Upload JPG, PNG, WEBP or HEIC files, or a zip of them.")
+    except Exception:
+        close_spools(spools)
+        raise
+    return sources, spools
+
+
+def close_spools(spools: list):
+    for spool in spools:
+        spool.close()
+
+
+def _spool_reader(spool):
+    def read():
+        spool.seek(0)
+        return spool.read()
+    return read
+
+
+def _zip_member_reader(archive: zipfile.ZipFile, info: zipfile.ZipInfo, max_image_bytes: int):
+    def read():
+        # The declared size guards against decompression bombs; the extra byte
+        # catches archives that under-report it.
+        if info.file_size > max_image_bytes:
+            raise ValueError(f"Image exceeds the {max_image_bytes // (1024 * 1024)}MB per-image limit.")
+        with archive.open(info) as member:
+            data = member.read(max_image_bytes + 1)
+        if len(data) > max_image_bytes:
+            raise ValueError(f"Image exceeds the {max_image_bytes // (1024 * 1024)}MB per-image limit.")
+        return data
+    return read
+
+
+def blur_batch_image(image_bytes: bytes, target_resolution: tuple[int, int], blur_size: int, mode: str,
+                     output_format: str = 'auto', quality: int = 90, png_compression: int = 1) -> dict:
+    """Normalize -> detect -> render for one batch image. Returns {'image_bytes', 'output_format', 'faces'}."""
+    normalized = workers.normalize_image(image_bytes, target_resolution)
+    resolved_format = resolve_output_format(normalized, output_format)
+    faces = workers.detect_faces_in_bytes(normalized)
+    rendered = workers.render_faces(normalized, faces, blur_size, mode, resolved_format,
+                                    quality=quality, png_compression=png_compression)
+    return {'image_bytes': rendered, 'output_format': resolved_format, 'faces': len(faces)}
+
+
+def iter_batch_results(sources: list[dict], process_fn, concurrency: int = 4):
+    """
+    Runs process_fn(source) over the sources with at most 2 x concurrency
+    submitted at a time, yielding (index, source, result, error) in completion
+    order. Closing the generator early cancels everything not yet started.
+    """
+    window = max(1, concurrency) * 2
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix='blur-batch') as pool:
+        pending = {}
+        next_index = 0
+        try:
+            while pending or next_index < len(sources):
+                while next_index < len(sources) and len(pending) < window:
+                    pending[pool.submit(process_fn, sources[next_index])] = next_index
+                    next_index += 1
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    index = pending.pop(future)
+                    try:
+                        result, error = future.result(), None
+                    except Exception as e:
+                        result, error = None, e
+                    yield index, sources[index], result, error
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def batch_output_name(file_root: str, output_format: str) -> str:
+    return f"{file_root}-blurred{OUTPUT_FORMATS[output_format]['extension']}"
+
+
+class _ZipChunkSink:
+    """Write-only, non-seekable file object; zipfile falls back to data descriptors."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_zip(entries):
+    """
+    Yields a zip archive chunk by chunk. entries is an iterable of
+    (arcname, read) pairs; each read() is called only when its turn comes, so
+    at most one member is in memory. Members are STORED: the images are
+    already compressed.
+    """
+    sink = _ZipChunkSink()
+    with zipfile.ZipFile(sink, mode='w', compression=zipfile.ZIP_STORED) as archive:
+        for arcname, read in entries:
+            info = zipfile.ZipInfo(arcname, date_time=time.localtime()[:6])
+            archive.writestr(info, read())
+            yield sink.drain()
+    yield sink.drain()
@@ -1,6 +1,8 @@
 # features/multimedia/blur_utils.py
 import os
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import cv2
 import numpy as np
 # from mtcnn import MTCNN  <-- REMOVE THIS GLOBAL IMPORT
@@ -8,6 +10,13 @@ from werkzeug.utils import secure_filename
 
 VALID_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.heic', '.heif')
 
+# Encodings the blur pipeline can emit, keyed by the short format name.
+OUTPUT_FORMATS = {
+    'jpeg': {'extension': '.jpg', 'mimetype': 'image/jpeg'},
+    'png': {'extension': '.png', 'mimetype': 'image/png'},
+    'webp': {'extension': '.webp', 'mimetype': 'image/webp'},
+}
+
 def allowed_file(filename: str) -> bool:
     """Check if the file has one of the valid extensions."""
     return filename.lower().endswith(VALID_EXTENSIONS)
@@ -17,68 +26,289 @@ def validate_blur_size(blur_size: int) -> int:
     blur_size = max(1, blur_size) 
     return blur_size if blur_size % 2 == 1 else blur_size + 1 
 
-def blur_image_opencv(image_bytes: bytes, blur_size: int) -> bytes | None:
+def detect_image_format(image_bytes: bytes) -> str | None:
+    """Sniffs the container format from the magic bytes ('jpeg', 'png', 'webp' or None)."""
+    if image_bytes[:3] == b'\xff\xd8\xff':
+        return 'jpeg'
+    if image_bytes[:8] == b'\x89PNG\r\n\x1a\n':
+        return 'png'
+    if image_bytes[:4] == b'RIFF' and image_bytes[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+def resolve_output_format(image_bytes: bytes, requested: str = 'auto') -> str:
     """
-    Blurs or redacts detected faces in the image using MTCNN and OpenCV.
+    Picks the output encoding. 'auto' follows the input format so JPEG/WebP
+    photos stay lossy and only lossless sources are written as PNG.
     """
-    try:
+    if requested in OUTPUT_FORMATS:
+        return requested
+    return detect_image_format(image_bytes) or 'png'
+
+def encode_image(image: np.ndarray, output_format: str, quality: int = 90, png_compression: int = 1) -> bytes:
+    """Encodes a BGR image. quality applies to JPEG/WebP, png_compression (0-9) to PNG."""
+    if output_format == 'jpeg':
+        params = [cv2.IMWRITE_JPEG_QUALITY, quality]
+    elif output_format == 'webp':
+        params = [cv2.IMWRITE_WEBP_QUALITY, quality]
+    else:
+        params = [cv2.IMWRITE_PNG_COMPRESSION, png_compression]
+
+    is_success, buffer = cv2.imencode(OUTPUT_FORMATS.get(output_format, OUTPUT_FORMATS['png'])['extension'], image, params)
+    if not is_success:
+        raise ValueError(f"Could not encode processed image to {output_format.upper()}.")
+    return buffer.tobytes()
+
+def pixelate_region(roi: np.ndarray, cells: int) -> np.ndarray:
+    """
+    Mosaic pixelation: downscale so the longer side has `cells` blocks, then
+    scale back up with nearest-neighbour. Cost depends only on the ROI size.
+    """
+    h, w = roi.shape[:2]
+    scale = max(1, cells) / max(h, w)
+    small = cv2.resize(roi, (max(1, round(w * scale)), max(1, round(h * scale))), interpolation=cv2.INTER_AREA)
+    return cv2.resize(small, (w, h), interpolation=cv2.INTER_NEAREST)
+
+def fast_gaussian_blur(roi: np.ndarray, kernel_size: int, max_kernel: int = 15) -> np.ndarray:
+    """
+    Approximates cv2.GaussianBlur(roi, (k, k), 0) for large k by blurring a
+    downsampled copy with a proportionally smaller sigma and upsampling it.
+    The blur on the small copy never needs more than ~max_kernel taps, so the
+    cost no longer grows with kernel_size.
+    """
+    kernel_size = validate_blur_size(kernel_size)
+    factor = int(np.ceil(kernel_size / max_kernel))
+    if factor <= 1:
+        return cv2.GaussianBlur(roi, (kernel_size, kernel_size), 0)
+
+    # Same sigma OpenCV derives from ksize when sigma=0.
+    sigma = 0.3 * ((kernel_size - 1) * 0.5 - 1) + 0.8
+    # INTER_AREA already box-filters over `factor` pixels (variance factor^2/12).
+    residual_sigma = np.sqrt(max(sigma ** 2 - factor ** 2 / 12.0, 0.25)) / factor
+
+    h, w = roi.shape[:2]
+    small = cv2.resize(roi, (max(1, round(w / factor)), max(1, round(h / factor))), interpolation=cv2.INTER_AREA)
+    small = cv2.GaussianBlur(small, (0, 0), sigmaX=residual_sigma)
+    return cv2.resize(small, (w, h), interpolation=cv2.INTER_LINEAR)
+
+def anonymize_faces(image: np.ndarray, faces: list[dict], blur_size: int, mode: str = 'blur') -> np.ndarray:
+    """
+    Applies the anonymization `mode` to every detected face box, in place.
+
+    blur_size is the Gaussian kernel for 'blur'/'fast_blur' and the number of
+    mosaic cells for 'pixelate'. A blur_size of -1 always means opaque redaction.
+    """
+    if blur_size == -1:
+        mode = 'redact'
+
+    height, width = image.shape[:2]
+
+    for face in faces:
+        x, y, w, h = face.get('box', (0, 0, 0, 0))
+
+        if mode == 'redact':
+            # OPAQUE REDACTION
+            padding_w = int(w * 0.10)
+            padding_h = int(h * 0.15)
+        else:
+            # BLURRING / PIXELATION
+            padding_w = int(w * 0.20)
+            padding_h = int(h * 0.20)
+
+        x1, y1 = max(0, x - padding_w), max(0, y - padding_h)
+        x2, y2 = min(width, x + w + padding_w), min(height, y + h + padding_h)
+
+        if x2 - x1 <= 0 or y2 - y1 <= 0:
+            continue
+
+        if mode == 'redact':
+            cv2.rectangle(image, (x1, y1), (x2, y2), (0, 0, 0), -1)
+            continue
+
+        face_roi = image[y1:y2, x1:x2]
+        if face_roi.size == 0:
+            continue
+
+        if mode == 'pixelate':
+            image[y1:y2, x1:x2] = pixelate_region(face_roi, blur_size)
+        elif mode == 'fast_blur':
+            image[y1:y2, x1:x2] = fast_gaussian_blur(face_roi, blur_size)
+        else:
+            validated_blur_size = validate_blur_size(blur_size)
+            image[y1:y2, x1:x2] = cv2.GaussianBlur(face_roi, (validated_blur_size, validated_blur_size), 0)
+
+    return image
+
+def decode_image(image_bytes: bytes) -> np.ndarray:
+    """Decodes encoded image bytes into a BGR array."""
+    nparr = np.frombuffer(image_bytes, np.uint8)
+    image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError("Could not decode image from bytes.")
+    return image
+
+_detector_local = threading.local()
+
+def get_face_detector():
+    """
+    Returns this thread's MTCNN instance, creating it on first use. Building the
+    networks costs seconds, so they are kept warm per thread rather than per call.
+    """
+    detector = getattr(_detector_local, 'detector', None)
+    if detector is None:
         # --- NEW: LAZY IMPORT ---
-        # Only load TensorFlow/MTCNN when this function is actually called.
+        # Only load TensorFlow/MTCNN when detection is actually needed.
         from mtcnn import MTCNN 
         # ------------------------
+        detector = _detector_local.detector = MTCNN()
+    return detector
+
+def detect_faces(image: np.ndarray) -> list[dict]:
+    """
+    Runs MTCNN on a BGR image. Returns plain {'box': [x, y, w, h], 'confidence': float}
+    dicts so the result can be cached and re-applied without the detector.
+    """
+    rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    faces = get_face_detector().detect_faces(rgb_image)
+    return [
+        {'box': [int(v) for v in face.get('box', (0, 0, 0, 0))], 'confidence': float(face.get('confidence', 0.0))}
+        for face in faces
+    ]
+
+def merge_face_boxes(faces: list[dict], overlap_threshold: float = 0.5) -> list[dict]:
+    """
+    Non-maximum suppression for detections from overlapping tiles.
+
+    Boxes are visited by confidence; a box whose intersection covers more than
+    overlap_threshold of the smaller box is folded into the kept one. The kept
+    box grows to the union, so a face cut by a tile edge is never under-covered.
+    """
+    if len(faces) < 2:
+        return list(faces)
 
-        nparr = np.frombuffer(image_bytes, np.uint8)
-        image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+    boxes = np.array([face['box'] for face in faces], dtype=np.int64)
+    x1, y1 = boxes[:, 0], boxes[:, 1]
+    x2, y2 = x1 + boxes[:, 2], y1 + boxes[:, 3]
+    areas = np.maximum(boxes[:, 2], 1) * np.maximum(boxes[:, 3], 1)
+    order = np.argsort([-face['confidence'] for face in faces], kind='stable')
+
+    merged = []
+    remaining = order
+    while remaining.size:
+        best, rest = remaining[0], remaining[1:]
+        inter_w = np.clip(np.minimum(x2[best], x2[rest]) - np.maximum(x1[best], x1[rest]), 0, None)
+        inter_h = np.clip(np.minimum(y2[best], y2[rest]) - np.maximum(y1[best], y1[rest]), 0, None)
+        overlap = inter_w * inter_h / np.minimum(areas[best], areas[rest])
+        group = np.concatenate(([best], rest[overlap > overlap_threshold]))
+
+        gx1, gy1 = int(x1[group].min()), int(y1[group].min())
+        gx2, gy2 = int(x2[group].max()), int(y2[group].max())
+        merged.append({'box': [gx1, gy1, gx2 - gx1, gy2 - gy1], 'confidence': faces[best]['confidence']})
+        remaining = rest[overlap <= overlap_threshold]
+    return merged
+
+_tile_executor = None
+_tile_executor_workers = 0
+_tile_executor_lock = threading.Lock()
+
+def _get_tile_executor(max_workers: int) -> ThreadPoolExecutor:
+    # Long-lived so each tile thread keeps its warm detector between requests.
+    global _tile_executor, _tile_executor_workers
+    with _tile_executor_lock:
+        if _tile_executor is None or _tile_executor_workers != max_workers:
+            if _tile_executor is not None:
+                _tile_executor.shutdown(wait=False)
+            _tile_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='face-tiles')
+            _tile_executor_workers = max_workers
+        return _tile_executor
+
+def _tile_origins(length: int, tile_size: int, stride: int) -> list[int]:
+    if length <= tile_size:
+        return [0]
+    origins = list(range(0, length - tile_size, stride))
+    origins.append(length - tile_size)  # last tile flush with the edge
+    return origins
+
+def detect_faces_tiled(image: np.ndarray, tile_size: int = 1024, overlap: int = 192, max_workers: int = 1,
+                       overview_size: int = 1920) -> list[dict]:
+    """
+    Detects faces on a large image by running MTCNN over overlapping tiles at
+    native resolution, so small faces don't fall below MTCNN's minimum size the
+    way they do after downscaling. A face bigger than the overlap (a close-up
+    crossing a tile edge, or bigger than a tile) is only ever seen in pieces
+    there, so the whole image is also detected downscaled to overview_size and
+    both sets of boxes are merged. Tiles run on max_workers threads (each with
+    its own detector); boxes come back in full-image coordinates.
+    """
+    height, width = image.shape[:2]
+    if height <= tile_size and width <= tile_size:
+        return detect_faces(image)
+
+    stride = max(1, tile_size - overlap)
+    tiles = [(x, y) for y in _tile_origins(height, tile_size, stride) for x in _tile_origins(width, tile_size, stride)]
+
+    def detect_tile(origin):
+        if origin is None:
+            return detect_faces_downscaled(image, overview_size)
+        x, y = origin
+        tile_faces = detect_faces(image[y:y + tile_size, x:x + tile_size])
+        for face in tile_faces:
+            face['box'][0] += x
+            face['box'][1] += y
+        return tile_faces
+
+    jobs = [None] + tiles  # None: the whole-image pass
+    if max_workers > 1:
+        per_job = list(_get_tile_executor(max_workers).map(detect_tile, jobs))
+    else:
+        per_job = [detect_tile(job) for job in jobs]
+
+    return merge_face_boxes([face for job_faces in per_job for face in job_faces])
+
+def detect_faces_downscaled(image: np.ndarray, max_side: int = 1920) -> list[dict]:
+    """detect_faces on a copy no larger than max_side, with boxes scaled back to `image`."""
+    height, width = image.shape[:2]
+    scale = min(1.0, max_side / max(height, width))
+    if scale == 1.0:
+        return detect_faces(image)
+    small = cv2.resize(image, (round(width * scale), round(height * scale)), interpolation=cv2.INTER_AREA)
+    faces = detect_faces(small)
+    for face in faces:
+        face['box'] = [int(round(v / scale)) for v in face['box']]
+    return faces
+
+def render_anonymized_image(image: np.ndarray | None, faces: list[dict], blur_size: int, mode: str = 'blur',
+                            source_bytes: bytes | None = None, output_format: str = 'auto',
+                            quality: int = 90, png_compression: int = 1) -> bytes:
+    """
+    Anonymizes `faces` on `image` (modified in place) and encodes the result.
+
+    When there are no faces and source_bytes is already in the output format
+    the source is returned as-is; image may then be None to skip decoding.
+    """
+    if source_bytes is not None:
+        output_format = resolve_output_format(source_bytes, output_format)
+        if not faces and detect_image_format(source_bytes) == output_format:
+            return source_bytes
         if image is None:
-            raise ValueError("Could not decode image from bytes.")
-
-        rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        
-        detector = MTCNN() # Consider initializing this less frequently if performance is an issue
-        faces = detector.detect_faces(rgb_image)
-        
-        if not faces:
-            # Return original image bytes if no faces detected
-            is_success, buffer = cv2.imencode('.png', image) 
-            if is_success:
-                return buffer.tobytes()
-            else:
-                raise ValueError("Could not re-encode image (no faces found).")
-
-        height, width = image.shape[:2]
-        
-        for face in faces:
-            x, y, w, h = face.get('box', (0, 0, 0, 0))
-
-            if blur_size == -1:
-                # OPAQUE REDACTION
-                padding_w = int(w * 0.10)
-                padding_h = int(h * 0.15)
-            else:
-                # BLURRING
-                padding_w = int(w * 0.20)
-                padding_h = int(h * 0.20)
-
-            x1, y1 = max(0, x - padding_w), max(0, y - padding_h)
-            x2, y2 = min(width, x + w + padding_w), min(height, y + h + padding_h)
-            
-            current_w, current_h = x2 - x1, y2 - y1
-
-            if current_w > 0 and current_h > 0:
-                if blur_size == -1:
-                    cv2.rectangle(image, (x1, y1), (x2, y2), (0, 0, 0), -1)
-                else:
-                    face_roi = image[y1:y2, x1:x2]
-                    if face_roi.size > 0:
-                        validated_blur_size = validate_blur_size(blur_size)
-                        blurred_roi = cv2.GaussianBlur(face_roi, (validated_blur_size, validated_blur_size), 0)
-                        image[y1:y2, x1:x2] = blurred_roi
-        
-        is_success, buffer = cv2.imencode('.png', image)
-        if is_success:
-            return buffer.tobytes()
-        else:
-            raise ValueError("Could not encode processed image to PNG.")
+            image = decode_image(source_bytes)
+    elif output_format not in OUTPUT_FORMATS:
+        output_format = 'png'
+
+    if faces:
+        anonymize_faces(image, faces, blur_size, mode)
+    return encode_image(image, output_format, quality, png_compression)
+
+def blur_image_opencv(image_bytes: bytes, blur_size: int, output_format: str = 'auto',
+                      quality: int = 90, png_compression: int = 1, mode: str = 'blur') -> bytes | None:
+    """
+    Blurs, pixelates or redacts detected faces in the image using MTCNN and OpenCV.
+    The result is encoded as output_format (see resolve_output_format).
+    """
+    try:
+        image = decode_image(image_bytes)
+        faces = detect_faces(image)
+        return render_anonymized_image(image, faces, blur_size, mode, image_bytes, output_format, quality, png_compression)
 
     except cv2.error as cv_err:
         print(f"OpenCV error while processing image: {cv_err}")
@@ -0,0 +1,79 @@
+# features/multimedia/cache_utils.py
+# Process-wide caches for the multimedia feature and the image keys they use.
+import hashlib
+
+import cv2
+import numpy as np
+
+from caching import TTLCache
+
+# r_id -> normalized image bytes + detected face boxes of the latest upload in
+# a session, so the strength can be switched without re-detecting. Lifetime
+# matches the session; a miss just asks the user to upload again.
+BLUR_RERENDER_CACHE = TTLCache(max_entries=64, ttl_seconds=3600, name='multimedia_blur_rerender')
+
+# sha256(normalized bytes) -> MTCNN face boxes.
+FACE_DETECTION_CACHE = TTLCache(max_entries=256, ttl_seconds=3600, name='multimedia_face_detection')
+
+# (model, sha256(normalized bytes), analysis resolution) -> {'analysis': dict, 'phash': int}
+IMAGE_ANALYSIS_CACHE = TTLCache(max_entries=256, ttl_seconds=3600, name='multimedia_image_analysis')
+
+# (storage path, width) -> downscaled preview bytes for the serve route. The
+# stored images never change under a path, so entries never go stale.
+DERIVED_IMAGE_CACHE = TTLCache(max_entries=256, ttl_seconds=3600, name='multimedia_derived_images')
+
+# request id -> JPEG preview shown next to an analysis (one per session).
+ANALYTICS_PREVIEW_CACHE = TTLCache(max_entries=256, ttl_seconds=3600, name='multimedia_analytics_preview')
+
+
+def configure_caches(config):
+    """Sizes the caches from app config (called once when the blueprint is registered)."""
+    max_entries = config.get('MULTIMEDIA_CACHE_MAX_ENTRIES', 256)
+    ttl_seconds = config.get('MULTIMEDIA_CACHE_TTL_SECONDS', 3600)
+    FACE_DETECTION_CACHE.configure(max_entries, ttl_seconds)
+    IMAGE_ANALYSIS_CACHE.configure(max_entries, ttl_seconds)
+    DERIVED_IMAGE_CACHE.configure(config.get('MULTIMEDIA_PREVIEW_CACHE_MAX_ENTRIES', 256), ttl_seconds)
+    ANALYTICS_PREVIEW_CACHE.configure(config.get('MULTIMEDIA_PREVIEW_CACHE_MAX_ENTRIES', 256), ttl_seconds)
+
+
+def content_hash(image_bytes: bytes) -> str:
+    return hashlib.sha256(image_bytes).hexdigest()
+
+
+def perceptual_hash(image_bytes: bytes) -> int | None:
+    """
+    64-bit difference hash (dHash). Re-encodes, resizes and small edits of the
+    same picture land within a few bits of each other.
+    """
+    nparr = np.frombuffer(image_bytes, np.uint8)
+    # Reduced decode: we only need a 9x8 grayscale thumbnail.
+    gray = cv2.imdecode(nparr, cv2.IMREAD_REDUCED_GRAYSCALE_8)
+    if gray is None:
+        return None
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int(np.packbits(bits).view('>u8')[0])
+
+
+def find_near_duplicate(cache: TTLCache, phash: int | None, max_distance: int, scope=None):
+    """
+    Scans `cache` for an entry whose 'phash' is within max_distance bits.
+    scope limits the scan to keys whose first element matches (e.g. the model name).
+    Returns the cached value or None, and counts a hit on success.
+    """
+    if phash is None or max_distance is None or max_distance < 0:
+        return None
+    best = None
+    for key, value, cost_seconds in cache.items():
+        if scope is not None and key[0] != scope:
+            continue
+        other = value.get('phash')
+        if other is None:
+            continue
+        distance = (phash ^ other).bit_count()
+        if distance <= max_distance and (best is None or distance < best[0]):
+            best = (distance, value, cost_seconds)
+    if best is None:
+        return None
+    cache.record_hit(best[2])
+    return best[1]
@@ -0,0 +1,66 @@
+# features/multimedia/image_utils.py
+# Image normalization shared by the blur and analytics routes. Kept free of
+# Flask imports so it can also run inside the image worker processes.
+import io
+import logging
+from PIL import Image, ImageOps, ExifTags
+from pillow_heif import register_heif_opener
+
+# Register HEIC/HEIF support for PIL
+register_heif_opener()
+
+TARGET_RESOLUTION = (1920, 1920)
+
+def request_reduced_decode(img: Image.Image, target_resolution: tuple[int, int]) -> None:
+    """
+    Asks the decoder for the smallest reduced-size decode that still covers the
+    final thumbnail, before anything forces a full-resolution load.
+
+    JPEG: libjpeg DCT scaling by 1/2, 1/4 or 1/8. HEIC: pillow_heif swaps in an
+    embedded thumbnail if one is at least that large. Other formats ignore it.
+    Must run before exif_transpose(), which loads the image.
+    """
+    target_width, target_height = target_resolution
+    # The target applies after rotation; a 90-degree EXIF orientation swaps the axes.
+    if img.getexif().get(ExifTags.Base.Orientation, 1) in (5, 6, 7, 8):
+        target_width, target_height = target_height, target_width
+    scale = min(target_width / img.width, target_height / img.height)
+    if scale >= 1:
+        return
+    img.draft(img.mode, (max(1, int(img.width * scale)), max(1, int(img.height * scale))))
+
+def normalize_and_resize_image(image_bytes: bytes, target_resolution: tuple[int, int] = TARGET_RESOLUTION) -> bytes:
+    try:
+        logging.info(f"Normalizing image for optimal processing...")
+        img = Image.open(io.BytesIO(image_bytes))
+        request_reduced_decode(img, target_resolution)
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail(target_resolution, Image.Resampling.LANCZOS)
+        output_buffer = io.BytesIO()
+        # Handle HEIC/HEIF format by converting to JPEG
+        img_format = img.format if img.format in ['JPEG', 'PNG', 'WEBP'] else 'JPEG'
+        if img.mode not in ['RGB', 'L']:
+            img = img.convert('RGB')
+        img.save(output_buffer, format=img_format, quality=85)
+        resized_bytes = output_buffer.getvalue()
+        logging.info(f"Image normalized from {len(image_bytes) / 1024 / 1024:.2f}MB to {len(resized_bytes) / 1024 / 1024:.2f}MB (format: {img_format}).")
+        return resized_bytes
+    except Exception as e:
+        logging.error(f"Failed to normalize image: {e}", exc_info=True)
+        raise ValueError(f"Cannot process this image format. Please convert to JPG, PNG, or WEBP and try again.")
+
+def resize_to_width(image_bytes: bytes, width: int, quality: int = 80) -> bytes:
+    """
+    Downscales an already-normalized image to at most `width` pixels wide,
+    keeping its format. Used for the preview sizes of the serve route.
+    """
+    img = Image.open(io.BytesIO(image_bytes))
+    img_format = img.format if img.format in ['JPEG', 'PNG', 'WEBP'] else 'JPEG'
+    bounds = (width, max(1, img.height * width // max(1, img.width)))
+    request_reduced_decode(img, bounds)
+    img.thumbnail(bounds, Image.Resampling.LANCZOS)
+    if img_format == 'JPEG' and img.mode not in ['RGB', 'L']:
+        img = img.convert('RGB')
+    output_buffer = io.BytesIO()
+    img.save(output_buffer, format=img_format, quality=quality)
+    return output_buffer.getvalue()
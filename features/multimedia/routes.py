@@ -5,20 +5,28 @@ import uuid
 import time
 import logging
 import json
-import base64
+import hashlib
+import tempfile
 from flask import (
-    Blueprint, render_template, request, flash, current_app, url_for, g, jsonify, send_file, after_this_request, session
+    Blueprint, render_template, request, current_app, url_for, g, jsonify, send_file, session,
+    Response, stream_with_context
 )
 from werkzeug.utils import secure_filename
 import google.generativeai as genai
-from PIL import Image, ImageOps
-from pillow_heif import register_heif_opener
 
-# Register HEIC/HEIF support for PIL
-register_heif_opener()
-
-from .blur_utils import allowed_file, blur_image_opencv
-from .analytics_utils import analyze_image_with_gemini, extract_dominant_colors
+from .blur_utils import allowed_file, resolve_output_format, OUTPUT_FORMATS
+from .image_utils import TARGET_RESOLUTION, resize_to_width
+from .video_utils import allowed_video_file, blur_video, VIDEO_OUTPUT_FORMATS
+from .batch_utils import collect_batch_sources, close_spools, blur_batch_image, iter_batch_results, batch_output_name, stream_zip
+from . import workers
+from .analytics_utils import (
+    analyze_image_with_gemini, analyze_image_concurrently, analyze_images_in_batches, new_usage, estimate_cost_usd,
+    AnalysisCancelled
+)
+from .cache_utils import (
+    BLUR_RERENDER_CACHE, FACE_DETECTION_CACHE, IMAGE_ANALYSIS_CACHE, DERIVED_IMAGE_CACHE, ANALYTICS_PREVIEW_CACHE,
+    configure_caches, content_hash, perceptual_hash, find_near_duplicate
+)
 
 # Shared rate limiter
 from extensions import limiter
@@ -26,37 +34,78 @@ from extensions import limiter
 # Define the Blueprint
 bp = Blueprint('multimedia', __name__)
 
+@bp.record_once
+def _configure_multimedia_caches(state):
+    configure_caches(state.app.config)
+    workers.configure(
+        state.app.config.get('MULTIMEDIA_WORKER_PROCESSES', 0),
+        threads_per_worker=state.app.config.get('MULTIMEDIA_WORKER_THREADS', 1),
+        max_pending=state.app.config.get('MULTIMEDIA_WORKER_MAX_PENDING'),
+        job_timeout=state.app.config.get('MULTIMEDIA_WORKER_JOB_TIMEOUT_SECONDS', 120),
+    )
+
 MULTIMEDIA_BLUR_UPLOAD_FOLDER_PREFIX = "multimedia_feature/blurring/uploads/"
 MULTIMEDIA_BLUR_RESULTS_FOLDER_PREFIX = "multimedia_feature/blurring/results/"
-TARGET_RESOLUTION = (1920, 1920)
+MULTIMEDIA_BLUR_BATCH_FOLDER_PREFIX = "multimedia_feature/blurring/batch/"
 
-def normalize_and_resize_image(image_bytes: bytes) -> bytes:
+# blur_strength form value -> (anonymization mode, size). 1-3 are the slider
+# positions; 4 and 5 select the cheap modes whose cost doesn't grow with the kernel.
+BLUR_STRENGTH_MAP = {
+    1: ('blur', 35),
+    2: ('blur', 151),
+    3: ('redact', -1),
+    4: ('pixelate', 10),
+    5: ('fast_blur', 151),
+}
+
+# Upload-form style selector -> BLUR_STRENGTH_MAP key. The slider only spans
+# the blur-strength scale (1-3); these modes aren't stronger or lighter blurs.
+BLUR_STYLE_SELECTIONS = {'fast_blur': 5, 'pixelate': 4}
+
+def _blur_selection_from_form(form) -> int:
+    """BLUR_STRENGTH_MAP key from 'blur_style' if set, else the 'blur_strength' slider (default 2)."""
+    if form.get('blur_style') in BLUR_STYLE_SELECTIONS:
+        return BLUR_STYLE_SELECTIONS[form['blur_style']]
     try:
-        logging.info(f"Normalizing image for optimal processing...")
-        img = Image.open(io.BytesIO(image_bytes))
-        img = ImageOps.exif_transpose(img)
-        img.thumbnail(TARGET_RESOLUTION, Image.Resampling.LANCZOS)
-        output_buffer = io.BytesIO()
-        # Handle HEIC/HEIF format by converting to JPEG
-        img_format = img.format if img.format in ['JPEG', 'PNG', 'WEBP'] else 'JPEG'
-        if img.mode not in ['RGB', 'L']:
-            img = img.convert('RGB')
-        img.save(output_buffer, format=img_format, quality=85)
-        resized_bytes = output_buffer.getvalue()
-        logging.info(f"Image normalized from {len(image_bytes) / 1024 / 1024:.2f}MB to {len(resized_bytes) / 1024 / 1024:.2f}MB (format: {img_format}).")
-        return resized_bytes
-    except Exception as e:
-        logging.error(f"Failed to normalize image: {e}", exc_info=True)
-        raise ValueError(f"Cannot process this image format. Please convert to JPG, PNG, or WEBP and try again.")
+        blur_selection = int(form.get('blur_strength', '2'))
+    except ValueError:
+        return 2
+    return blur_selection if blur_selection in BLUR_STRENGTH_MAP else 2
 
-@bp.route('/process/multimedia/blur/process_image', methods=['POST'])
-@limiter.limit("15 per hour; 3 per minute")
-def process_multimedia_blur_image_route():
-    g.request_id = uuid.uuid4().hex
-    req_start_time = time.time()
-    log_extra = {'extra_data': {'request_id': g.request_id, 'feature': 'multimedia-blur'}}
-    
-    # 1. Clean up OLD files from the PREVIOUS request before starting a new one.
+def _blur_variant_filename(file_root: str, blur_selection: int, output_format: str) -> str:
+    return f"{file_root}-blurred-{blur_selection}{OUTPUT_FORMATS[output_format]['extension']}"
+
+def _render_blur_variant(r_id: str, entry: dict, blur_selection: int, log_extra: dict) -> tuple[str, float]:
+    """
+    Renders one strength/mode of a cached blur request and stores it next to the
+    other variants. Variants already stored for this session are reused as-is.
+    Returns (blurred filename, processing seconds).
+    """
+    blur_mode, blur_size = BLUR_STRENGTH_MAP.get(blur_selection, BLUR_STRENGTH_MAP[2])
+    blurred_filename_gcs = _blur_variant_filename(entry['file_root'], blur_selection, entry['output_format'])
+    gcs_blurred_output_path = f"{MULTIMEDIA_BLUR_RESULTS_FOLDER_PREFIX}{r_id}/{blurred_filename_gcs}"
+
+    temp_files = session.get('multimedia_temp_files', [])
+    if gcs_blurred_output_path in temp_files:
+        return blurred_filename_gcs, 0.0
+
+    processing_start_time = time.time()
+    blurred_image_bytes = workers.render_faces(
+        entry['image_bytes'], entry['faces'], blur_size, blur_mode,
+        output_format=entry['output_format'],
+        quality=current_app.config.get('BLUR_OUTPUT_QUALITY', 90),
+        png_compression=current_app.config.get('BLUR_PNG_COMPRESSION', 1),
+    )
+    processing_duration = time.time() - processing_start_time
+
+    blurred_blob = current_app.gcs_bucket.blob(gcs_blurred_output_path)
+    blurred_blob.upload_from_string(blurred_image_bytes, content_type=OUTPUT_FORMATS[entry['output_format']]['mimetype'])
+    session['multimedia_temp_files'] = temp_files + [gcs_blurred_output_path]
+    logging.info(f"[{r_id}] Blurred image '{blurred_filename_gcs}' ({blur_mode}) uploaded to {gcs_blurred_output_path}", extra=log_extra)
+    return blurred_filename_gcs, processing_duration
+
+def _cleanup_session_temp_files(log_extra: dict):
+    """Deletes the blobs left by this session's previous single-image or video request."""
     if 'multimedia_temp_files' in session and current_app.gcs_bucket:
         old_paths_to_clean = session.pop('multimedia_temp_files', [])
         if old_paths_to_clean:
@@ -68,6 +117,19 @@ def process_multimedia_blur_image_route():
                 logging.info(f"[{g.request_id}] Cleaned up old temporary files from session: {old_paths_to_clean}", extra=log_extra)
             except Exception as e_clean:
                 logging.error(f"[{g.request_id}] GCS cleanup error for old session files: {e_clean}", exc_info=True, extra=log_extra)
+
+@bp.route('/process/multimedia/blur/process_image', methods=['POST'])
+@limiter.limit("15 per hour; 3 per minute")
+def process_multimedia_blur_image_route():
+    g.request_id = uuid.uuid4().hex
+    req_start_time = time.time()
+    log_extra = {'extra_data': {'request_id': g.request_id, 'feature': 'multimedia-blur'}}
+    
+    # 1. Clean up OLD files from the PREVIOUS request before starting a new one.
+    old_request_id = session.pop('multimedia_blur_request_id', None)
+    if old_request_id:
+        BLUR_RERENDER_CACHE.pop(old_request_id)
+    _cleanup_session_temp_files(log_extra)
     
     if not current_app.config.get('GCS_AVAILABLE'):
         return render_template("multimedia/templates/_blurring_results_partial.html", error_message="Cloud Storage service is unavailable. Cannot process image.")
@@ -80,54 +142,195 @@ def process_multimedia_blur_image_route():
         return render_template("multimedia/templates/_blurring_results_partial.html", error_message="No valid file selected. Please upload a JPG, PNG, or WEBP image.")
     
     try:
+        # Tiled detection keeps far more pixels so small faces survive, and the
+        # blur is then applied at that resolution too.
+        tiled_detection = current_app.config.get('BLUR_TILED_DETECTION', False)
+        target_resolution = TARGET_RESOLUTION
+        if tiled_detection:
+            max_side = current_app.config.get('BLUR_TILED_MAX_RESOLUTION', 6000)
+            target_resolution = (max_side, max_side)
+
         image_bytes_original = file.read()
-        resized_image_bytes = normalize_and_resize_image(image_bytes_original)
+        resized_image_bytes = workers.normalize_image(image_bytes_original, target_resolution)
+
+        blur_selection = _blur_selection_from_form(request.form)
 
-        blur_selection = int(request.form.get('blur_strength', '2'))
-        blur_strength_map = {1: 35, 2: 151, 3: -1} 
-        blur_size = blur_strength_map.get(blur_selection, 151)
+        output_format = resolve_output_format(resized_image_bytes, current_app.config.get('BLUR_OUTPUT_FORMAT', 'auto'))
 
         original_filename = secure_filename(file.filename)
         file_root, _ = os.path.splitext(original_filename)
-        blurred_filename_gcs = f"{file_root}-blurred.png"
         
         gcs_original_upload_path = f"{MULTIMEDIA_BLUR_UPLOAD_FOLDER_PREFIX}{g.request_id}/{original_filename}"
-        gcs_blurred_output_path = f"{MULTIMEDIA_BLUR_RESULTS_FOLDER_PREFIX}{g.request_id}/{blurred_filename_gcs}"
         
         # 2. Store the NEW paths for this request in the session.
-        session['multimedia_temp_files'] = [gcs_original_upload_path, gcs_blurred_output_path]
+        session['multimedia_temp_files'] = [gcs_original_upload_path]
+        session['multimedia_blur_request_id'] = g.request_id
 
         original_blob = current_app.gcs_bucket.blob(gcs_original_upload_path)
         original_blob.upload_from_string(resized_image_bytes, content_type=file.content_type)
         logging.info(f"[{g.request_id}] Original image '{original_filename}' uploaded to {gcs_original_upload_path}", extra=log_extra)
 
-        processing_start_time = time.time()
-        blurred_image_bytes = blur_image_opencv(resized_image_bytes, blur_size)
-        processing_duration = time.time() - processing_start_time
+        # Identical normalized bytes always yield identical boxes, so repeat
+        # uploads of the same photo skip MTCNN entirely.
+        detection_start_time = time.time()
+        image_key = f"{content_hash(resized_image_bytes)}:{'tiled' if tiled_detection else 'full'}"
+        faces = FACE_DETECTION_CACHE.get(image_key)
+        if faces is None:
+            faces = workers.detect_faces_in_bytes(
+                resized_image_bytes,
+                tiled=tiled_detection,
+                tile_size=current_app.config.get('BLUR_TILE_SIZE', 1024),
+                overlap=current_app.config.get('BLUR_TILE_OVERLAP', 192),
+                tile_workers=current_app.config.get('BLUR_TILE_WORKERS', 2),
+            )
+            FACE_DETECTION_CACHE.set(image_key, faces, cost_seconds=time.time() - detection_start_time)
+        else:
+            logging.info(f"[{g.request_id}] Face detection cache hit for {image_key[:12]}.", extra=log_extra)
+        detection_duration = time.time() - detection_start_time
 
-        if blurred_image_bytes is None:
-            return render_template("multimedia/templates/_blurring_results_partial.html", error_message="Image processing failed during blurring.")
+        # 3. Keep the normalized image and its boxes so other strengths can be
+        # rendered later without re-uploading or re-detecting.
+        entry = {
+            'image_bytes': resized_image_bytes,
+            'faces': faces,
+            'file_root': file_root,
+            'original_filename': original_filename,
+            'output_format': output_format,
+        }
+        BLUR_RERENDER_CACHE.set(g.request_id, entry)
 
-        blurred_blob = current_app.gcs_bucket.blob(gcs_blurred_output_path)
-        blurred_blob.upload_from_string(blurred_image_bytes, content_type='image/png')
-        logging.info(f"[{g.request_id}] Blurred image '{blurred_filename_gcs}' uploaded to {gcs_blurred_output_path}", extra=log_extra)
+        blurred_filename_gcs, render_duration = _render_blur_variant(g.request_id, entry, blur_selection, log_extra)
+        processing_duration = detection_duration + render_duration
 
         original_image_url = url_for('multimedia.serve_multimedia_blur_image', type='original', r_id=g.request_id, filename=original_filename)
         blurred_image_url = url_for('multimedia.serve_multimedia_blur_image', type='blurred', r_id=g.request_id, filename=blurred_filename_gcs)
         
         total_duration = time.time() - req_start_time
-        logging.info(f"[{g.request_id}] Blurring complete for '{original_filename}'. Processing: {processing_duration:.2f}s, Total: {total_duration:.2f}s", extra=log_extra)
+        logging.info(f"[{g.request_id}] Blurring complete for '{original_filename}' ({len(faces)} faces). Processing: {processing_duration:.2f}s, Total: {total_duration:.2f}s", extra=log_extra)
         
         return render_template("multimedia/templates/_blurring_results_partial.html",
                                original_image_url=original_image_url,
                                blurred_image_url=blurred_image_url,
                                processing_time=processing_duration,
+                               r_id=g.request_id,
+                               blur_selection=blur_selection,
                                message="Image processed successfully.")
 
+    except workers.WorkerPoolBusy as e:
+        logging.warning(f"[{g.request_id}] Image worker pool saturated; rejecting blur request.", extra=log_extra)
+        return render_template("multimedia/templates/_blurring_results_partial.html", error_message=str(e))
     except Exception as e:
         logging.error(f"[{g.request_id}] Error during blurring process for {file.filename}: {e}", exc_info=True, extra=log_extra)
         return render_template("multimedia/templates/_blurring_results_partial.html", error_message=f'An unexpected error occurred: {str(e)}')
 
+@bp.route('/process/multimedia/blur/rerender/<r_id>', methods=['POST'])
+@limiter.limit("120 per hour; 20 per minute")
+def rerender_multimedia_blur_image_route(r_id):
+    """Re-applies a different strength/mode to the cached detections of a previous upload."""
+    log_extra = {'extra_data': {'request_id': r_id, 'feature': 'multimedia-blur-rerender'}}
+
+    if session.get('multimedia_blur_request_id') != r_id:
+        logging.warning(f"Unauthorized re-render attempt for request {r_id}", extra=log_extra)
+        return render_template("multimedia/templates/_blurring_results_partial.html", error_message="This result has expired. Please upload the image again.")
+
+    entry = BLUR_RERENDER_CACHE.get(r_id)
+    if entry is None or not current_app.config.get('GCS_AVAILABLE'):
+        return render_template("multimedia/templates/_blurring_results_partial.html", error_message="This result has expired. Please upload the image again.")
+
+    try:
+        blur_selection = _blur_selection_from_form(request.form)
+
+        blurred_filename_gcs, processing_duration = _render_blur_variant(r_id, entry, blur_selection, log_extra)
+
+        return render_template("multimedia/templates/_blurring_results_partial.html",
+                               original_image_url=url_for('multimedia.serve_multimedia_blur_image', type='original', r_id=r_id, filename=entry['original_filename']),
+                               blurred_image_url=url_for('multimedia.serve_multimedia_blur_image', type='blurred', r_id=r_id, filename=blurred_filename_gcs),
+                               processing_time=processing_duration,
+                               r_id=r_id,
+                               blur_selection=blur_selection,
+                               message="Image re-rendered from cached detections.")
+
+    except Exception as e:
+        logging.error(f"[{r_id}] Error during blur re-render: {e}", exc_info=True, extra=log_extra)
+        return render_template("multimedia/templates/_blurring_results_partial.html", error_message=f'An unexpected error occurred: {str(e)}')
+
+@bp.route('/process/multimedia/blur/video', methods=['POST'])
+@limiter.limit("5 per hour; 1 per minute")
+def process_multimedia_blur_video_route():
+    """
+    Anonymizes faces in a short video clip. Detection runs every
+    BLUR_VIDEO_DETECT_EVERY frames with optical-flow tracking in between;
+    the clip is streamed through temp files rather than held in memory.
+    """
+    g.request_id = uuid.uuid4().hex
+    log_extra = {'extra_data': {'request_id': g.request_id, 'feature': 'multimedia-blur-video'}}
+    template = "multimedia/templates/_video_blurring_results_partial.html"
+
+    old_request_id = session.pop('multimedia_blur_request_id', None)
+    if old_request_id:
+        BLUR_RERENDER_CACHE.pop(old_request_id)
+    _cleanup_session_temp_files(log_extra)
+
+    if not current_app.config.get('GCS_AVAILABLE'):
+        return render_template(template, error_message="Cloud Storage service is unavailable. Cannot process video.")
+
+    file = request.files.get('file')
+    if not file or file.filename == '' or not allowed_video_file(file.filename):
+        return render_template(template, error_message="No valid video selected. Please upload an MP4, MOV, AVI, MKV or WEBM file.")
+
+    blur_selection = _blur_selection_from_form(request.form)
+    blur_mode, blur_size = BLUR_STRENGTH_MAP[blur_selection]
+    output_format = current_app.config.get('BLUR_VIDEO_OUTPUT_FORMAT', 'webm')
+    if output_format not in VIDEO_OUTPUT_FORMATS:
+        output_format = 'webm'
+
+    original_filename = secure_filename(file.filename)
+    file_root, input_extension = os.path.splitext(original_filename)
+    blurred_filename = f"{file_root}-blurred{VIDEO_OUTPUT_FORMATS[output_format]['extension']}"
+    gcs_blurred_output_path = f"{MULTIMEDIA_BLUR_RESULTS_FOLDER_PREFIX}{g.request_id}/{blurred_filename}"
+
+    input_path = output_path = None
+    try:
+        # VideoCapture needs a real path, so the upload is spooled to disk.
+        with tempfile.NamedTemporaryFile(suffix=input_extension, delete=False) as input_file:
+            file.save(input_file)
+            input_path = input_file.name
+        with tempfile.NamedTemporaryFile(suffix=VIDEO_OUTPUT_FORMATS[output_format]['extension'], delete=False) as output_file:
+            output_path = output_file.name
+
+        stats = blur_video(
+            input_path, output_path, blur_size, blur_mode,
+            detect_every=current_app.config.get('BLUR_VIDEO_DETECT_EVERY', 5),
+            detect_max_dimension=current_app.config.get('BLUR_VIDEO_DETECT_MAX_DIMENSION', 960),
+            output_format=output_format,
+            max_seconds=current_app.config.get('BLUR_VIDEO_MAX_SECONDS', 120),
+        )
+        if not stats['frames']:
+            return render_template(template, error_message="No frames could be decoded from this video.")
+
+        with open(output_path, 'rb') as blurred_video:
+            current_app.gcs_bucket.blob(gcs_blurred_output_path).upload_from_file(
+                blurred_video, content_type=VIDEO_OUTPUT_FORMATS[output_format]['mimetype'])
+        session['multimedia_temp_files'] = [gcs_blurred_output_path]
+        logging.info(f"[{g.request_id}] Blurred video '{original_filename}': {stats['frames']} frames, {stats['detections']} detections, "
+                     f"{stats['fps']:.1f} fps ({stats['seconds']:.2f}s).", extra=log_extra)
+
+        return render_template(template,
+                               blurred_video_url=url_for('multimedia.serve_multimedia_blur_image', type='blurred', r_id=g.request_id, filename=blurred_filename),
+                               blurred_video_mimetype=VIDEO_OUTPUT_FORMATS[output_format]['mimetype'],
+                               stats=stats,
+                               message="Video processed successfully.")
+
+    except ValueError as ve:
+        return render_template(template, error_message=str(ve))
+    except Exception as e:
+        logging.error(f"[{g.request_id}] Error during video blurring for {file.filename}: {e}", exc_info=True, extra=log_extra)
+        return render_template(template, error_message=f'An unexpected error occurred: {str(e)}')
+    finally:
+        for path in (input_path, output_path):
+            if path and os.path.exists(path):
+                os.remove(path)
+
 @bp.route('/process/multimedia/analytics/analyze_image', methods=['POST'])
 @limiter.limit("5 per hour; 1 per minute")
 def process_multimedia_analyze_image_route():
@@ -145,28 +348,202 @@ def process_multimedia_analyze_image_route():
                                analysis_results={"error": "No valid file selected. Please upload a JPG, PNG, or WEBP image."})
     try:
         image_bytes_original = file.read()
-        image_bytes = normalize_and_resize_image(image_bytes_original)
-        file_mimetype = file.mimetype
-        base64_encoded_data = base64.b64encode(image_bytes).decode('utf-8')
-        image_data_url = f"data:{file_mimetype};base64,{base64_encoded_data}"
+        image_bytes = workers.normalize_image(image_bytes_original, TARGET_RESOLUTION)
         model_name = current_app.config.get('GEMINI_MODEL_NAME', 'gemini-1.5-flash-latest')
-        gemini_model = genai.GenerativeModel(model_name)
-        analysis_results = analyze_image_with_gemini(image_bytes, gemini_model)
-        dominant_colors = extract_dominant_colors(image_bytes)
+        deadline_seconds = current_app.config.get('ANALYTICS_DEADLINE_SECONDS', 60)
+
+        # Exact content hash first, then (optionally) a perceptual-hash match so
+        # re-encoded or resized copies of the same picture also skip Gemini.
+        analysis_max_dimension = current_app.config.get('ANALYTICS_MAX_DIMENSION', 768)
+        analysis_jpeg_quality = current_app.config.get('ANALYTICS_JPEG_QUALITY', 85)
+        cache_key = (model_name, content_hash(image_bytes), analysis_max_dimension)
+        phash_max_distance = current_app.config.get('ANALYTICS_PHASH_MAX_DISTANCE')
+        image_phash = perceptual_hash(image_bytes) if phash_max_distance is not None else None
+        cached = IMAGE_ANALYSIS_CACHE.get(cache_key) or find_near_duplicate(IMAGE_ANALYSIS_CACHE, image_phash, phash_max_distance, scope=model_name)
+
+        if cached is not None:
+            logging.info(f"[{g.request_id}] Image analysis cache hit.", extra=log_extra)
+            analyze_fn = lambda _image_bytes: cached['analysis']
+        else:
+            gemini_model = genai.GenerativeModel(model_name)
+
+            def analyze_fn(image_bytes_for_model):
+                # Runs on the Gemini executor: no app/request context here.
+                analysis_start_time = time.time()
+                result = analyze_image_with_gemini(image_bytes_for_model, gemini_model, timeout=deadline_seconds,
+                                                   max_dimension=analysis_max_dimension, jpeg_quality=analysis_jpeg_quality)
+                if result and not result.get('error'):
+                    IMAGE_ANALYSIS_CACHE.set(cache_key, {'analysis': result, 'phash': image_phash},
+                                             cost_seconds=time.time() - analysis_start_time)
+                return result
+
+        # Waitress exposes this when channel_request_lookahead is enabled (see run.py).
+        is_disconnected = request.environ.get('waitress.client_disconnected')
+        try:
+            preview_width = current_app.config.get('ANALYTICS_PREVIEW_WIDTH', 960)
+            analysis_results, dominant_colors, preview_bytes = analyze_image_concurrently(
+                image_bytes, analyze_fn,
+                deadline_seconds=deadline_seconds,
+                is_disconnected=is_disconnected,
+                preview_fn=lambda image_bytes_for_preview: workers.analytics_preview(image_bytes_for_preview, preview_width),
+            )
+        except TimeoutError:
+            logging.warning(f"[{g.request_id}] Image analysis exceeded the {deadline_seconds}s deadline.", extra=log_extra)
+            return render_template("multimedia/templates/_analytics_results_partial.html",
+                               analysis_results={"error": "Image analysis took too long. Please try again."})
+        except AnalysisCancelled:
+            logging.info(f"[{g.request_id}] Client disconnected; abandoned image analysis.", extra=log_extra)
+            return "", 499
+
         if analysis_results is None:
              return render_template("multimedia/templates/_analytics_results_partial.html",
                                analysis_results={"error": "Image analysis failed."})
+
+        # The preview is served by URL rather than inlined as a data URL, so the
+        # partial stays small and the browser can fetch and cache it separately.
+        old_preview_id = session.get('multimedia_analytics_preview_id')
+        if old_preview_id:
+            ANALYTICS_PREVIEW_CACHE.pop(old_preview_id)
+        ANALYTICS_PREVIEW_CACHE.set(g.request_id, preview_bytes)
+        session['multimedia_analytics_preview_id'] = g.request_id
         return render_template("multimedia/templates/_analytics_results_partial.html",
                                analysis_results=analysis_results,
                                dominant_colors=dominant_colors,
-                               image_data_url=image_data_url)
+                               preview_url=url_for('multimedia.serve_multimedia_analytics_preview', preview_id=g.request_id))
     except Exception as e:
         logging.error(f"[{g.request_id}] Error during analytics process for {file.filename}: {e}", exc_info=True, extra=log_extra)
         return render_template("multimedia/templates/_analytics_results_partial.html", 
                                analysis_results={"error": f'An unexpected error occurred: {str(e)}'})
 
+def _analytics_batch_image_count() -> int:
+    # Rate-limit cost of a batch request: one unit per image sent, not per request.
+    files = [f for f in request.files.getlist('files') if f.filename]
+    return max(1, min(len(files), current_app.config.get('ANALYTICS_BATCH_MAX_IMAGES', 24)))
+
+@bp.route('/process/multimedia/analytics/analyze_batch', methods=['POST'])
+@limiter.limit(lambda: current_app.config.get('ANALYTICS_BATCH_RATE_LIMIT', "24 per hour"), cost=_analytics_batch_image_count)
+def process_multimedia_analyze_batch_route():
+    """
+    Analyzes several images ('files') with as few Gemini calls as possible:
+    up to ANALYTICS_BATCH_SIZE images per call. Cached and duplicate images
+    are not sent again. Reports latency and estimated cost per image.
+    """
+    g.request_id = uuid.uuid4().hex
+    log_extra = {'extra_data': {'request_id': g.request_id, 'feature': 'multimedia-analytics-batch'}}
+    template = "multimedia/templates/_analytics_batch_results_partial.html"
+    if not current_app.config.get('GEMINI_CONFIGURED'):
+        return render_template(template, error_message="AI service is not configured. Cannot analyze images.")
+    files = [f for f in request.files.getlist('files') if f.filename]
+    if not files:
+        return render_template(template, error_message="No files selected.")
+    max_images = current_app.config.get('ANALYTICS_BATCH_MAX_IMAGES', 24)
+    if len(files) > max_images:
+        return render_template(template, error_message=f"Too many images: at most {max_images} per batch.")
+    invalid = [f.filename for f in files if not allowed_file(f.filename)]
+    if invalid:
+        return render_template(template, error_message=f"Unsupported file type: {', '.join(invalid)}. Please upload JPG, PNG, or WEBP images.")
+
+    try:
+        start_time = time.time()
+        model_name = current_app.config.get('GEMINI_MODEL_NAME', 'gemini-1.5-flash-latest')
+        deadline_seconds = current_app.config.get('ANALYTICS_DEADLINE_SECONDS', 60)
+        analysis_max_dimension = current_app.config.get('ANALYTICS_MAX_DIMENSION', 768)
+        analysis_jpeg_quality = current_app.config.get('ANALYTICS_JPEG_QUALITY', 85)
+
+        # One entry per upload; uploads with identical content share a cache key
+        # and are sent to Gemini once.
+        items, pending = [], {}
+        for file in files:
+            try:
+                image_bytes = workers.normalize_image(file.read(), TARGET_RESOLUTION)
+            except workers.WorkerPoolBusy:
+                raise
+            except Exception as e_img:
+                logging.warning(f"[{g.request_id}] Could not read '{file.filename}': {e_img}", extra=log_extra)
+                items.append({'filename': file.filename, 'cache_key': None, 'cached': False,
+                              'analysis': {"error": "Could not read this image."}})
+                continue
+            cache_key = (model_name, content_hash(image_bytes), analysis_max_dimension)
+            cached = IMAGE_ANALYSIS_CACHE.get(cache_key)
+            items.append({'filename': file.filename, 'cache_key': cache_key,
+                          'analysis': cached['analysis'] if cached else None, 'cached': cached is not None})
+            if cached is None:
+                pending.setdefault(cache_key, image_bytes)
+
+        usage = new_usage()
+        if pending:
+            batch_size = current_app.config.get('ANALYTICS_BATCH_SIZE', 8)
+            analysis_start_time = time.time()
+            try:
+                results, usage = analyze_images_in_batches(
+                    list(pending.values()), genai.GenerativeModel(model_name),
+                    batch_size=batch_size,
+                    deadline_seconds=deadline_seconds,
+                    is_disconnected=request.environ.get('waitress.client_disconnected'),
+                    max_dimension=analysis_max_dimension,
+                    jpeg_quality=analysis_jpeg_quality,
+                )
+            except TimeoutError:
+                logging.warning(f"[{g.request_id}] Batch analysis exceeded the {deadline_seconds}s deadline.", extra=log_extra)
+                return render_template(template, error_message="Image analysis took too long. Please try again with fewer images.")
+            except AnalysisCancelled:
+                logging.info(f"[{g.request_id}] Client disconnected; abandoned batch analysis.", extra=log_extra)
+                return "", 499
+            seconds_per_analysis = (time.time() - analysis_start_time) / len(pending)
+            analyses = dict(zip(pending, results))
+            for cache_key, result in analyses.items():
+                if result and not result.get('error'):
+                    IMAGE_ANALYSIS_CACHE.set(cache_key, {'analysis': result, 'phash': None}, cost_seconds=seconds_per_analysis)
+            for item in items:
+                if item['analysis'] is None:
+                    item['analysis'] = analyses.get(item['cache_key']) or {"error": "Image analysis failed."}
+
+        total_seconds = time.time() - start_time
+        stats = {
+            'images': len(items),
+            'analyzed': len(pending),
+            'cached': sum(1 for item in items if item['cached']),
+            'calls': usage['calls'],
+            'fallbacks': usage['fallbacks'],
+            'seconds': total_seconds,
+            'seconds_per_image': total_seconds / len(items),
+            'prompt_tokens': usage['prompt_tokens'],
+            'output_tokens': usage['output_tokens'],
+            'cost_usd': estimate_cost_usd(usage, current_app.config.get('GEMINI_INPUT_USD_PER_MTOK', 0.075),
+                                          current_app.config.get('GEMINI_OUTPUT_USD_PER_MTOK', 0.30)),
+        }
+        stats['cost_usd_per_image'] = stats['cost_usd'] / len(items)
+        logging.info(f"[{g.request_id}] Batch analysis of {stats['images']} images ({stats['analyzed']} sent) took "
+                     f"{stats['calls']} Gemini calls, {total_seconds:.2f}s, {stats['prompt_tokens']}+{stats['output_tokens']} tokens "
+                     f"(~${stats['cost_usd']:.5f}).", extra=log_extra)
+        return render_template(template, items=items, stats=stats)
+    except workers.WorkerPoolBusy as e:
+        logging.warning(f"[{g.request_id}] Image worker pool saturated; rejecting batch analysis.", extra=log_extra)
+        return render_template(template, error_message=str(e))
+    except Exception as e:
+        logging.error(f"[{g.request_id}] Error during batch analytics: {e}", exc_info=True, extra=log_extra)
+        return render_template(template, error_message=f'An unexpected error occurred: {str(e)}')
+
+def _media_mimetype(filename: str) -> str:
+    lowered_filename = filename.lower()
+    if lowered_filename.endswith(('.jpg', '.jpeg')):
+        return 'image/jpeg'
+    if lowered_filename.endswith('.webp'):
+        return 'image/webp'
+    if lowered_filename.endswith('.webm'):
+        return 'video/webm'
+    if lowered_filename.endswith('.mp4'):
+        return 'video/mp4'
+    return 'image/png'
+
 @bp.route('/serve/multimedia/blur_image/<type>/<r_id>/<path:filename>')
 def serve_multimedia_blur_image(type, r_id, filename):
+    """
+    Serves a stored original/result, or a downscaled preview with ?w=<width>
+    (MULTIMEDIA_PREVIEW_WIDTHS only). Nothing is ever rewritten under a given
+    path - each upload gets a new request id - so the path alone makes a
+    strong ETag and repeat views are answered with 304 before touching storage.
+    """
     log_extra = {'extra_data': {'request_id': r_id, 'feature': 'multimedia_serve', 'type': type, 'filename': filename}}
     if not current_app.config.get('GCS_AVAILABLE'):
         return "Cloud Storage not available", 503
@@ -182,25 +559,187 @@ def serve_multimedia_blur_image(type, r_id, filename):
         logging.warning(f"Unauthorized access attempt for GCS path: {gcs_path}", extra=log_extra)
         return "Access denied or file has expired.", 403
 
+    mimetype = _media_mimetype(filename)
+    width = request.args.get('w', type=int)
+    if width is not None and (width not in current_app.config.get('MULTIMEDIA_PREVIEW_WIDTHS', (480, 960)) or not mimetype.startswith('image/')):
+        return "Unsupported preview size", 400
+
+    etag = hashlib.sha1(f"{gcs_path}:{width or 'full'}".encode()).hexdigest()
+    if request.if_none_match.contains(etag):
+        return _private_cacheable(current_app.response_class(status=304), etag)
+
     try:
-        blob = current_app.gcs_bucket.blob(gcs_path)
-        if not blob.exists():
-            return "Image not found", 404
-        
-        image_data = io.BytesIO(blob.download_as_bytes())
-        image_data.seek(0)
-        mimetype = 'image/png' # Since output is now always PNG
-        if type == 'original':
-            lowered_filename = filename.lower()
-            if lowered_filename.endswith('.jpg') or lowered_filename.endswith('.jpeg'):
-                mimetype = 'image/jpeg'
-            elif lowered_filename.endswith('.webp'):
-                mimetype = 'image/webp'
-
-        return send_file(image_data, mimetype=mimetype)
+        image_bytes = DERIVED_IMAGE_CACHE.get((gcs_path, width)) if width else None
+        if image_bytes is None:
+            blob = current_app.gcs_bucket.blob(gcs_path)
+            if not blob.exists():
+                return "Image not found", 404
+            image_bytes = blob.download_as_bytes()
+            if width:
+                resize_start_time = time.time()
+                image_bytes = resize_to_width(image_bytes, width)
+                DERIVED_IMAGE_CACHE.set((gcs_path, width), image_bytes, cost_seconds=time.time() - resize_start_time)
+
+        # send_file answers Range requests (206), which <video> needs to seek
+        # and which Safari/iOS require before playing at all.
+        return _private_cacheable(send_file(io.BytesIO(image_bytes), mimetype=mimetype, conditional=True, etag=etag), etag)
         
     except Exception:
         return "Image not found (GCS Error)", 404
     except Exception as e:
         logging.error(f"Error serving image {gcs_path} from GCS: {e}", exc_info=True, extra=log_extra)
-        return "Error serving image", 500
\ No newline at end of file
+        return "Error serving image", 500
+
+def _private_cacheable(response, etag: str):
+    # private: access is gated by the session cookie, so shared caches must not keep it.
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = None  # send_file's default; max_age below applies instead
+    response.cache_control.max_age = int(current_app.config.get('PERMANENT_SESSION_LIFETIME').total_seconds())
+    return response
+
+@bp.route('/serve/multimedia/analytics_preview/<preview_id>')
+def serve_multimedia_analytics_preview(preview_id):
+    """Serves the analytics preview of this session's latest analysis."""
+    if session.get('multimedia_analytics_preview_id') != preview_id:
+        logging.warning(f"Unauthorized analytics preview request for {preview_id}", extra={'extra_data': {'request_id': preview_id, 'feature': 'multimedia_serve'}})
+        return "Access denied or preview has expired.", 403
+    etag = hashlib.sha1(f"analytics-preview:{preview_id}".encode()).hexdigest()
+    if request.if_none_match.contains(etag):
+        return _private_cacheable(current_app.response_class(status=304), etag)
+    preview_bytes = ANALYTICS_PREVIEW_CACHE.get(preview_id)
+    if preview_bytes is None:
+        return "Preview has expired.", 404
+    return _private_cacheable(current_app.response_class(preview_bytes, mimetype='image/jpeg'), etag)
+
+def _cleanup_previous_batch(bucket, log_extra: dict):
+    """Deletes the results of this session's previous batch, as listed in its manifest."""
+    old_batch_id = session.pop('multimedia_blur_batch_id', None)
+    if not old_batch_id:
+        return
+    manifest_path = f"{MULTIMEDIA_BLUR_BATCH_FOLDER_PREFIX}{old_batch_id}/manifest.json"
+    try:
+        manifest_blob = bucket.blob(manifest_path)
+        if not manifest_blob.exists():
+            return
+        manifest = json.loads(manifest_blob.download_as_bytes())
+        blobs_to_delete = [bucket.blob(item['path']) for item in manifest.get('files', [])] + [manifest_blob]
+        bucket.delete_blobs(blobs=blobs_to_delete, on_error=lambda blob: logging.error(f"Failed to delete old batch blob {blob.name}.", extra=log_extra))
+        logging.info(f"Cleaned up previous blur batch {old_batch_id} ({len(blobs_to_delete)} blobs).", extra=log_extra)
+    except Exception as e_clean:
+        logging.error(f"Cleanup error for previous blur batch {old_batch_id}: {e_clean}", exc_info=True, extra=log_extra)
+
+@bp.route('/process/multimedia/blur/batch', methods=['POST'])
+@limiter.limit("5 per hour; 1 per minute")
+def process_multimedia_blur_batch_route():
+    """
+    Blurs many images in one request: any mix of image files and zips in the
+    'files' field. Streams one NDJSON line per finished image, then a 'result'
+    line with throughput and a download URL for the zip of blurred images.
+    The upload cap for this endpoint is BLUR_BATCH_MAX_UPLOAD_MB (see app.py).
+    """
+    g.request_id = uuid.uuid4().hex
+    log_extra = {'extra_data': {'request_id': g.request_id, 'feature': 'multimedia-blur-batch'}}
+
+    if not current_app.config.get('GCS_AVAILABLE'):
+        return jsonify({"error": "Cloud Storage service is unavailable. Cannot process images."}), 503
+
+    bucket = current_app.gcs_bucket
+    _cleanup_previous_batch(bucket, log_extra)
+
+    try:
+        sources, spools = collect_batch_sources(
+            request.files.getlist('files'),
+            max_files=current_app.config.get('BLUR_BATCH_MAX_FILES', 500),
+            max_image_bytes=current_app.config.get('MAX_CONTENT_LENGTH') or 25 * 1024 * 1024,
+        )
+    except ValueError as ve:
+        return jsonify({"error": str(ve)}), 400
+
+    blur_selection = _blur_selection_from_form(request.form)
+    blur_mode, blur_size = BLUR_STRENGTH_MAP[blur_selection]
+    # Read everything the worker threads need now; they have no app context.
+    render_options = {
+        'target_resolution': TARGET_RESOLUTION,
+        'blur_size': blur_size,
+        'mode': blur_mode,
+        'output_format': current_app.config.get('BLUR_OUTPUT_FORMAT', 'auto'),
+        'quality': current_app.config.get('BLUR_OUTPUT_QUALITY', 90),
+        'png_compression': current_app.config.get('BLUR_PNG_COMPRESSION', 1),
+    }
+    concurrency = current_app.config.get('BLUR_BATCH_CONCURRENCY', 4)
+    batch_prefix = f"{MULTIMEDIA_BLUR_BATCH_FOLDER_PREFIX}{g.request_id}/"
+    session['multimedia_blur_batch_id'] = g.request_id
+    download_url = url_for('multimedia.download_multimedia_blur_batch', batch_id=g.request_id)
+    request_id = g.request_id
+
+    def process_source(source):
+        # Upload happens here too, so storage I/O overlaps with other images' CPU work.
+        result = blur_batch_image(source['read'](), **render_options)
+        output_name = batch_output_name(source['file_root'], result['output_format'])
+        bucket.blob(f"{batch_prefix}{output_name}").upload_from_string(
+            result['image_bytes'], content_type=OUTPUT_FORMATS[result['output_format']]['mimetype'])
+        return {'output_name': output_name, 'faces': result['faces']}
+
+    def generate():
+        start_time = time.time()
+        completed, failed, manifest = 0, 0, []
+        yield json.dumps({"type": "status", "message": f"Processing {len(sources)} images...", "total": len(sources)}) + "\n"
+        try:
+            for index, source, result, error in iter_batch_results(sources, process_source, concurrency):
+                elapsed = time.time() - start_time
+                if error is not None:
+                    failed += 1
+                    logging.warning(f"[{request_id}] Batch image '{source['name']}' failed: {error}", extra=log_extra)
+                    line = {"type": "progress", "index": index, "filename": source['name'], "ok": False,
+                            "error": str(error) if isinstance(error, ValueError) else "Could not process this image."}
+                else:
+                    completed += 1
+                    manifest.append({'path': f"{batch_prefix}{result['output_name']}", 'arcname': result['output_name']})
+                    line = {"type": "progress", "index": index, "filename": source['name'], "ok": True,
+                            "faces": result['faces']}
+                line.update({"done": completed + failed, "total": len(sources),
+                             "images_per_second": round(completed / elapsed, 2) if elapsed else 0.0})
+                yield json.dumps(line) + "\n"
+        finally:
+            # Written even if the client goes away, so the results can still be cleaned up.
+            close_spools(spools)
+            bucket.blob(f"{batch_prefix}manifest.json").upload_from_string(
+                json.dumps({'files': manifest}), content_type='application/json')
+
+        total_duration = time.time() - start_time
+        images_per_second = completed / total_duration if total_duration else 0.0
+        logging.info(f"[{request_id}] Blur batch complete: {completed} ok, {failed} failed in {total_duration:.2f}s ({images_per_second:.2f} images/s).", extra=log_extra)
+        yield json.dumps({
+            "type": "result",
+            "processed": completed,
+            "failed": failed,
+            "seconds": round(total_duration, 2),
+            "images_per_second": round(images_per_second, 2),
+            "download_url": download_url if completed else None,
+        }) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@bp.route('/download/multimedia/blur/batch/<batch_id>', methods=['GET'])
+def download_multimedia_blur_batch(batch_id):
+    """Streams the zip of a finished batch, built member by member from storage."""
+    log_extra = {'extra_data': {'request_id': batch_id, 'feature': 'multimedia-blur-batch-download'}}
+    if not current_app.config.get('GCS_AVAILABLE'):
+        return "Cloud Storage not available", 503
+    if session.get('multimedia_blur_batch_id') != batch_id:
+        logging.warning(f"Unauthorized batch download attempt for {batch_id}", extra=log_extra)
+        return "Access denied or batch has expired.", 403
+
+    bucket = current_app.gcs_bucket
+    manifest_blob = bucket.blob(f"{MULTIMEDIA_BLUR_BATCH_FOLDER_PREFIX}{batch_id}/manifest.json")
+    if not manifest_blob.exists():
+        return "Batch not found or still processing.", 404
+    manifest = json.loads(manifest_blob.download_as_bytes())
+
+    entries = ((item['arcname'], bucket.blob(item['path']).download_as_bytes) for item in manifest.get('files', []))
+    return Response(
+        stream_with_context(stream_zip(entries)),
+        mimetype='application/zip',
+        headers={'Content-Disposition': 'attachment; filename="blurred-images.zip"'},
+    )
@@ -0,0 +1,132 @@
+# features/multimedia/video_utils.py
+# Face anonymization for video clips. Frames are decoded, processed and
+# re-encoded one at a time, so memory stays flat regardless of clip length.
+#
+# MTCNN only runs every `detect_every` frames; in between, each box is moved
+# by the median Lucas-Kanade optical flow of the corners inside it. Detection
+# and tracking work on a downscaled grayscale copy of the frame; the blur is
+# applied to the full-resolution frame.
+#
+# cv2.VideoWriter only writes video, so the output has no audio track; the
+# upload form and the results say so.
+import time
+import cv2
+import numpy as np
+
+from .blur_utils import anonymize_faces, detect_faces
+
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.m4v', '.avi', '.mkv', '.webm')
+
+# VP8/WebM plays in every browser and ships with the opencv-python wheels;
+# MPEG-4 Part 2 in .mp4 is offered for downstream tools that expect it.
+VIDEO_OUTPUT_FORMATS = {
+    'webm': {'fourcc': 'VP80', 'extension': '.webm', 'mimetype': 'video/webm'},
+    'mp4': {'fourcc': 'mp4v', 'extension': '.mp4', 'mimetype': 'video/mp4'},
+}
+
+def allowed_video_file(filename: str) -> bool:
+    """Check if the file has one of the supported video extensions."""
+    return filename.lower().endswith(VIDEO_EXTENSIONS)
+
+def track_faces(prev_gray: np.ndarray, gray: np.ndarray, faces: list[dict], max_corners: int = 30) -> list[dict]:
+    """
+    Moves each face box from prev_gray to gray by the median optical flow of
+    the corners found inside it. Boxes with too few trackable corners (flat
+    regions, occlusion) stay where they were until the next detection.
+    """
+    height, width = gray.shape[:2]
+    tracked = []
+    for face in faces:
+        x, y, w, h = face['box']
+        x1, y1 = max(0, x), max(0, y)
+        x2, y2 = min(width, x + w), min(height, y + h)
+        if x2 - x1 < 4 or y2 - y1 < 4:
+            tracked.append(face)
+            continue
+
+        mask = np.zeros_like(prev_gray)
+        mask[y1:y2, x1:x2] = 255
+        points = cv2.goodFeaturesToTrack(prev_gray, max_corners, 0.01, 3, mask=mask)
+        if points is None or len(points) < 3:
+            tracked.append(face)
+            continue
+
+        new_points, status, _ = cv2.calcOpticalFlowPyrLK(prev_gray, gray, points, None, winSize=(15, 15), maxLevel=2)
+        found = status.ravel() == 1
+        if found.sum() < 3:
+            tracked.append(face)
+            continue
+
+        dx, dy = np.median((new_points[found] - points[found]).reshape(-1, 2), axis=0)
+        tracked.append({'box': [int(round(x + dx)), int(round(y + dy)), w, h], 'confidence': face.get('confidence', 0.0)})
+    return tracked
+
+def blur_video(input_path: str, output_path: str, blur_size: int, mode: str = 'blur', detect_every: int = 5,
+               detect_max_dimension: int = 960, output_format: str = 'webm', max_seconds: float | None = None) -> dict:
+    """
+    Anonymizes every face in the clip at input_path and writes it to output_path.
+
+    Returns stats: frames, detections, seconds, fps (processing throughput),
+    source_fps, width, height and truncated (max_seconds reached).
+    Raises ValueError for unreadable input.
+    """
+    capture = cv2.VideoCapture(input_path)
+    if not capture.isOpened():
+        raise ValueError("Cannot read this video. Please upload an MP4, MOV, AVI, MKV or WEBM file.")
+
+    source_fps = capture.get(cv2.CAP_PROP_FPS)
+    if not source_fps or source_fps != source_fps or source_fps > 240:
+        source_fps = 25.0
+    width = int(capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    scale = min(1.0, detect_max_dimension / max(width, height)) if detect_max_dimension and width and height else 1.0
+    max_frames = int(max_seconds * source_fps) if max_seconds else None
+
+    writer = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*VIDEO_OUTPUT_FORMATS[output_format]['fourcc']),
+                             source_fps, (width, height))
+    if not writer.isOpened():
+        capture.release()
+        raise RuntimeError(f"No {output_format} video encoder available in this OpenCV build.")
+
+    frames = detections = 0
+    truncated = False
+    faces_small, prev_gray = [], None
+    start_time = time.perf_counter()
+    try:
+        while True:
+            ok, frame = capture.read()
+            if not ok:
+                break
+            if max_frames is not None and frames >= max_frames:
+                truncated = True
+                break
+
+            small = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1.0 else frame
+            gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+            if frames % max(1, detect_every) == 0:
+                faces_small = detect_faces(small)
+                detections += 1
+            elif faces_small and prev_gray is not None:
+                faces_small = track_faces(prev_gray, gray, faces_small)
+            prev_gray = gray
+
+            if faces_small:
+                faces = [{'box': [int(round(v / scale)) for v in face['box']]} for face in faces_small]
+                anonymize_faces(frame, faces, blur_size, mode)
+            writer.write(frame)
+            frames += 1
+    finally:
+        capture.release()
+        writer.release()
+
+    elapsed = time.perf_counter() - start_time
+    return {
+        'frames': frames,
+        'detections': detections,
+        'seconds': elapsed,
+        'fps': frames / elapsed if elapsed else 0.0,
+        'source_fps': source_fps,
+        'width': width,
+        'height': height,
+        'truncated': truncated,
+    }
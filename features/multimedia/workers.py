@@ -0,0 +1,235 @@
+# features/multimedia/workers.py
+# Bounded process pool for the CPU-bound image work (normalize, detect, render,
+# analytics preview + colors). Running these inline on Waitress threads lets
+# TensorFlow's and OpenCV's own thread pools fight each other and the request
+# threads; here each worker process pins its thread counts and keeps one warm
+# detector.
+#
+# Image bytes travel through multiprocessing.shared_memory in both directions;
+# only small parameters and results (face boxes, palettes) are pickled.
+# With MULTIMEDIA_WORKER_PROCESSES=0 (the default) every job runs inline.
+import os
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+
+_pool = None
+_pool_slots = None
+_pool_lock = threading.Lock()
+_settings = {'processes': 0, 'threads_per_worker': 1, 'max_pending': 0, 'job_timeout': 120.0}
+
+class WorkerPoolBusy(RuntimeError):
+    """Every worker slot stayed busy for longer than the submit timeout."""
+
+
+def configure(processes: int, threads_per_worker: int = 1, max_pending: int | None = None,
+              job_timeout: float = 120.0):
+    """Sets the pool size; the pool itself starts on first use (or via start())."""
+    global _pool, _pool_slots
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+        _settings['processes'] = max(0, processes)
+        _settings['threads_per_worker'] = max(1, threads_per_worker)
+        _settings['max_pending'] = max_pending or _settings['processes'] * 2
+        _settings['job_timeout'] = job_timeout
+        _pool_slots = threading.BoundedSemaphore(_settings['max_pending']) if _settings['processes'] else None
+
+
+def start():
+    """Spawns (and warms) all workers now instead of on the first request."""
+    pool = _get_pool()
+    if pool is not None:
+        for future in [pool.submit(_worker_pid) for _ in range(_settings['processes'])]:
+            future.result()
+
+
+def _get_pool():
+    global _pool
+    if not _settings['processes']:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: the parent may already hold TensorFlow state and
+            # Waitress threads, neither of which survive a fork safely.
+            _pool = ProcessPoolExecutor(
+                max_workers=_settings['processes'],
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(_settings['threads_per_worker'],),
+            )
+            logging.info(f"Multimedia: started {_settings['processes']} image worker processes "
+                         f"({_settings['threads_per_worker']} threads each).")
+        return _pool
+
+
+def _discard_pool(pool):
+    """Drops a broken pool so the next _get_pool() spawns a fresh one."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _init_worker(threads: int):
+    # Must happen before TensorFlow/OpenCV create their thread pools.
+    for var in ('OMP_NUM_THREADS', 'TF_NUM_INTRAOP_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS'):
+        os.environ[var] = str(threads)
+    os.environ['TF_NUM_INTEROP_THREADS'] = '1'
+    os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '2')
+
+    import cv2
+    cv2.setNumThreads(threads)
+    try:
+        import tensorflow as tf
+        tf.config.threading.set_intra_op_parallelism_threads(threads)
+        tf.config.threading.set_inter_op_parallelism_threads(1)
+    except Exception as e:
+        logging.warning(f"Image worker: could not pin TensorFlow threads: {e}")
+
+    # Load the MTCNN weights once per worker rather than on its first job.
+    from .blur_utils import get_face_detector
+    get_face_detector()
+
+
+def _worker_pid():
+    return os.getpid()
+
+
+# --- Shared-memory transport ---
+
+def _to_shared(data: bytes) -> tuple[str, int]:
+    shm = shared_memory.SharedMemory(create=True, size=max(1, len(data)))
+    shm.buf[:len(data)] = data
+    name = shm.name
+    shm.close()
+    return name, len(data)
+
+
+def _from_shared(ref: tuple[str, int], unlink: bool = False) -> bytes:
+    name, size = ref
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        return bytes(shm.buf[:size])
+    finally:
+        shm.close()
+        if unlink:
+            shm.unlink()
+
+
+# --- Jobs (run in the worker, or inline when the pool is disabled) ---
+
+def _job_normalize(image_bytes: bytes, target_resolution):
+    from .image_utils import normalize_and_resize_image
+    return normalize_and_resize_image(image_bytes, tuple(target_resolution)), None
+
+
+def _job_detect(image_bytes: bytes, tiled: bool = False, tile_size: int = 1024, overlap: int = 192, tile_workers: int = 1):
+    from .blur_utils import decode_image, detect_faces, detect_faces_tiled
+    image = decode_image(image_bytes)
+    if tiled:
+        return None, detect_faces_tiled(image, tile_size=tile_size, overlap=overlap, max_workers=tile_workers)
+    return None, detect_faces(image)
+
+
+def _job_render(image_bytes: bytes, faces, blur_size, mode, output_format, quality, png_compression):
+    from .blur_utils import render_anonymized_image
+    return render_anonymized_image(None, faces, blur_size, mode, source_bytes=image_bytes, output_format=output_format,
+                                   quality=quality, png_compression=png_compression), None
+
+
+def _job_analytics_preview(image_bytes: bytes, preview_width: int = 960):
+    from .analytics_utils import build_preview_and_colors
+    return build_preview_and_colors(image_bytes, preview_width)
+
+
+_JOBS = {
+    'normalize': _job_normalize,
+    'detect': _job_detect,
+    'render': _job_render,
+    'analytics_preview': _job_analytics_preview,
+}
+
+
+def _run_in_worker(job_name: str, input_ref: tuple[str, int], kwargs: dict):
+    image_bytes = _from_shared(input_ref)
+    output_bytes, result = _JOBS[job_name](image_bytes, **kwargs)
+    output_ref = _to_shared(output_bytes) if output_bytes is not None else None
+    return output_ref, result
+
+
+def run_image_job(job_name: str, image_bytes: bytes, submit_timeout: float = 30.0, **kwargs):
+    """
+    Runs an image job and returns (output_bytes | None, result).
+    Blocks for a free worker slot up to submit_timeout (WorkerPoolBusy otherwise)
+    and for the job itself up to the configured job_timeout (TimeoutError).
+    If a worker died (OOM kill, crash in OpenCV/MTCNN) the pool is replaced
+    for later calls and this job is retried once inline.
+    """
+    pool = _get_pool()
+    if pool is None:
+        return _JOBS[job_name](image_bytes, **kwargs)
+
+    if not _pool_slots.acquire(timeout=submit_timeout):
+        raise WorkerPoolBusy("Image workers are busy. Please try again shortly.")
+    input_ref = None
+    try:
+        input_ref = _to_shared(image_bytes)
+        future = pool.submit(_run_in_worker, job_name, input_ref, kwargs)
+        try:
+            output_ref, result = future.result(timeout=_settings['job_timeout'])
+        except TimeoutError:
+            # The worker keeps running; free its output whenever it finishes.
+            future.add_done_callback(_unlink_late_output)
+            raise
+        output_bytes = _from_shared(output_ref, unlink=True) if output_ref is not None else None
+        return output_bytes, result
+    except BrokenProcessPool as e:
+        logging.error(f"Multimedia: image worker pool broke during '{job_name}' ({e}); "
+                      f"restarting it and running this job inline.")
+        _discard_pool(pool)
+        return _JOBS[job_name](image_bytes, **kwargs)
+    finally:
+        if input_ref is not None:
+            shm = shared_memory.SharedMemory(name=input_ref[0])
+            shm.close()
+            shm.unlink()
+        _pool_slots.release()
+
+
+def _unlink_late_output(future):
+    if future.cancelled() or future.exception() is not None:
+        return
+    output_ref = future.result()[0]
+    if output_ref is not None:
+        try:
+            _from_shared(output_ref, unlink=True)
+        except FileNotFoundError:
+            pass
+
+
+# --- Convenience wrappers used by the routes ---
+
+def normalize_image(image_bytes: bytes, target_resolution: tuple[int, int]) -> bytes:
+    return run_image_job('normalize', image_bytes, target_resolution=target_resolution)[0]
+
+
+def detect_faces_in_bytes(image_bytes: bytes, tiled: bool = False, tile_size: int = 1024,
+                          overlap: int = 192, tile_workers: int = 1) -> list[dict]:
+    return run_image_job('detect', image_bytes, tiled=tiled, tile_size=tile_size,
+                         overlap=overlap, tile_workers=tile_workers)[1]
+
+
+def render_faces(image_bytes: bytes, faces: list[dict], blur_size: int, mode: str, output_format: str,
+                 quality: int = 90, png_compression: int = 1) -> bytes:
+    return run_image_job('render', image_bytes, faces=faces, blur_size=blur_size, mode=mode,
+                         output_format=output_format, quality=quality, png_compression=png_compression)[0]
+
+
+def analytics_preview(image_bytes: bytes, preview_width: int = 960) -> tuple[bytes, list[dict]]:
+    return run_image_job('analytics_preview', image_bytes, preview_width=preview_width)
@@ -0,0 +1,251 @@
+# features/pii_redaction/analysis_utils.py
+# Builds the Presidio analyzer and runs it over every paragraph of a document
+# in one batched pass.
+import bisect
+import logging
+import re
+import time
+
+from presidio_analyzer import AnalyzerEngine, BatchAnalyzerEngine
+from presidio_analyzer.nlp_engine import NlpEngineProvider
+
+from . import workers
+from .cache_utils import PII_ANALYSIS_CACHE, analysis_cache_key, is_cacheable, recognizer_fingerprint
+
+# Paragraphs longer than max_chars are analyzed as overlapping windows of at
+# most max_chars, cut at sentence ends; set from app config by configure_chunking.
+CHUNKING = {'max_chars': 4000, 'overlap_chars': 400}
+
+# Where a new sentence (or line) starts: after ., !, ? or ; (plus closing
+# quotes/brackets) and whitespace, or after a line break.
+_SENTENCE_BREAK = re.compile(r'[.!?;]["\'\u201d\u2019)\]]*\s+|[\n\v\r]+')
+
+
+def create_analyzer(model_name: str = 'en_core_web_lg', disabled_components=(), language: str = 'en'):
+    """
+    Builds the Presidio analyzer on a spaCy model (sm/md/lg/trf, or a path to
+    a saved pipeline) and switches off the listed pipeline components.
+
+    Presidio reads tokens, lemmas and entities, so the parser is never needed.
+    Disabling tagger + attribute_ruler + lemmatizer (and, on sm/md/lg, the
+    tok2vec they share) is faster still, but leaves lemmas empty and so loses
+    Presidio's context-word score boost. NER in en_core_web_trf depends on the
+    shared "transformer" component, which must stay on. Names the model doesn't
+    have are ignored.
+    """
+    provider = NlpEngineProvider(nlp_configuration={
+        "nlp_engine_name": "spacy",
+        "models": [{"lang_code": language, "model_name": model_name}]
+    })
+    nlp_engine = provider.create_engine()
+    nlp = nlp_engine.nlp[language]
+    to_disable = [name for name in disabled_components if name in nlp.pipe_names]
+    unknown = sorted(set(disabled_components) - set(nlp.pipe_names))
+    if unknown:
+        logging.warning(f"spaCy model {model_name} has no components {unknown}; nothing to disable for them.")
+    if to_disable:
+        nlp.select_pipes(disable=to_disable)
+    logging.info(f"Presidio NLP pipeline: {model_name} running {nlp.pipe_names}.")
+    return AnalyzerEngine(nlp_engine=nlp_engine, supported_languages=[language])
+
+
+def analyze_texts(texts: list[str], analyzer, batch_size: int = 64, language: str = 'en',
+                  cache=PII_ANALYSIS_CACHE, pattern_matcher=None, entities=None,
+                  score_threshold: float = 0.0) -> list[list]:
+    """
+    Analyzes many short texts (paragraphs, table cells) together.
+
+    Repeated texts (same exact text, language, recognizer setup and
+    entity filter) are analyzed once per document and then served from
+    `cache` across requests (except paragraphs over the cache's size limit);
+    pass cache=None to skip it. The rest go through
+    the analyzer's spaCy pipeline with nlp.pipe in batches of batch_size (via
+    Presidio's BatchAnalyzerEngine) instead of one pipeline call each, or,
+    with a pattern_matcher ("fast" mode), through its pattern recognizers only.
+    Large documents are split across the worker processes when the pool is
+    running (workers.start(), which fixes the analyzer and matcher they use).
+
+    `entities` limits analysis to those entity types (only the recognizers
+    supporting them run); None means all. Results scoring below
+    score_threshold are dropped after caching, so one cached entry serves any
+    threshold.
+
+    Returns one list of RecognizerResults per input text, in order, with
+    offsets relative to that text; blank texts get []. Results are shared
+    between repeated texts, so treat them as read-only.
+    """
+    results = [[] for _ in texts]
+    entities = sorted(set(entities)) if entities else None
+    fingerprint = recognizer_fingerprint(analyzer, language)
+    if pattern_matcher is not None:
+        fingerprint += ':patterns'
+    if entities:
+        fingerprint += ':' + ','.join(entities)
+    positions = {}  # cache key -> indices of the texts that share it
+    for i, text in enumerate(texts):
+        if text.strip():
+            positions.setdefault(analysis_cache_key(text, language, fingerprint), []).append(i)
+
+    pending = []
+    for key, indices in positions.items():
+        cached = cache.get(key) if cache is not None and is_cacheable(texts[indices[0]]) else None
+        if cached is None:
+            pending.append(key)
+            continue
+        for i in indices:
+            results[i] = [r for r in cached if r.score >= score_threshold]
+
+    if pending:
+        start_time = time.perf_counter()
+        unique_texts = [texts[positions[key][0]] for key in pending]
+        analyzed = workers.analyze_in_workers(unique_texts, batch_size, language, entities,
+                                              use_patterns=pattern_matcher is not None, chunking=dict(CHUNKING))
+        if analyzed is None and pattern_matcher is not None:
+            analyzed = [pattern_matcher.analyze(text, entities) for text in unique_texts]
+        elif analyzed is None:
+            analyzed = _analyze_unique(unique_texts, analyzer, batch_size, language, entities)
+        cost_seconds = (time.perf_counter() - start_time) / len(pending)
+        for key, text_results in zip(pending, analyzed):
+            if text_results is None:
+                continue
+            if cache is not None and is_cacheable(texts[positions[key][0]]):
+                cache.set(key, tuple(text_results), cost_seconds=cost_seconds)
+            for i in positions[key]:
+                results[i] = [r for r in text_results if r.score >= score_threshold]
+
+    occurrences = sum(len(indices) for indices in positions.values())
+    logging.info(f"PII analysis ({'patterns only' if pattern_matcher is not None else 'full'}): {occurrences} paragraphs, {len(positions)} distinct, "
+                 f"{len(positions) - len(pending)} from cache, {len(pending)} analyzed.")
+    return results
+
+
+def configure_chunking(config):
+    """Window size for long paragraphs from app config (called once when the blueprint is registered)."""
+    max_chars = max(200, config.get('PII_ANALYSIS_CHUNK_CHARS', 4000))
+    CHUNKING['max_chars'] = max_chars
+    CHUNKING['overlap_chars'] = min(config.get('PII_ANALYSIS_CHUNK_OVERLAP_CHARS', 400), max_chars // 4)
+
+
+def chunk_spans(text: str, max_chars: int, overlap_chars: int) -> list[tuple[int, int]]:
+    """
+    (start, end) windows covering `text`, each at most max_chars long. Windows
+    end at a sentence break where there is one, else at whitespace, else hard
+    at max_chars, and each starts at a sentence break (else whitespace) about
+    overlap_chars before the previous end, so an entity cut by one window is
+    whole in the next.
+    """
+    if len(text) <= max_chars:
+        return [(0, len(text))]
+    breaks = [match.end() for match in _SENTENCE_BREAK.finditer(text)]
+    spans, start = [], 0
+    while start + max_chars < len(text):
+        limit = start + max_chars
+        i = bisect.bisect_right(breaks, limit) - 1
+        end = breaks[i] if i >= 0 and breaks[i] > start + overlap_chars else text.rfind(' ', start + overlap_chars + 1, limit) + 1
+        if end <= start + overlap_chars:
+            end = limit
+        spans.append((start, end))
+        # Next window: the earliest sentence start inside the overlap, else a word start.
+        j = bisect.bisect_left(breaks, end - overlap_chars)
+        if j < len(breaks) and breaks[j] < end:
+            start = breaks[j]
+        else:
+            start = text.find(' ', end - overlap_chars, end) + 1 or end
+    spans.append((start, len(text)))
+    return spans
+
+
+def _analyze_unique(texts: list[str], analyzer, batch_size: int, language: str,
+                    entities=None) -> list[list | None]:
+    """
+    Batched analysis of non-blank texts. Paragraphs longer than
+    CHUNKING['max_chars'] are split into overlapping windows (chunk_spans) that
+    are batched along with everything else (batches also capped at 8 windows'
+    worth of characters), so memory stays flat however long a paragraph gets.
+    Each window keeps only the results starting before the next window does
+    (anything later is found again, with full context, by the next window),
+    shifted back to paragraph offsets. A text whose analysis (of any window)
+    fails gets None.
+    """
+    max_chars, overlap_chars = CHUNKING['max_chars'], CHUNKING['overlap_chars']
+    windows = []  # (index into texts, window offset, offset the next window starts at, window text)
+    for i, text in enumerate(texts):
+        spans = chunk_spans(text, max_chars, overlap_chars)
+        next_starts = [start for start, _ in spans[1:]] + [len(text)]
+        windows.extend((i, start, next_start, text[start:end]) for (start, end), next_start in zip(spans, next_starts))
+    if len(windows) > len(texts):
+        logging.info(f"PII analysis: {len(windows) - len(texts)} extra windows for paragraphs over {max_chars} chars.")
+
+    # spaCy's memory per nlp.pipe batch grows with the characters in it, so
+    # batches are also capped at a few windows' worth of text.
+    char_budget = 8 * max_chars
+    groups, group, group_chars = [], [], 0
+    for window in windows:
+        if group and (len(group) >= batch_size or group_chars + len(window[3]) > char_budget):
+            groups.append(group)
+            group, group_chars = [], 0
+        group.append(window[3])
+        group_chars += len(window[3])
+    groups.append(group)
+    analyzed = [text_results for group in groups
+                for text_results in _analyze_batch(group, analyzer, batch_size, language, entities)]
+
+    results = [[] for _ in texts]
+    for (i, offset, next_start, _), window_results in zip(windows, analyzed):
+        if window_results is None or results[i] is None:
+            results[i] = None
+            continue
+        for result in window_results:
+            if offset + result.start < next_start:
+                result.start += offset
+                result.end += offset
+                results[i].append(result)
+    return results
+
+
+def _analyze_batch(texts: list[str], analyzer, batch_size: int, language: str,
+                   entities=None) -> list[list | None]:
+    """
+    One batched pass over `texts`. If it fails, each text is analyzed on its
+    own; a text whose analysis fails gets None and is left unredacted, as before.
+    """
+    try:
+        batch = BatchAnalyzerEngine(analyzer_engine=analyzer).analyze_iterator(
+            texts, language=language, batch_size=max(1, batch_size), entities=entities)
+        return [list(text_results) for text_results in batch]
+    except Exception as e:
+        logging.error(f"Batched PII analysis failed, analyzing paragraphs one by one: {e}", exc_info=True)
+
+    results = []
+    for text in texts:
+        try:
+            results.append(analyzer.analyze(text=text, language=language, entities=entities))
+        except Exception as e:
+            logging.error(f"Error analyzing paragraph text: {e}")
+            results.append(None)
+    return results
+
+
+def nlp_entities(analyzer, language: str = 'en') -> set[str]:
+    """Presidio entity types the loaded spaCy NER can produce (e.g. PERSON, LOCATION, DATE_TIME)."""
+    nlp = analyzer.nlp_engine.nlp[language]
+    configuration = getattr(analyzer.nlp_engine, 'ner_model_configuration', None)
+    mapping = getattr(configuration, 'model_to_presidio_entity_mapping', None) or {}
+    ignored = set(getattr(configuration, 'labels_to_ignore', None) or ())
+    labels = nlp.pipe_labels.get('ner', ()) if 'ner' in nlp.pipe_names else ()
+    return {mapping.get(label, label) for label in labels if label not in ignored}
+
+
+def needs_nlp(analyzer, pattern_matcher, entities, score_threshold: float = 0.0, language: str = 'en') -> bool:
+    """
+    Whether analyzing for `entities` needs the spaCy pass, or pattern_matcher
+    gives the same redactions. spaCy is needed for NER entity types, for types
+    only non-pattern recognizers find, and, with a score threshold, for the
+    lemma-based context boost that can lift a pattern match over it.
+    """
+    if not entities or pattern_matcher is None:
+        return True
+    entities = set(entities)
+    if entities & nlp_entities(analyzer, language) or not entities <= set(pattern_matcher.entities):
+        return True
+    return score_threshold > 0 and 'lemmatizer' in analyzer.nlp_engine.nlp[language].pipe_names
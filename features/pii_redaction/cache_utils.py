@@ -0,0 +1,55 @@
+# features/pii_redaction/cache_utils.py
+# Process-wide cache of Presidio results for repeated paragraphs (boilerplate,
+# table headers, slide footers) and the keys it uses.
+import hashlib
+
+from caching import TTLCache
+
+# (SHA-256 of the exact text, language, recognizer fingerprint) -> tuple of
+# RecognizerResults with offsets relative to that text. Keys are digests, so
+# the cache never holds the paragraphs (the PII) themselves.
+PII_ANALYSIS_CACHE = TTLCache(max_entries=4096, ttl_seconds=3600, name='pii_analysis')
+# Paragraphs longer than this are analyzed but not cached: they are rarely
+# repeated boilerplate, and their result lists are the largest entries.
+CACHE_LIMITS = {'max_text_chars': 10000}
+
+
+def configure_caches(config):
+    """Sizes the cache from app config (called once when the blueprint is registered)."""
+    PII_ANALYSIS_CACHE.configure(
+        config.get('PII_ANALYSIS_CACHE_MAX_ENTRIES', 4096),
+        config.get('PII_ANALYSIS_CACHE_TTL_SECONDS', 3600),
+    )
+    CACHE_LIMITS['max_text_chars'] = config.get('PII_ANALYSIS_CACHE_MAX_TEXT_CHARS', 10000)
+
+
+def recognizer_fingerprint(analyzer, language: str = 'en') -> str:
+    """
+    Identifies what the analyzer would detect: its NLP models and active
+    spaCy components, score threshold
+    and every recognizer (name, version, entities) for the language. Adding or
+    removing a recognizer changes the fingerprint, so stale results are never
+    reused.
+    """
+    recognizers = analyzer.registry.get_recognizers(language=language, all_fields=True)
+    parts = sorted(
+        f"{recognizer.name}:{getattr(recognizer, 'version', '')}:{','.join(sorted(recognizer.supported_entities))}"
+        for recognizer in recognizers
+    )
+    parts.append(repr(getattr(analyzer.nlp_engine, 'models', None)))
+    # Active spaCy components, since disabling e.g. the lemmatizer changes scores.
+    nlp = getattr(analyzer.nlp_engine, 'nlp', None) or {}
+    parts.append(repr(nlp[language].pipe_names if language in nlp else None))
+    parts.append(repr(getattr(analyzer, 'default_score_threshold', None)))
+    return hashlib.sha1('\n'.join(parts).encode()).hexdigest()
+
+
+def analysis_cache_key(text: str, language: str, fingerprint: str) -> tuple:
+    # Digest of the exact text: Presidio's patterns and spaCy's tokenizer treat
+    # tabs, NBSPs and spaces differently, so results for one variant aren't
+    # valid for another.
+    return (hashlib.sha256(text.encode()).hexdigest(), language, fingerprint)
+
+
+def is_cacheable(text: str) -> bool:
+    return len(text) <= CACHE_LIMITS['max_text_chars']
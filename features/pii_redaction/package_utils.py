@@ -0,0 +1,96 @@
+# features/pii_redaction/package_utils.py
+# Writes a redacted .docx/.pptx by patching the uploaded zip instead of
+# saving the whole package: document.save() re-serializes every XML part and
+# recompresses every image, font and embedded file, although redaction only
+# ever changes the text of a few parts.
+import io
+import logging
+import struct
+import zipfile
+
+# Bit 3 of the general purpose flags: CRC and sizes follow the data in a
+# descriptor instead of being in the local header.
+_DATA_DESCRIPTOR_FLAG = 0x08
+_LOCAL_HEADER_SIZE = 30
+_LOCAL_HEADER_NAME_LENGTHS = struct.Struct('<HH')  # name and extra field lengths, at offset 26
+
+
+def save_redacted_package(package, source_stream, parts, log_tag: str = 'PII_REDACT'):
+    """
+    The redacted file as a BytesIO: write_modified_package when possible, else
+    package.save() (a python-docx Document or python-pptx Presentation), so a
+    zip this writer can't patch still produces output.
+    """
+    try:
+        return write_modified_package(source_stream, parts)
+    except Exception as e:
+        logging.warning(f"[{log_tag}] Could not patch the package in place ({e!r}); saving it in full.")
+    output_stream = io.BytesIO()
+    package.save(output_stream)
+    output_stream.seek(0)
+    return output_stream
+
+
+def write_modified_package(source_stream, parts, output_stream=None):
+    """
+    Copies the zip in `source_stream` (the file the document was opened from)
+    to `output_stream`, replacing the entries of `parts` (python-docx or
+    python-pptx Part objects) with their current XML. Every other entry is
+    copied as its raw compressed bytes, without decompressing it, in the
+    original order and with its original metadata.
+
+    Parts must have been modified in place only: added or removed parts and
+    relationships would also need [Content_Types].xml and the .rels entries
+    rewritten, which document.save() does.
+    """
+    output_stream = output_stream or io.BytesIO()
+    replacements = {str(part.partname).lstrip('/'): part for part in parts}
+    source_stream.seek(0)
+    with zipfile.ZipFile(source_stream) as source, zipfile.ZipFile(output_stream, 'w') as output:
+        missing = set(replacements) - set(source.NameToInfo)
+        if missing:
+            raise KeyError(f"Parts not in the source package: {sorted(missing)}")
+        for info in source.infolist():
+            part = replacements.get(info.filename)
+            if part is not None:
+                replacement = zipfile.ZipInfo(info.filename, date_time=info.date_time)
+                replacement.compress_type = zipfile.ZIP_DEFLATED
+                replacement.external_attr = info.external_attr
+                output.writestr(replacement, part.blob)
+            else:
+                _copy_raw(source, info, output)
+    output_stream.seek(0)
+    return output_stream
+
+
+def _copy_raw(source, info, output):
+    """
+    Appends one entry of `source` to `output` as stored, still compressed.
+
+    zipfile has no public raw-copy API, so this relies on CPython's ZipFile
+    internals (checked on 3.11): `fp` is the underlying stream, in write mode
+    positioned at the end of the last entry; close() writes the central
+    directory from `filelist` at offset `start_dir`; `NameToInfo` indexes
+    entries by name; ZipInfo.FileHeader() builds a local header, with zero
+    CRC/sizes while the data-descriptor flag is set. If that changes this
+    raises, and save_redacted_package falls back to a full save.
+    """
+    source.fp.seek(info.header_offset)
+    header = source.fp.read(_LOCAL_HEADER_SIZE)
+    name_length, extra_length = _LOCAL_HEADER_NAME_LENGTHS.unpack_from(header, 26)
+    source.fp.seek(info.header_offset + _LOCAL_HEADER_SIZE + name_length + extra_length)
+    data = source.fp.read(info.compress_size)
+
+    copied = zipfile.ZipInfo(info.filename, date_time=info.date_time)
+    for attribute in ('compress_type', 'comment', 'extra', 'create_system', 'create_version',
+                      'extract_version', 'internal_attr', 'external_attr', 'CRC', 'compress_size', 'file_size'):
+        setattr(copied, attribute, getattr(info, attribute))
+    # The central directory has the CRC and sizes, so they go in the new local
+    # header and the source's trailing data descriptor (if any) is dropped.
+    copied.flag_bits = info.flag_bits & ~_DATA_DESCRIPTOR_FLAG
+    copied.header_offset = output.fp.tell()
+    output.fp.write(copied.FileHeader())
+    output.fp.write(data)
+    output.filelist.append(copied)
+    output.NameToInfo[copied.filename] = copied
+    output.start_dir = output.fp.tell()
@@ -0,0 +1,135 @@
+# features/pii_redaction/pattern_utils.py
+# "Fast" redaction mode: only Presidio's regex/checksum recognizers (emails,
+# phone numbers, SSNs, credit cards, IBANs, IP addresses, ...), no spaCy pass.
+import logging
+
+import regex
+from presidio_analyzer import EntityRecognizer, PatternRecognizer, RecognizerResult
+from presidio_analyzer.predefined_recognizers import PhoneRecognizer
+
+REDACTION_MODES = ('full', 'fast')
+
+# Anything that could be a phone number: 5+ digits with the usual separators.
+# Only used to find where to look; phonenumbers decides what really is one.
+_PHONE_CANDIDATE = regex.compile(r'\d(?:[\s().\-/+]{0,3}\d){4,}')
+# Text kept either side of a candidate, so a leading "+", "(", an extension
+# ("ext. 12") and the neighbouring characters phonenumbers checks are included.
+_PHONE_WINDOW_MARGIN = 16
+# Same limit Presidio's PatternRecognizer uses against runaway backtracking.
+_REGEX_TIMEOUT_SECONDS = 1
+
+
+class PatternMatcher:
+    """
+    The NLP-free recognizers of an analyzer, compiled once.
+
+    Built from the analyzer's registry, so custom PatternRecognizers are
+    included: plain ones have their patterns compiled here (Presidio
+    recompiles whenever flags differ and builds an explanation per match);
+    ones with their own analyze() (IBAN) are called as-is. Phone numbers go
+    through phonenumbers like in the full path, but only on the short windows
+    around digit runs instead of the whole paragraph for every region, and
+    not on digits a checksum-validated match already covers.
+
+    Results are what the analyzer's recognizers return for the same text,
+    minus the context-word score boost (it needs spaCy lemmas) and any phone
+    number found inside a validated card number or IBAN, which is redacted
+    either way.
+    """
+
+    def __init__(self, analyzer, language: str = 'en'):
+        self.language = language
+        self.score_threshold = getattr(analyzer, 'default_score_threshold', 0) or 0
+        self.patterns = []          # (recognizer, Pattern, compiled regex)
+        self.recognizers = []       # called through their own analyze()
+        self.phone_recognizers = []
+        for recognizer in analyzer.registry.get_recognizers(language=language, all_fields=True):
+            if isinstance(recognizer, PhoneRecognizer):
+                self.phone_recognizers.append(recognizer)
+            elif isinstance(recognizer, PatternRecognizer):
+                if type(recognizer).analyze is PatternRecognizer.analyze:
+                    self.patterns.extend(
+                        (recognizer, pattern, regex.compile(pattern.regex, flags=recognizer.global_regex_flags))
+                        for pattern in recognizer.patterns
+                    )
+                else:
+                    self.recognizers.append(recognizer)
+        all_recognizers = {id(r): r for r in [r for r, _, _ in self.patterns] + self.recognizers + self.phone_recognizers}
+        self.entities = sorted({entity for r in all_recognizers.values() for entity in r.supported_entities})
+        logging.info(f"Pattern matcher: {len(self.patterns)} patterns, "
+                     f"{len(self.recognizers) + len(self.phone_recognizers)} other recognizers, entities {self.entities}.")
+
+    def analyze(self, text: str, entities=None) -> list:
+        """
+        RecognizerResults for one text, like AnalyzerEngine.analyze without NLP
+        artifacts. `entities` limits it to recognizers for those types.
+        """
+        if not text.strip():
+            return []
+        wanted = (lambda recognizer: True) if not entities else (
+            lambda recognizer: not set(recognizer.supported_entities).isdisjoint(entities))
+        results = []
+        for recognizer, pattern, compiled in self.patterns:
+            if not wanted(recognizer):
+                continue
+            try:
+                matches = list(compiled.finditer(text, timeout=_REGEX_TIMEOUT_SECONDS))
+            except TimeoutError:
+                logging.warning(f"Pattern {recognizer.name}/{pattern.name} timed out; skipped for this paragraph.")
+                continue
+            for match in matches:
+                start, end = match.span()
+                if start == end:
+                    continue
+                score = _validated_score(recognizer, text[start:end], pattern.score)
+                if score > EntityRecognizer.MIN_SCORE:
+                    results.append(RecognizerResult(
+                        recognizer.supported_entities[0], start, end, score,
+                        recognition_metadata={
+                            RecognizerResult.RECOGNIZER_NAME_KEY: recognizer.name,
+                            RecognizerResult.RECOGNIZER_IDENTIFIER_KEY: recognizer.id,
+                        },
+                    ))
+        for recognizer in self.recognizers:
+            if wanted(recognizer):
+                results.extend(recognizer.analyze(text, recognizer.supported_entities, None))
+        phone_recognizers = [recognizer for recognizer in self.phone_recognizers if wanted(recognizer)]
+        if phone_recognizers:
+            # Digits already inside a checksum-validated match (card number,
+            # IBAN) are redacted regardless; phonenumbers is slowest on those.
+            validated = [(r.start, r.end) for r in results if r.score >= EntityRecognizer.MAX_SCORE]
+            for window_start, window_end in _phone_windows(text, validated):
+                for recognizer in phone_recognizers:
+                    for result in recognizer.analyze(text[window_start:window_end], recognizer.supported_entities, None):
+                        result.start += window_start
+                        result.end += window_start
+                        results.append(result)
+        results = EntityRecognizer.remove_duplicates(results)
+        return [result for result in results if result.score >= self.score_threshold
+                and (not entities or result.entity_type in entities)]
+
+
+def _validated_score(recognizer, matched_text: str, score: float) -> float:
+    """PatternRecognizer's checksum (validate) and pruning (invalidate) rules."""
+    validation = recognizer.validate_result(matched_text)
+    if validation is not None:
+        score = EntityRecognizer.MAX_SCORE if validation else EntityRecognizer.MIN_SCORE
+    if recognizer.invalidate_result(matched_text):
+        score = EntityRecognizer.MIN_SCORE
+    return score
+
+
+def _phone_windows(text: str, covered=()) -> list[tuple[int, int]]:
+    """Merged (start, end) windows around every phone-number candidate not inside a `covered` span."""
+    windows = []
+    for match in _PHONE_CANDIDATE.finditer(text):
+        if any(start <= match.start() and match.end() <= end for start, end in covered):
+            continue
+        start = max(0, match.start() - _PHONE_WINDOW_MARGIN)
+        end = min(len(text), match.end() + _PHONE_WINDOW_MARGIN)
+        if windows and start <= windows[-1][1]:
+            windows[-1] = (windows[-1][0], end)
+        else:
+            windows.append((start, end))
+    return windows
+
@@ -0,0 +1,84 @@
+# features/pii_redaction/redaction_utils.py
+# Applies analyzer results to plain strings and to the runs of a Word or
+# PowerPoint paragraph, in time linear in runs + entities.
+
+REDACTION_CHAR = '█'
+
+
+def merge_intervals(analysis_results) -> list[tuple[int, int]]:
+    """
+    Sorted, non-overlapping (start, end) spans covering every result.
+    Overlapping and touching entities (e.g. a PERSON inside an EMAIL match)
+    collapse into one span. Empty spans are dropped.
+    """
+    spans = sorted((res.start, res.end) for res in analysis_results if res.end > res.start)
+    merged = []
+    for start, end in spans:
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def redact_spans(text: str, spans) -> str:
+    """Replaces each (start, end) of sorted, non-overlapping spans with block characters."""
+    pieces, position = [], 0
+    for start, end in spans:
+        start, end = max(start, position), min(end, len(text))
+        if start >= end:
+            continue
+        pieces.append(text[position:start])
+        pieces.append(REDACTION_CHAR * (end - start))
+        position = end
+    if not pieces:
+        return text
+    pieces.append(text[position:])
+    return ''.join(pieces)
+
+
+def apply_redaction_to_text(text, analysis_results):
+    """
+    Helper function to apply character-level redaction to a string.
+    Returns the redacted string.
+    """
+    if not analysis_results:
+        return text
+    return redact_spans(text, merge_intervals(analysis_results))
+
+
+def redact_runs(runs, spans) -> int:
+    """
+    Redacts paragraph-level spans (from merge_intervals) across the runs that
+    make up the paragraph text, in one sweep over both. Only runs that overlap
+    a span are rewritten; returns how many were.
+    """
+    modified, offset, first = 0, 0, 0
+    for run in runs:
+        text = run.text
+        if not text:
+            continue
+        run_start, run_end = offset, offset + len(text)
+        offset = run_end
+        # Spans that end before this run can't touch any later run either.
+        while first < len(spans) and spans[first][1] <= run_start:
+            first += 1
+        local, i = [], first
+        while i < len(spans) and spans[i][0] < run_end:
+            local.append((spans[i][0] - run_start, spans[i][1] - run_start))
+            i += 1
+        if local:
+            run.text = redact_spans(text, local)
+            modified += 1
+    return modified
+
+
+def redact_paragraph(paragraph, analysis_results) -> int:
+    """
+    Redacts a Word or PowerPoint paragraph in place, given the analyzer results
+    for its full text. Returns the number of runs changed.
+    """
+    if not analysis_results:
+        return 0
+    return redact_runs(paragraph.runs, merge_intervals(analysis_results))
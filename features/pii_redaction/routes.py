@@ -4,212 +4,123 @@ from flask import (
 )
 import os
 import io
+import time
 import uuid
 from werkzeug.utils import secure_filename
 from docx import Document
 from pptx import Presentation
 import logging
 
+from .analysis_utils import analyze_texts, configure_chunking, needs_nlp
+from .cache_utils import configure_caches
+from .package_utils import save_redacted_package
+from .pattern_utils import REDACTION_MODES
+from . import workers
+from .redaction_utils import redact_paragraph
+
 # Shared rate limiter
 from extensions import limiter
 
 # Define the Blueprint
 bp = Blueprint('pii_redaction', __name__)
 
+@bp.record_once
+def _configure_pii_analysis(state):
+    configure_caches(state.app.config)
+    configure_chunking(state.app.config)
+    workers.configure(state.app.config.get('PII_WORKER_PROCESSES', 0),
+                      min_paragraphs=state.app.config.get('PII_WORKER_MIN_PARAGRAPHS', 200))
+
 def allowed_file_pii(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in current_app.config.get('PII_ALLOWED_EXTENSIONS', {'docx', 'pptx'})
 
-def apply_redaction_to_text(text, analysis_results):
+def parse_entity_filter(form, supported):
     """
-    Helper function to apply character-level redaction to a string.
-    Returns the redacted string.
+    The requested entity types ('entities': repeated fields or a comma-separated
+    list; blank means all) and minimum score ('min_score', 0-1). Raises
+    ValueError with a user-facing message.
     """
-    if not analysis_results:
-        return text
-    
-    # Convert to list for mutable character replacement
-    text_chars = list(text)
-    
-    for res in analysis_results:
-        start = res.start
-        end = res.end
-        # Ensure indices are within bounds
-        start = max(0, start)
-        end = min(len(text_chars), end)
-        
-        # Replace characters with block symbol
-        for i in range(start, end):
-            text_chars[i] = '█'
-            
-    return "".join(text_chars)
-
-def redact_runs_in_paragraph(paragraph, analyzer):
-    """
-    Analyzes a paragraph and redacts PII within its runs strictly where overlap occurs.
-    """
-    text = paragraph.text
-    if not text.strip():
-        return False
-
+    entities = sorted({name.strip().upper() for value in form.getlist('entities') for name in value.split(',') if name.strip()})
+    unknown = [name for name in entities if name not in supported]
+    if unknown:
+        raise ValueError(f"Unknown entity type(s): {', '.join(unknown)}. Available: {', '.join(sorted(supported))}.")
     try:
-        # Analyze the full paragraph text to get contextual PII positions
-        results = analyzer.analyze(text=text, language='en')
-    except Exception as e:
-        logging.error(f"Error analyzing paragraph text: {e}")
-        return False
-
-    if not results:
-        return False
-
-    current_offset = 0
-    redaction_occurred = False
-
-    # Iterate through runs and map global PII indices to local run indices
-    for run in paragraph.runs:
-        run_text = run.text
-        run_len = len(run_text)
-        
-        # Skip empty runs
-        if run_len == 0:
-            continue
-            
-        run_start = current_offset
-        run_end = current_offset + run_len
-        
-        # We process the run if it overlaps with any PII result
-        # We rebuild the run string char by char to handle multiple PIIs in one run
-        new_run_chars = list(run_text)
-        run_modified = False
-
-        for res in results:
-            pii_start = res.start
-            pii_end = res.end
-            
-            # Check overlap
-            overlap_start = max(run_start, pii_start)
-            overlap_end = min(run_end, pii_end)
-            
-            if overlap_start < overlap_end:
-                # Calculate local indices relative to this run
-                local_start = overlap_start - run_start
-                local_end = overlap_end - run_start
-                
-                # Replace specific characters
-                for i in range(local_start, local_end):
-                    new_run_chars[i] = '█'
-                
-                run_modified = True
-                redaction_occurred = True
-
-        if run_modified:
-            run.text = "".join(new_run_chars)
-        
-        current_offset += run_len
-    
-    return redaction_occurred
-
-def redact_word_document_pii(file_stream, analyzer):
+        min_score = float(form.get('min_score') or 0)
+    except ValueError:
+        raise ValueError("Minimum score must be a number between 0 and 1.")
+    if not 0 <= min_score <= 1:
+        raise ValueError("Minimum score must be between 0 and 1.")
+    return entities or None, min_score
+
+def iter_word_paragraphs(document):
+    """Body paragraphs, then the paragraphs of every table cell."""
+    yield from document.paragraphs
+    for table in document.tables:
+        for row in table.rows:
+            for cell in row.cells:
+                yield from cell.paragraphs
+
+def redact_word_document_pii(file_stream, analyzer, batch_size=64, pattern_matcher=None, entities=None,
+                             score_threshold=0.0):
     try:
         document = Document(file_stream)
         redacted_count = 0
         logging.info(f"[{g.request_id if hasattr(g, 'request_id') else 'PII_REDACT'}] Starting Word document redaction.")
 
-        # 1. Process Paragraphs
-        for para in document.paragraphs:
-            if redact_runs_in_paragraph(para, analyzer):
+        # Collect every paragraph and table cell first so the NLP pipeline can
+        # process them in batches, then redact each with its own results.
+        # With a pattern_matcher ("fast" mode) spaCy is skipped entirely.
+        paragraphs = list(iter_word_paragraphs(document))
+        all_results = analyze_texts([para.text for para in paragraphs], analyzer, batch_size,
+                                    pattern_matcher=pattern_matcher, entities=entities,
+                                    score_threshold=score_threshold)
+        modified_parts = set()
+        for para, results in zip(paragraphs, all_results):
+            if redact_paragraph(para, results):
                 redacted_count += 1
-
-        # 2. Process Tables
-        for table in document.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for para in cell.paragraphs:
-                        if redact_runs_in_paragraph(para, analyzer):
-                            redacted_count += 1
+                modified_parts.add(para.part)
         
         logging.info(f"[{g.request_id if hasattr(g, 'request_id') else 'PII_REDACT'}] Modified approx {redacted_count} paragraphs/cells in Word document.")
         
-        output_stream = io.BytesIO()
-        document.save(output_stream)
-        output_stream.seek(0)
-        return output_stream
+        # Only the parts with redacted text are re-serialized; media and every
+        # other entry are copied from the upload as they are.
+        return save_redacted_package(document, file_stream, modified_parts,
+                                     g.request_id if hasattr(g, 'request_id') else 'PII_REDACT')
     except Exception as e:
         logging.error(f"[{g.request_id if hasattr(g, 'request_id') else 'PII_REDACT'}] Error processing Word document for PII: {e}", exc_info=True)
         return None
 
-def redact_powerpoint_document_pii(file_stream, analyzer):
+def iter_powerpoint_paragraphs(presentation):
+    """Paragraphs of every text frame on every slide."""
+    for slide in presentation.slides:
+        for shape in slide.shapes:
+            if shape.has_text_frame:
+                yield from shape.text_frame.paragraphs
+
+def redact_powerpoint_document_pii(file_stream, analyzer, batch_size=64, pattern_matcher=None, entities=None,
+                                   score_threshold=0.0):
+    req_id_tag = g.request_id if hasattr(g, 'request_id') else 'PII_REDACT_PPTX'
     try:
         presentation = Presentation(file_stream)
         redacted_count = 0
-        req_id_tag = g.request_id if hasattr(g, 'request_id') else 'PII_REDACT_PPTX'
         logging.info(f"[{req_id_tag}] Starting PowerPoint document redaction.")
 
-        for i, slide in enumerate(presentation.slides):
-            for shape in slide.shapes:
-                if not shape.has_text_frame:
-                    continue
-                
-                text_frame = shape.text_frame
-                for para in text_frame.paragraphs:
-                    text = para.text
-                    if not text.strip():
-                        continue
-
-                    try:
-                        results = analyzer.analyze(text=text, language='en')
-                    except Exception as e:
-                        logging.error(f"[{req_id_tag}] Error analyzing PPTX paragraph: {e}")
-                        continue
-
-                    if not results:
-                        continue
-
-                    current_offset = 0
-                    
-                    # Similar logic to Word: Map global paragraph offsets to run offsets
-                    for run in para.runs:
-                        # Some runs in PPTX might be empty or None
-                        if not hasattr(run, 'text') or not run.text:
-                            continue
-
-                        run_text = run.text
-                        run_len = len(run_text)
-                        
-                        run_start = current_offset
-                        run_end = current_offset + run_len
-                        
-                        new_run_chars = list(run_text)
-                        run_modified = False
-
-                        for res in results:
-                            pii_start = res.start
-                            pii_end = res.end
-                            
-                            overlap_start = max(run_start, pii_start)
-                            overlap_end = min(run_end, pii_end)
-                            
-                            if overlap_start < overlap_end:
-                                local_start = overlap_start - run_start
-                                local_end = overlap_end - run_start
-                                
-                                for k in range(local_start, local_end):
-                                    new_run_chars[k] = '█'
-                                
-                                run_modified = True
-                                redacted_count += 1
-                        
-                        if run_modified:
-                            run.text = "".join(new_run_chars)
-                        
-                        current_offset += run_len
-
-        logging.info(f"[{req_id_tag}] Redacted content in approx {redacted_count} runs in PowerPoint document.")
+        paragraphs = list(iter_powerpoint_paragraphs(presentation))
+        all_results = analyze_texts([para.text for para in paragraphs], analyzer, batch_size,
+                                    pattern_matcher=pattern_matcher, entities=entities,
+                                    score_threshold=score_threshold)
+        modified_parts = set()
+        for para, results in zip(paragraphs, all_results):
+            runs = redact_paragraph(para, results)
+            if runs:
+                redacted_count += runs
+                modified_parts.add(para.part)
+
+        logging.info(f"[{req_id_tag}] Redacted content in approx {redacted_count} runs in PowerPoint document "
+                     f"({len(modified_parts)} slides changed).")
         
-        output_stream = io.BytesIO()
-        presentation.save(output_stream)
-        output_stream.seek(0)
-        return output_stream
+        return save_redacted_package(presentation, file_stream, modified_parts, req_id_tag)
     except Exception as e:
         logging.error(f"[{req_id_tag}] Error processing PowerPoint document for PII: {e}", exc_info=True)
         return None
@@ -225,7 +136,13 @@ def process_redact():
         "original_filename": None,
         "presidio_available": current_app.config.get('PRESIDIO_ANALYZER_AVAILABLE', False),
         "gcs_available": current_app.config.get('GCS_AVAILABLE', False),
-        "hx_target_is_result": True
+        "hx_target_is_result": True,
+        "redaction_mode": None,
+        "redaction_seconds": None,
+        "entities": None,
+        "min_score": 0.0,
+        "nlp_skipped": False,
+        "default_redaction_mode": current_app.config.get('PII_DEFAULT_REDACTION_MODE', 'full'),
     }
 
     if not context["presidio_available"]:
@@ -247,25 +164,56 @@ def process_redact():
         flash('No file selected for redaction.', 'error')
         return render_template("pii_redaction/templates/pii_redaction_content.html", **context)
 
+    mode = request.form.get('mode', context["default_redaction_mode"]).strip().lower()
+    if mode not in REDACTION_MODES:
+        flash(f"Unknown redaction mode '{mode}'. Choose one of: {', '.join(REDACTION_MODES)}.", 'error')
+        return render_template("pii_redaction/templates/pii_redaction_content.html", **context)
+    analyzer = current_app.presidio_analyzer
+    available_matcher = getattr(current_app, 'pii_pattern_matcher', None)
+    if mode == 'fast' and available_matcher is None:
+        flash("Fast (pattern-only) redaction is not available.", "error")
+        logging.error(f"[{g.request_id}] Fast redaction requested but no pattern matcher was built.")
+        return render_template("pii_redaction/templates/pii_redaction_content.html", **context)
+    supported = set(available_matcher.entities) if mode == 'fast' else set(analyzer.get_supported_entities())
+    try:
+        entities, min_score = parse_entity_filter(request.form, supported)
+    except ValueError as e:
+        flash(str(e), 'error')
+        return render_template("pii_redaction/templates/pii_redaction_content.html", **context)
+    # Only pattern-recognizer entities requested: spaCy would add nothing.
+    if mode == 'full' and not needs_nlp(analyzer, available_matcher, entities, min_score):
+        mode = 'fast'
+        context["nlp_skipped"] = True
+    pattern_matcher = available_matcher if mode == 'fast' else None
+    context["entities"] = entities
+    context["min_score"] = min_score
+
     if file and allowed_file_pii(file.filename):
         original_filename = secure_filename(file.filename)
         context["original_filename"] = original_filename
         file_ext = original_filename.rsplit('.', 1)[1].lower()
         
-        logging.info(f"[{g.request_id}] File received: {original_filename} (Type: {file_ext})")
+        logging.info(f"[{g.request_id}] File received: {original_filename} (Type: {file_ext}, mode: {mode}, "
+                     f"entities: {entities or 'all'}, min score: {min_score})")
 
         file_stream = io.BytesIO(file.read())
         output_stream = None
         
-        analyzer = current_app.presidio_analyzer
         gcs_bucket = current_app.gcs_bucket
 
         try:
+            batch_size = current_app.config.get('PII_ANALYSIS_BATCH_SIZE', 64)
+            start_time = time.perf_counter()
             if file_ext == 'docx':
-                output_stream = redact_word_document_pii(file_stream, analyzer)
+                output_stream = redact_word_document_pii(file_stream, analyzer, batch_size, pattern_matcher,
+                                                         entities, min_score)
             elif file_ext == 'pptx':
-                output_stream = redact_powerpoint_document_pii(file_stream, analyzer)
-            
+                output_stream = redact_powerpoint_document_pii(file_stream, analyzer, batch_size, pattern_matcher,
+                                                               entities, min_score)
+            context["redaction_seconds"] = time.perf_counter() - start_time
+            logging.info(f"[{g.request_id}] Redaction took {context['redaction_seconds']:.2f}s "
+                         f"(mode: {mode}, entities: {entities or 'all'}, min score: {min_score}).")
+
             if output_stream:
                 redacted_gcs_path = f"pii_redaction_results/{g.request_id}/redacted_{original_filename}"
                 redacted_blob = gcs_bucket.blob(redacted_gcs_path)
@@ -281,7 +229,8 @@ def process_redact():
                     'mimetype': f'application/vnd.openxmlformats-officedocument.{"wordprocessingml.document" if file_ext == "docx" else "presentationml.presentation"}'
                 }
                 context["redacted_file_url"] = url_for('pii_redaction.download_redacted_file_pii', file_id=session_file_id)
-                flash(f"Document '{original_filename}' processed for PII redaction. Click link to download.", "success")
+                context["redaction_mode"] = mode
+                flash(f"Document '{original_filename}' processed for PII redaction ({mode} mode). Click link to download.", "success")
             else:
                 flash(f"PII redaction process failed for '{original_filename}'. Output stream was empty. Check logs.", "error")
                 logging.error(f"[{g.request_id}] Redaction output_stream was None for {original_filename}.")
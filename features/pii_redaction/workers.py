@@ -0,0 +1,116 @@
+# features/pii_redaction/workers.py
+# Process pool for Presidio analysis of large documents. Analysis is CPU-bound
+# Python, so on the request thread a long document keeps one core busy while
+# the others idle; here its distinct paragraphs are split across workers and
+# the results merged back in the parent, which then rewrites the runs.
+#
+# Workers are forked (not spawned) once, from create_app, right after the
+# analyzer is loaded and before the server starts its threads: each inherits
+# the loaded spaCy model copy-on-write instead of loading its own, and the
+# same workers serve every later request. With PII_WORKER_PROCESSES=0 (the
+# default) analysis runs inline.
+import gc
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from presidio_analyzer import RecognizerResult
+
+_pool = None
+_pool_lock = threading.Lock()
+_settings = {'processes': 0, 'min_paragraphs': 200}
+# Set in the parent before forking, so every worker starts with them loaded.
+_analyzer = None
+_pattern_matcher = None
+
+
+def configure(processes: int, min_paragraphs: int = 200):
+    """Sets the pool size; the workers start in start()."""
+    _settings['processes'] = max(0, processes)
+    _settings['min_paragraphs'] = max(1, min_paragraphs)
+
+
+def start(analyzer, pattern_matcher=None):
+    """
+    Forks the workers with `analyzer` (and the fast-mode matcher) preloaded.
+    Call once the model is loaded and before any server threads exist.
+    """
+    global _pool, _analyzer, _pattern_matcher
+    if not _settings['processes'] or 'fork' not in multiprocessing.get_all_start_methods():
+        return
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _analyzer, _pattern_matcher = analyzer, pattern_matcher
+        # Objects that exist now are never collected again, so workers' garbage
+        # collections don't write to (and copy) the pages holding the model.
+        gc.collect()
+        gc.freeze()
+        _pool = ProcessPoolExecutor(max_workers=_settings['processes'], mp_context=multiprocessing.get_context('fork'))
+        # A fork-context pool starts every worker on the first submit; do it now.
+        pids = {future.result() for future in [_pool.submit(os.getpid) for _ in range(_settings['processes'])]}
+    logging.info(f"PII redaction: forked {len(pids)} analysis worker processes.")
+
+
+def stop():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+
+
+def analyze_in_workers(texts: list[str], batch_size: int, language: str, entities=None,
+                       use_patterns: bool = False, chunking: dict | None = None) -> list[list | None] | None:
+    """
+    Analyzes non-blank `texts` across the worker processes, in contiguous parts
+    of roughly equal length. Returns one result list (or None) per text like
+    analysis_utils._analyze_unique, or None when the pool is off, the input is
+    too small to be worth shipping to other processes, or the pool broke.
+    """
+    pool = _pool
+    if pool is None or len(texts) < _settings['min_paragraphs']:
+        return None
+    parts = _split_evenly(texts, _settings['processes'])
+    try:
+        futures = [pool.submit(_job_analyze, part, batch_size, language, entities, use_patterns, chunking)
+                   for part in parts]
+        packed = [text_results for future in futures for text_results in future.result()]
+    except BrokenProcessPool as e:
+        # Re-forking from a process that now runs server threads isn't safe;
+        # fall back to inline analysis until the app restarts.
+        logging.error(f"PII analysis workers died ({e}); analyzing inline from now on.")
+        stop()
+        return None
+    return [None if text_results is None else [RecognizerResult(*fields) for fields in text_results]
+            for text_results in packed]
+
+
+def _split_evenly(texts: list[str], parts: int) -> list[list[str]]:
+    """Contiguous slices of `texts` with about the same number of characters each."""
+    target = sum(map(len, texts)) / parts
+    slices, current, size = [], [], 0
+    for text in texts:
+        current.append(text)
+        size += len(text)
+        if size >= target * (len(slices) + 1) and len(slices) < parts - 1:
+            slices.append(current)
+            current = []
+    slices.append(current)
+    return [part for part in slices if part]
+
+
+def _job_analyze(texts, batch_size, language, entities, use_patterns, chunking):
+    """Runs in a worker. Results go back as (entity_type, start, end, score) tuples."""
+    from .analysis_utils import CHUNKING, _analyze_unique
+    if chunking:
+        CHUNKING.update(chunking)
+    if use_patterns:
+        results = [_pattern_matcher.analyze(text, entities) for text in texts]
+    else:
+        results = _analyze_unique(texts, _analyzer, batch_size, language, entities)
+    return [None if text_results is None else [(r.entity_type, r.start, r.end, r.score) for r in text_results]
+            for text_results in results]
@@ -1,5 +1,6 @@
 # main_routes.py
-from flask import Blueprint, render_template, current_app, request, make_response
+from flask import Blueprint, render_template, current_app, request, make_response, jsonify
+from caching import cache_stats
 
 # Define the Blueprint
 bp = Blueprint('main', __name__)
@@ -90,6 +91,7 @@ def index(feature_key):
     elif feature_key == "pii_redaction":
         template_context["presidio_available"] = current_app.config.get('PRESIDIO_ANALYZER_AVAILABLE', False)
         template_context["services_ready"] = template_context["presidio_available"] and template_context["gcs_available"]
+        template_context["default_redaction_mode"] = current_app.config.get('PII_DEFAULT_REDACTION_MODE', 'full')
 
     return render_template(
         'layout.html',
@@ -138,6 +140,11 @@ def robots():
     response.headers["Content-Type"] = "text/plain"
     return response
 
+@bp.route('/metrics/caches')
+def cache_metrics():
+    # Counters only (sizes, hit ratio, latency saved) - no keys or cached content.
+    return jsonify(cache_stats())
+
 # HTMX Specific Endpoint (Keep this for partial reloads)
 @bp.route('/content/<feature_key>')
 def get_feature_content(feature_key):
@@ -176,5 +183,6 @@ def get_feature_content(feature_key):
         context["presidio_available"] = current_app.config.get('PRESIDIO_ANALYZER_AVAILABLE', False)
         context["hx_target_is_result"] = False
         context["services_ready"] = context["presidio_available"] and context["gcs_available"]
+        context["default_redaction_mode"] = current_app.config.get('PII_DEFAULT_REDACTION_MODE', 'full')
 
     return render_template(template_to_render, **context)
\ No newline at end of file
@@ -1,13 +1,19 @@
 # run.py
 import os
+import multiprocessing
 from waitress import serve
 from app import create_app # Import the factory function
 
-# Create the app instance
-app = create_app()
+# Create the app instance. The image worker processes (features/multimedia/workers.py)
+# are spawned and re-import this module; they don't need an app of their own.
+if multiprocessing.parent_process() is None:
+    app = create_app()
 
 if __name__ == "__main__":
     # PORT is set by the hosting platform (Railway).
     port = int(os.environ.get("PORT", 8080))
     print(f"Starting Waitress server on host 0.0.0.0, port {port}")
-    serve(app, host="0.0.0.0", port=port)
\ No newline at end of file
+    # channel_request_lookahead lets Waitress notice clients that hang up while a
+    # request is running (exposed as environ['waitress.client_disconnected']), so
+    # long analyses can be abandoned early.
+    serve(app, host="0.0.0.0", port=port, channel_request_lookahead=5)
\ No newline at end of file